@@ -0,0 +1,60 @@
+import sys
+import os
+from logging.config import fileConfig
+from sqlalchemy import engine_from_config, pool
+from alembic import context
+
+# Ensure the app modules can be found
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+# Import the project's database models and settings
+from app.db.base_class import Base
+from app.core.config import settings  # Load database URL from settings
+from app.models import token, user  # Ensure the models are imported
+
+# This is the Alembic Config object, providing access to config values
+config = context.config
+
+# Set up logging from Alembic's config file
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# Load the correct database URL dynamically
+config.set_main_option("sqlalchemy.url", settings.SQLALCHEMY_DATABASE_URI)
+
+# Use SQLAlchemy metadata to detect model changes
+target_metadata = Base.metadata
+
+def run_migrations_offline() -> None:
+    """Run migrations in 'offline' mode."""
+    url = config.get_main_option("sqlalchemy.url")
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    """Run migrations in 'online' mode."""
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection, target_metadata=target_metadata
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,115 @@
+"""Add user search indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 10:00:00.000000
+
+PostgreSQL: lower() B-tree indexes with text_pattern_ops for exact and
+prefix matches and pg_trgm GIN indexes for substring matches, built
+concurrently so that the users table stays writable.
+
+SQLite: lower() indexes and the users_search FTS5 table with the trigram
+tokenizer, kept in sync with users by triggers (see app/db/search.py).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ("email", "full_name")
+
+SQLITE_SEARCH_DDL = (
+    """
+    CREATE VIRTUAL TABLE users_search USING fts5(
+        email, full_name,
+        content='users', content_rowid='id',
+        tokenize='trigram case_sensitive 0'
+    )
+    """,
+    """
+    CREATE TRIGGER users_search_ai AFTER INSERT ON users BEGIN
+        INSERT INTO users_search(rowid, email, full_name)
+        VALUES (new.id, new.email, new.full_name);
+    END
+    """,
+    """
+    CREATE TRIGGER users_search_ad AFTER DELETE ON users BEGIN
+        INSERT INTO users_search(users_search, rowid, email, full_name)
+        VALUES ('delete', old.id, old.email, old.full_name);
+    END
+    """,
+    """
+    CREATE TRIGGER users_search_au
+    AFTER UPDATE OF email, full_name ON users BEGIN
+        INSERT INTO users_search(users_search, rowid, email, full_name)
+        VALUES ('delete', old.id, old.email, old.full_name);
+        INSERT INTO users_search(rowid, email, full_name)
+        VALUES (new.id, new.email, new.full_name);
+    END
+    """,
+    "INSERT INTO users_search(users_search) VALUES ('rebuild')",
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_context().dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            for column in COLUMNS:
+                op.create_index(
+                    f"ix_users_{column}_lower",
+                    "users",
+                    [sa.text(f"lower({column}) text_pattern_ops")],
+                    postgresql_concurrently=True,
+                    if_not_exists=True,
+                )
+                op.create_index(
+                    f"ix_users_{column}_trgm",
+                    "users",
+                    [sa.text(f"lower({column}) gin_trgm_ops")],
+                    postgresql_using="gin",
+                    postgresql_concurrently=True,
+                    if_not_exists=True,
+                )
+        return
+
+    for column in COLUMNS:
+        op.create_index(f"ix_users_{column}_lower", "users", [sa.text(f"lower({column})")])
+    if dialect == "sqlite":
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_context().dialect.name
+    if dialect == "sqlite":
+        for trigger in ("users_search_ai", "users_search_ad", "users_search_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS users_search")
+    if dialect == "postgresql":
+        with op.get_context().autocommit_block():
+            for column in COLUMNS:
+                op.drop_index(
+                    f"ix_users_{column}_trgm",
+                    table_name="users",
+                    postgresql_concurrently=True,
+                    if_exists=True,
+                )
+                op.drop_index(
+                    f"ix_users_{column}_lower",
+                    table_name="users",
+                    postgresql_concurrently=True,
+                    if_exists=True,
+                )
+        return
+    for column in COLUMNS:
+        op.drop_index(f"ix_users_{column}_lower", table_name="users")
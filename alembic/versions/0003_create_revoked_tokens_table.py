@@ -0,0 +1,49 @@
+"""Create revoked_tokens table
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 11:00:00.000000
+
+Revoked tokens, login sessions and per-user cutoffs, mirrored in memory
+by every process (see app/core/revocation.py).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("jti", sa.String(length=64), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("revoked_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("jti"),
+    )
+    op.create_index(
+        "ix_revoked_tokens_user_id", "revoked_tokens", ["user_id"], unique=False
+    )
+    op.create_index(
+        "ix_revoked_tokens_revoked_at", "revoked_tokens", ["revoked_at"], unique=False
+    )
+    op.create_index(
+        "ix_revoked_tokens_expires_at", "revoked_tokens", ["expires_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_revoked_tokens_expires_at", table_name="revoked_tokens")
+    op.drop_index("ix_revoked_tokens_revoked_at", table_name="revoked_tokens")
+    op.drop_index("ix_revoked_tokens_user_id", table_name="revoked_tokens")
+    op.drop_table("revoked_tokens")
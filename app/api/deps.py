@@ -1,49 +1,78 @@
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+from fastapi import Body, Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from jose import JWTError
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Generator, Optional
+from typing import AsyncGenerator, Callable, Optional, Union
 
 from app.core.config import settings
-from app.core.security import ALGORITHM
-from app.db.session import SessionLocal
-from app.models.user import User
+from app.core.rate_limit import check_auth_rate_limit
+from app.core.security import decode_access_token
+from app.db.session import AsyncSessionLocal, SessionLocal, init_engines, session_scope
+from app.core.user_cache import CachedUser
 from app.schemas.token import TokenPayload
-from app.crud.user import get_user_by_id
+from app.services.user_service import UserService
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 
-def get_db() -> Generator:
+def get_session_factory() -> Callable[[], Union[Session, AsyncSession]]:
+    """
+    Dependency for getting the session factory of the configured mode.
+
+    Use it for work that outlives the request's dependencies, such as
+    streaming responses, which must open and close their own session.
+    The engines are created on the first call.
+    """
+    init_engines()
+    if settings.USE_ASYNC_DB:
+        return AsyncSessionLocal
+    return SessionLocal
+
+
+async def get_db(
+    session_factory: Callable[[], Union[Session, AsyncSession]] = Depends(
+        get_session_factory
+    ),
+) -> AsyncGenerator[Union[Session, AsyncSession], None]:
     """
     Dependency for getting a database session.
+
+    Yields an AsyncSession when USE_ASYNC_DB is enabled, otherwise a
+    regular Session.
     """
-    db = SessionLocal()
-    try:
+    async with session_scope(session_factory) as db:
         yield db
-    finally:
-        db.close()
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+async def get_token_payload(token: str = Depends(oauth2_scheme)) -> TokenPayload:
     """
-    Dependency for getting the current authenticated user.
+    Dependency for getting the validated claims of the bearer token.
+
+    Revoked tokens are rejected from the in-memory revocation list, without
+    a query.
     """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
+        return decode_access_token(token)
     except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-        
-    user = get_user_by_id(db, id=token_data.sub)
+
+
+async def get_current_user(
+    db: Union[Session, AsyncSession] = Depends(get_db),
+    token_data: TokenPayload = Depends(get_token_payload),
+) -> CachedUser:
+    """
+    Dependency for getting the current authenticated user.
+
+    Returns the cached identity of the user rather than the ORM object;
+    load the row through UserService when it needs to be modified.
+    """
+    user = await UserService(db).get_identity(id=token_data.sub)
     
     if not user:
         raise HTTPException(
@@ -54,9 +83,9 @@ def get_current_user(
     return user
 
 
-def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+async def get_current_active_user(
+    current_user: CachedUser = Depends(get_current_user),
+) -> CachedUser:
     """
     Dependency for getting the current active user.
     """
@@ -69,9 +98,9 @@ def get_current_active_user(
     return current_user
 
 
-def get_current_active_superuser(
-    current_user: User = Depends(get_current_user),
-) -> User:
+async def get_current_active_superuser(
+    current_user: CachedUser = Depends(get_current_user),
+) -> CachedUser:
     """
     Dependency for getting the current active superuser.
     """
@@ -81,4 +110,31 @@ def get_current_active_superuser(
             detail="Not enough permissions"
         )
     
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def _client_ip(request: Request) -> str:
+    # Behind a proxy, run uvicorn with --proxy-headers so this is the real client
+    return request.client.host if request.client else "unknown"
+
+
+async def rate_limit_login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+) -> None:
+    """
+    Dependency limiting login attempts per client IP and per email.
+
+    Runs before the endpoint, so rejected attempts never reach bcrypt.
+    """
+    await check_auth_rate_limit(_client_ip(request), form_data.username)
+
+
+async def rate_limit_register(
+    request: Request,
+    email: str = Body(...),
+) -> None:
+    """
+    Dependency limiting registrations per client IP and per email.
+    """
+    await check_auth_rate_limit(_client_ip(request), email)
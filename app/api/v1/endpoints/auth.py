@@ -1,29 +1,43 @@
-from datetime import timedelta
-from typing import Any
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from typing import Any, Callable, Union
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api import deps
-from app.core.config import settings
-from app.core.security import create_access_token
-from app.schemas.token import Token
-from app.services.user_service import UserService
-from app.core.security import verify_password
+from app.core.security import password_needs_rehash
+from app.crud.user import DuplicateEmailError
+from app.schemas.token import Token, TokenPayload
+from app.services.token_service import TokenService, issue_tokens
+from app.services.user_service import UserService, rehash_password
 
 router = APIRouter()
 
 
-@router.post("/login", response_model=Token)
-def login_access_token(
-    db: Session = Depends(deps.get_db),
+@router.post(
+    "/login", response_model=Token, dependencies=[Depends(deps.rate_limit_login)]
+)
+async def login_access_token(
+    background_tasks: BackgroundTasks,
+    db: Union[Session, AsyncSession] = Depends(deps.get_db),
+    session_factory: Callable[[], Union[Session, AsyncSession]] = Depends(
+        deps.get_session_factory
+    ),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
+    and a refresh token to renew it
+
+    Hashes with an outdated cost or scheme are replaced after the response
+    is sent, while the plain password is at hand.
     """
     user_service = UserService(db)
-    user = user_service.get_by_email(email=form_data.username)
+    user = await user_service.authenticate(
+        email=form_data.username, password=form_data.password
+    )
     
     if not user:
         raise HTTPException(
@@ -31,49 +45,35 @@ def login_access_token(
             detail="Incorrect email or password",
         )
     
-    if not verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-        )
-    
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, 
             detail="Inactive user"
         )
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    if password_needs_rehash(user.hashed_password):
+        background_tasks.add_task(
+            rehash_password, session_factory, user.id, form_data.password
+        )
     
-    return {
-        "access_token": create_access_token(
-            user.id, expires_delta=access_token_expires
-        ),
-        "token_type": "bearer",
-    }
+    return issue_tokens(user.id)
 
 
-@router.post("/register", response_model=Token)
-def register_new_user(
+@router.post(
+    "/register", response_model=Token, dependencies=[Depends(deps.rate_limit_register)]
+)
+async def register_new_user(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Union[Session, AsyncSession] = Depends(deps.get_db),
     email: str = Body(...),
     password: str = Body(...),
     full_name: str = Body(...)
 ) -> Any:
     """
-    Register a new user and return an access token
+    Register a new user and return an access and a refresh token
     """
     user_service = UserService(db)
     
-    # Check if user exists
-    user = user_service.get_by_email(email=email)
-    if user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="A user with this email already exists",
-        )
-    
     # Create new user
     from app.schemas.user import UserCreate
     
@@ -84,14 +84,51 @@ def register_new_user(
         is_superuser=False,
     )
     
-    user = user_service.create(obj_in=user_in)
-    
-    # Create access token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    try:
+        user = await user_service.create(obj_in=user_in)
+    except DuplicateEmailError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A user with this email already exists",
+        )
     
-    return {
-        "access_token": create_access_token(
-            user.id, expires_delta=access_token_expires
-        ),
-        "token_type": "bearer",
-    }
\ No newline at end of file
+    return issue_tokens(user.id)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    db: Union[Session, AsyncSession] = Depends(deps.get_db),
+    refresh_token: str = Body(..., embed=True),
+) -> Any:
+    """
+    Exchange a refresh token for a new access and refresh token.
+
+    Each refresh token works once; reusing one ends its login session.
+    """
+    try:
+        claims = await TokenService(db).refresh(refresh_token)
+    except (JWTError, ValidationError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+
+    user = await UserService(db).get_identity(id=claims.sub)
+    if not user or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+
+    return issue_tokens(user.id, session_id=claims.sid)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    db: Union[Session, AsyncSession] = Depends(deps.get_db),
+    token_data: TokenPayload = Depends(deps.get_token_payload),
+) -> None:
+    """
+    Revoke the access token and the refresh token of this login
+    """
+    await TokenService(db).logout(token_data)
@@ -1,116 +1,356 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Header, Query, Response
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Any, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Literal, Optional, Union
 from app.api import deps
+from app.core.config import settings
+from app.crud.user import EXPORT_COLUMNS, DuplicateEmailError
+from app.db.session import session_scope
 from app.schemas.user import (
     User as UserSchema,
     UserCreate,
     UserUpdate,
-    UserInDB
+    UserBulkResult,
 )
-from app.models.user import User
+from app.core.responses import model_list_response
+from app.core.user_cache import CachedUser
+from app.services.token_service import TokenService
 from app.services.user_service import UserService
+from app.utils.etag import (
+    collection_etag,
+    etag_matches,
+    not_modified,
+    set_validators,
+    user_etag,
+    validator_headers,
+)
+from app.utils.export import EXPORT_MEDIA_TYPES, csv_header, rows_to_csv, rows_to_ndjson
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[UserSchema])
-def read_users(
-    db: Session = Depends(deps.get_db),
+async def read_users(
+    db: Union[Session, AsyncSession] = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_active_superuser),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: CachedUser = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
     Retrieve users.
+
+    Pages are ordered by id. Without `skip`, the response carries an
+    `X-Next-Cursor` header while more users remain; pass it back as
+    `cursor` to fetch the next page. `skip` is kept for compatibility but
+    gets slower the deeper it pages.
+
+    The page is serialized straight from the ORM rows by a cached
+    TypeAdapter rather than through response_model. Its ETag covers the
+    IDs and versions of the rows, so an unchanged page is answered with
+    304 before serializing.
     """
     user_service = UserService(db)
-    users = user_service.get_multi(skip=skip, limit=limit)
-    return users
+    
+    if skip and cursor is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="skip and cursor cannot be combined",
+        )
+    
+    next_cursor = None
+    if skip:
+        users = await user_service.get_multi(skip=skip, limit=limit)
+    else:
+        try:
+            users, next_cursor = await user_service.get_page(cursor=cursor, limit=limit)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+    
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else {}
+    etag = collection_etag(users, next_cursor)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, headers)
+    headers.update(validator_headers(etag))
+    return model_list_response(UserSchema, users, headers=headers)
 
 
 @router.post("/", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
-def create_user(
+async def create_user(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Union[Session, AsyncSession] = Depends(deps.get_db),
     user_in: UserCreate,
-    current_user: User = Depends(deps.get_current_active_superuser),
+    current_user: CachedUser = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
     Create new user.
     """
     user_service = UserService(db)
     
-    # Check if user with this email already exists
-    user = user_service.get_by_email(email=user_in.email)
-    if user:
+    try:
+        user = await user_service.create(obj_in=user_in)
+    except DuplicateEmailError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="A user with this email already exists.",
         )
-    
-    user = user_service.create(obj_in=user_in)
     return user
 
 
+@router.post("/bulk", response_model=List[UserBulkResult])
+async def create_users_bulk(
+    *,
+    db: Union[Session, AsyncSession] = Depends(deps.get_db),
+    users_in: List[UserCreate],
+    current_user: CachedUser = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Create many users at once.
+
+    Duplicate emails are found with a single query, passwords are hashed
+    across all hashing workers and the users are inserted with batched
+    multi-row statements in one transaction. Each item reports whether it
+    was created.
+    """
+    if len(users_in) > settings.BULK_CREATE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BULK_CREATE_MAX_ITEMS} users per request",
+        )
+    
+    user_service = UserService(db)
+    results = await user_service.create_many(objs_in=users_in)
+    
+    return model_list_response(
+        UserBulkResult,
+        [
+            UserBulkResult(
+                index=index,
+                email=user_in.email,
+                status="error" if isinstance(result, str) else "created",
+                user=None if isinstance(result, str) else UserSchema.model_validate(result),
+                error=result if isinstance(result, str) else None,
+            )
+            for index, (user_in, result) in enumerate(zip(users_in, results))
+        ],
+    )
+
+
 @router.get("/me", response_model=UserSchema)
-def read_user_me(
-    current_user: User = Depends(deps.get_current_active_user),
+async def read_user_me(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: CachedUser = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get current user.
+
+    Answered with 304 when If-None-Match carries the current ETag.
     """
+    etag = user_etag(current_user.id, current_user.version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_validators(response, etag)
     return current_user
 
 
 @router.put("/me", response_model=UserSchema)
-def update_user_me(
+async def update_user_me(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Union[Session, AsyncSession] = Depends(deps.get_db),
     password: Optional[str] = Body(None),
     full_name: Optional[str] = Body(None),
     email: Optional[str] = Body(None),
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: CachedUser = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Update own user.
     """
     user_service = UserService(db)
     
-    current_user_data = UserInDB.model_validate(current_user)
-    user_in = UserUpdate(**current_user_data.model_dump())
-    
+    user_in: Dict[str, Any] = {}
     if password is not None:
-        user_in.password = password
+        user_in["password"] = password
     if full_name is not None:
-        user_in.full_name = full_name
+        user_in["full_name"] = full_name
     if email is not None:
-        user_in.email = email
+        user_in["email"] = email
     
-    user = user_service.update(db_obj=current_user, obj_in=user_in)
+    try:
+        user = await user_service.update(id=current_user.id, obj_in=user_in)
+    except DuplicateEmailError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A user with this email already exists.",
+        )
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
     return user
 
 
+async def _read_users_batch(
+    db: Union[Session, AsyncSession], ids: List[int], current_user: CachedUser
+) -> Response:
+    if len(ids) > settings.USER_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.USER_BATCH_MAX_IDS} ids per request",
+        )
+
+    # Same rule as read_user_by_id: only superusers see other users
+    if current_user.is_superuser:
+        users = await UserService(db).get_identities(ids)
+    else:
+        users = {current_user.id: current_user}
+    return model_list_response(
+        UserSchema, [users[id] for id in dict.fromkeys(ids) if id in users]
+    )
+
+
+@router.get("/batch", response_model=List[UserSchema])
+async def read_users_batch(
+    db: Union[Session, AsyncSession] = Depends(deps.get_db),
+    ids: List[str] = Query(..., description="User IDs, comma-separated or repeated"),
+    current_user: CachedUser = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get several users by id at once.
+
+    Users are returned in the order of `ids`, once each. IDs of users that
+    do not exist or that the caller may not read are left out. Users not
+    in the identity cache are read with a single query. Use `POST /batch`
+    for lists too long for a URL.
+    """
+    try:
+        user_ids = [int(part) for value in ids for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="ids must be integers",
+        )
+    return await _read_users_batch(db, user_ids, current_user)
+
+
+@router.post("/batch", response_model=List[UserSchema])
+async def read_users_batch_post(
+    db: Union[Session, AsyncSession] = Depends(deps.get_db),
+    ids: List[int] = Body(..., embed=True),
+    current_user: CachedUser = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get several users by id at once; the same as `GET /batch` with the
+    ids in the body
+    """
+    return await _read_users_batch(db, ids, current_user)
+
+
+@router.get("/search", response_model=List[UserSchema])
+async def search_users(
+    db: Union[Session, AsyncSession] = Depends(deps.get_db),
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: CachedUser = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Search users by email and full name, case-insensitively.
+
+    Exact email matches come first, then users whose email or full name
+    starts with `q`, then those containing it; ties are ordered by id.
+    While more results remain, the response carries an `X-Next-Cursor`
+    header to pass back as `cursor`.
+    """
+    user_service = UserService(db)
+    try:
+        users, next_cursor = await user_service.search(q=q, cursor=cursor, limit=limit)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else None
+    return model_list_response(UserSchema, users, headers=headers)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_users(
+    *,
+    session_factory: Callable[[], Union[Session, AsyncSession]] = Depends(
+        deps.get_session_factory
+    ),
+    format: Literal["ndjson", "csv"] = "ndjson",
+    is_active: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    current_user: CachedUser = Depends(deps.get_current_active_superuser),
+) -> StreamingResponse:
+    """
+    Stream all users as NDJSON or CSV.
+
+    Rows are read through a server-side cursor and written batch by batch,
+    so memory stays flat and the first bytes are sent before the query
+    finishes.
+    """
+    filters = {
+        "is_active": is_active,
+        "created_after": created_after,
+        "created_before": created_before,
+    }
+    serialize = rows_to_csv if format == "csv" else rows_to_ndjson
+
+    async def generate() -> AsyncIterator[bytes]:
+        if format == "csv":
+            yield csv_header([column.key for column in EXPORT_COLUMNS])
+        # Dependencies are closed before the body is streamed,
+        # so the export holds its own session
+        async with session_scope(session_factory) as db:
+            user_service = UserService(db)
+            async for batch in user_service.stream(
+                batch_size=settings.EXPORT_BATCH_SIZE, **filters
+            ):
+                yield serialize(batch)
+
+    return StreamingResponse(
+        generate(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+
 @router.get("/{user_id}", response_model=UserSchema)
-def read_user_by_id(
+async def read_user_by_id(
     user_id: int,
-    current_user: User = Depends(deps.get_current_active_user),
-    db: Session = Depends(deps.get_db),
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: CachedUser = Depends(deps.get_current_active_user),
+    db: Union[Session, AsyncSession] = Depends(deps.get_db),
 ) -> Any:
     """
     Get a specific user by id.
+
+    The user is read from the identity cache when possible; a request
+    whose If-None-Match carries the current ETag gets a 304.
     """
-    user_service = UserService(db)
-    user = user_service.get(id=user_id)
-    
-    if user == current_user:
-        return user
-    
-    if not current_user.is_superuser:
+    if user_id == current_user.id:
+        user = current_user
+    elif not current_user.is_superuser:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions to access this resource",
         )
+    else:
+        user = await UserService(db).get_identity(id=user_id)
     
     if not user:
         raise HTTPException(
@@ -118,51 +358,78 @@ def read_user_by_id(
             detail="User not found",
         )
     
+    etag = user_etag(user.id, user.version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_validators(response, etag)
     return user
 
 
 @router.put("/{user_id}", response_model=UserSchema)
-def update_user(
+async def update_user(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Union[Session, AsyncSession] = Depends(deps.get_db),
     user_id: int,
     user_in: UserUpdate,
-    current_user: User = Depends(deps.get_current_active_superuser),
+    current_user: CachedUser = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
     Update a user.
     """
     user_service = UserService(db)
-    user = user_service.get(id=user_id)
+    
+    try:
+        user = await user_service.update(id=user_id, obj_in=user_in)
+    except DuplicateEmailError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A user with this email already exists.",
+        )
     
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
-    
-    user = user_service.update(db_obj=user, obj_in=user_in)
     return user
 
 
+@router.post("/{user_id}/sign-out", status_code=status.HTTP_204_NO_CONTENT)
+async def sign_out_user(
+    *,
+    db: Union[Session, AsyncSession] = Depends(deps.get_db),
+    user_id: int,
+    current_user: CachedUser = Depends(deps.get_current_active_superuser),
+) -> None:
+    """
+    Revoke every access and refresh token issued to a user so far.
+
+    Other processes reject them after their next revocation sync.
+    """
+    if not await UserService(db).get_identity(id=user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    await TokenService(db).sign_out_user(user_id)
+
+
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(
+async def delete_user(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Union[Session, AsyncSession] = Depends(deps.get_db),
     user_id: int,
-    current_user: User = Depends(deps.get_current_active_superuser),
+    current_user: CachedUser = Depends(deps.get_current_active_superuser),
 ) -> None:
     """
     Delete a user.
     """
     user_service = UserService(db)
-    user = user_service.get(id=user_id)
+    user = await user_service.remove(id=user_id)
     
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
-    
-    user_service.remove(id=user_id)
     return
\ No newline at end of file
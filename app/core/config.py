@@ -1,15 +1,118 @@
 from pydantic_settings import BaseSettings
-from typing import List, Union, Optional, Dict, Any
+from typing import List, Literal, Union, Optional, Dict, Any
 from functools import lru_cache
+from pathlib import Path
 import secrets
 from pydantic import AnyHttpUrl, validator
 
+# Repository root, holding .env and logging_config.json
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Async driver used for each dialect when deriving the async database URI
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_uri(uri: str) -> Optional[str]:
+    """The URI with the async driver of its dialect, if there is one"""
+    scheme, _, rest = uri.partition("://")
+    dialect = scheme.split("+")[0]
+    if dialect not in ASYNC_DRIVERS:
+        return None
+    return f"{ASYNC_DRIVERS[dialect]}://{rest}"
+
 
 class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = secrets.token_urlsafe(32)
+    # Access tokens are short-lived; clients renew them at /auth/refresh with
+    # the refresh token, which is replaced on every use.
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     # 60 minutes * 24 hours * 8 days = 8 days
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Token signing: "HS256" with SECRET_KEY, or "RS256"/"ES256" with the PEM
+    # private key in JWT_SIGNING_KEY_FILE, whose public key is published at
+    # /.well-known/jwks.json for other services to verify tokens with.
+    # JWT_VERIFICATION_KEY_FILES lists other keys still accepted and
+    # published while keys are rotated (see app/core/keys.py). Clients may
+    # cache the JWKS for JWKS_CACHE_SECONDS.
+    JWT_ALGORITHM: Literal["HS256", "RS256", "ES256"] = "HS256"
+    JWT_SIGNING_KEY_FILE: Optional[str] = None
+    JWT_VERIFICATION_KEY_FILES: List[str] = []
+    JWKS_CACHE_SECONDS: int = 300
+    # Revoked tokens are checked against a per-process bloom filter and set,
+    # synced from the revoked_tokens table every TOKEN_REVOCATION_SYNC_SECONDS
+    # and rebuilt without expired entries every TOKEN_REVOCATION_RELOAD_SECONDS.
+    # A revocation reaches the other processes within the sync interval.
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 5.0
+    TOKEN_REVOCATION_RELOAD_SECONDS: float = 3600.0
+    TOKEN_REVOCATION_FILTER_CAPACITY: int = 100000
+    # Encoder of the default response class: "orjson" (stdlib json when
+    # orjson is not installed) or "stdlib" for FastAPI's plain JSONResponse
+    JSON_RESPONSE_ENCODER: Literal["orjson", "stdlib"] = "orjson"
+    # Per-process cache of validated JWT claims
+    TOKEN_CACHE_ENABLED: bool = True
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    # Prometheus metrics at /metrics. With several workers, point
+    # METRICS_MULTIPROC_DIR at a directory shared by all of them.
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+    METRICS_FLUSH_INTERVAL_SECONDS: float = 5.0
+    # SQL statements and time per request, logged with each request and
+    # returned as X-DB-Query-Count/X-DB-Query-Time with DB_QUERY_STATS_HEADERS.
+    # A statement repeated more than DB_QUERY_REPEAT_THRESHOLD times in one
+    # request is logged as a likely N+1 query.
+    DB_QUERY_STATS_ENABLED: bool = True
+    DB_QUERY_STATS_HEADERS: bool = False
+    DB_QUERY_REPEAT_THRESHOLD: int = 5
+    # Hand log records to a background thread through a bounded queue.
+    # When the queue is full: "drop_new", "drop_oldest" or "block".
+    LOG_QUEUE_ENABLED: bool = False
+    LOG_QUEUE_MAX_SIZE: int = 10000
+    LOG_QUEUE_DROP_POLICY: Literal["drop_new", "drop_oldest", "block"] = "drop_new"
+    # Cache of authenticated user identities: "memory", "redis" or "none"
+    USER_CACHE_BACKEND: Literal["memory", "redis", "none"] = "memory"
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+    REDIS_URL: str = "redis://redis:6379/0"
+    # Rows fetched per server-side cursor batch by the users export
+    EXPORT_BATCH_SIZE: int = 1000
+    # Largest accepted bulk user creation and rows per INSERT statement
+    BULK_CREATE_MAX_ITEMS: int = 1000
+    BULK_INSERT_BATCH_SIZE: int = 500
+    # Most IDs accepted by one batch user lookup
+    USER_BATCH_MAX_IDS: int = 500
+    # Connections opened before serving (defaults to DB_POOL_SIZE), whether
+    # to start the bcrypt workers up front, and how long shutdown waits
+    # for in-flight requests
+    STARTUP_WARM_DB_CONNECTIONS: Optional[int] = None
+    STARTUP_WARM_HASHER: bool = True
+    SHUTDOWN_DRAIN_TIMEOUT_SECONDS: float = 10.0
+    # Token buckets for /auth/login and /auth/register, checked before any
+    # bcrypt work: bursts of *_BURST attempts refilled at *_PER_MINUTE, per
+    # client IP and per target email. Backend: "memory" or "redis".
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: Literal["memory", "redis"] = "memory"
+    RATE_LIMIT_IP_BURST: int = 20
+    RATE_LIMIT_IP_PER_MINUTE: float = 10
+    RATE_LIMIT_EMAIL_BURST: int = 5
+    RATE_LIMIT_EMAIL_PER_MINUTE: float = 2
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    # bcrypt cost. BCRYPT_ROUNDS fixes it; otherwise startup picks the highest
+    # cost hashing within BCRYPT_TARGET_SECONDS on this hardware, clamped to
+    # [BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS]. Stored hashes below the chosen
+    # cost are replaced after the user's next successful login. The floor is
+    # passlib's default cost, so a slow or busy host never weakens new hashes.
+    BCRYPT_ROUNDS: Optional[int] = None
+    BCRYPT_TARGET_SECONDS: float = 0.25
+    BCRYPT_MIN_ROUNDS: int = 12
+    BCRYPT_MAX_ROUNDS: int = 15
+    # Worker processes for bcrypt; defaults to the CPU count, 0 hashes in threads
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+    # Hashes allowed to queue before requests are rejected with 503
+    PASSWORD_HASH_MAX_PENDING: int = 64
     # BACKEND_CORS_ORIGINS is a JSON-formatted list of origins
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
 
@@ -40,9 +143,49 @@ class Settings(BaseSettings):
             return v
         return f"postgresql://{values.get('POSTGRES_USER')}:{values.get('POSTGRES_PASSWORD')}@{values.get('POSTGRES_SERVER')}/{values.get('POSTGRES_DB')}"
 
+    # SQLAlchemy connection pool, applied to both the sync and async engine.
+    # LIFO reuse keeps surplus connections idle so pool_recycle retires them.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_USE_LIFO: bool = True
+    # Log a warning when a checkout waits longer than this; 0 disables it
+    DB_POOL_SLOW_CHECKOUT_SECONDS: float = 0.1
+
+    # Serve requests through AsyncEngine/AsyncSession instead of the threadpool
+    USE_ASYNC_DB: bool = False
+    # Derived from SQLALCHEMY_DATABASE_URI when not set explicitly
+    SQLALCHEMY_ASYNC_DATABASE_URI: Optional[str] = None
+
+    @validator("SQLALCHEMY_ASYNC_DATABASE_URI", pre=True)
+    def assemble_async_db_connection(
+        cls, v: Optional[str], values: Dict[str, Any]
+    ) -> Any:
+        if isinstance(v, str):
+            return v
+        sync_uri = values.get("SQLALCHEMY_DATABASE_URI")
+        if not sync_uri:
+            return None
+        return to_async_uri(sync_uri)
+
+    # DATABASE_REPLICA_URIS is a JSON-formatted list of read replicas of the
+    # primary. Sessions read from one of them until they write; the replica
+    # is picked "round_robin" or "least_busy" (fewest checked-out connections).
+    DATABASE_REPLICA_URIS: List[str] = []
+    DATABASE_REPLICA_STRATEGY: Literal["round_robin", "least_busy"] = "round_robin"
+
+    @validator("DATABASE_REPLICA_URIS", "JWT_VERIFICATION_KEY_FILES", pre=True)
+    def assemble_comma_separated(cls, v: Union[str, List[str]]) -> List[str]:
+        if isinstance(v, str) and not v.startswith("["):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        return v
+
     class Config:
         case_sensitive = True
-        env_file = ".env"
+        # The project's .env, overridden by one in the working directory
+        env_file = (PROJECT_ROOT / ".env", ".env")
         # extra = "ignore"
 
 
@@ -51,4 +194,22 @@ def get_settings():
     return Settings()
 
 
-settings = get_settings()
\ No newline at end of file
+class _LazySettings:
+    """
+    Stand-in for the Settings instance that builds it on first use.
+
+    Importing a module that refers to ``settings`` therefore neither reads
+    the environment nor fails when it is incomplete.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(get_settings(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(get_settings(), name)
+
+
+settings: Settings = _LazySettings()  # type: ignore[assignment]
\ No newline at end of file
@@ -1,43 +1,229 @@
-from typing import Callable
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Callable, Optional, Union
 from fastapi import FastAPI
+import asyncio
 import logging
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.api.deps import get_session_factory
+from app.core.config import settings
+from app.core.hashing import hasher
+from app.core.keys import get_key_ring
+from app.core.logging import start_queue_logging, stop_queue_logging
+from app.core.metrics import write_snapshot
+from app.core.security import calibrate_bcrypt_rounds
+from app.core.middleware import in_flight_requests
+from app.db.session import dispose_engines, session_scope
+from app.services.token_service import sync_revocations
 
 logger = logging.getLogger(__name__)
 
+_metrics_flush_task: Optional[asyncio.Task] = None
+_revocation_sync_task: Optional[asyncio.Task] = None
+
+
+async def _flush_metrics_periodically(directory: str, interval: float) -> None:
+    """Publish this worker's metrics for the multiprocess /metrics endpoint"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            write_snapshot(directory)
+        except OSError:
+            logger.warning("Could not write metrics snapshot", exc_info=True)
+
+
+async def _sync_revocations_periodically(
+    app: FastAPI,
+    synced_at: Optional[datetime],
+    interval: float,
+    reload_interval: float,
+) -> None:
+    """
+    Pick up the tokens revoked by other processes, and rebuild the
+    revocation list without expired entries every ``reload_interval``.
+    Without ``synced_at`` the first sync is a full load.
+    """
+    reloaded = time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        reload = time.monotonic() - reloaded >= reload_interval
+        try:
+            synced_at = await sync_revocations(
+                _session_factory(app), since=None if reload else synced_at
+            )
+        except Exception:
+            logger.warning("Could not sync token revocations", exc_info=True)
+            continue
+        if reload:
+            reloaded = time.monotonic()
+
+
+@asynccontextmanager
+async def _phase(name: str, critical: bool = False) -> AsyncIterator[None]:
+    """
+    Time one startup or shutdown step. Failures are logged; those of a
+    ``critical`` step are raised too, so that the app does not serve
+    without the database, the password hasher or its signing keys.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        logger.exception("Lifespan phase failed", extra={"phase": name})
+        if critical:
+            raise
+    finally:
+        logger.info(
+            "Lifespan phase completed",
+            extra={"phase": name, "duration": time.perf_counter() - start},
+        )
+
+
+async def _cancel(task: Optional[asyncio.Task]) -> None:
+    """Cancel a background task and wait until it has stopped"""
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+def _session_factory(app: FastAPI) -> Callable[[], Union[Session, AsyncSession]]:
+    """The factory the endpoints use, including any dependency override"""
+    return app.dependency_overrides.get(get_session_factory, get_session_factory)()
+
+
+async def _warm_db_connections(app: FastAPI, count: int) -> None:
+    """
+    Check out ``count`` connections at once so that the pool holds them
+    when the first requests arrive.
+    """
+    session_factory = _session_factory(app)
+
+    async def checkout() -> None:
+        async with session_scope(session_factory) as db:
+            if isinstance(db, AsyncSession):
+                await db.connection()
+            else:
+                await run_in_threadpool(db.connection)
+
+    await asyncio.gather(*(checkout() for _ in range(count)))
+
 
-def startup_event_handler(app: FastAPI) -> Callable:
-    """
-    Function to handle startup events.
-    
-    Future functionalities that could be implemented here include:
-    - Initializing database connections.
-    - Setting up external services like Sentry for error tracking.
-    - Initializing caching systems (e.g., Redis).
-    - Starting background workers or scheduled tasks.
-    """
-    async def startup() -> None:
-        logger.info("Application startup in progress...")
-        # TODO: Initialize database connections.
-        # TODO: Set up Sentry if configured.
-        # TODO: Initialize Redis or other caching services.
-        # TODO: Start background tasks or worker processes.
-        
-    return startup
-
-
-def shutdown_event_handler(app: FastAPI) -> Callable:
-    """
-    Function to handle shutdown events.
-    
-    Future functionalities that could be implemented here include:
-    - Closing database connections.
-    - Disconnecting from external services (e.g., Sentry, Redis).
-    - Gracefully stopping background tasks.
-    """
-    async def shutdown() -> None:
-        logger.info("Application shutdown in progress...")
-        # TODO: Close database connections.
-        # TODO: Disconnect from external services.
-        # TODO: Stop background tasks gracefully.
-        
-    return shutdown
\ No newline at end of file
+async def startup(app: FastAPI) -> None:
+    """
+    Prepare everything the first requests would otherwise pay for.
+
+    Each phase is timed and logged so the cold-start budget is visible.
+    """
+    global _metrics_flush_task, _revocation_sync_task
+    started = time.perf_counter()
+    if settings.LOG_QUEUE_ENABLED:
+        start_queue_logging(
+            max_size=settings.LOG_QUEUE_MAX_SIZE,
+            drop_policy=settings.LOG_QUEUE_DROP_POLICY,
+        )
+    logger.info("Application startup in progress...")
+
+    warm_connections = (
+        settings.STARTUP_WARM_DB_CONNECTIONS
+        if settings.STARTUP_WARM_DB_CONNECTIONS is not None
+        else settings.DB_POOL_SIZE
+    )
+    if warm_connections > 0:
+        async with _phase("db_connections", critical=True):
+            await _warm_db_connections(app, warm_connections)
+
+    async with _phase("bcrypt_calibration", critical=True):
+        rounds = settings.BCRYPT_ROUNDS or await run_in_threadpool(
+            calibrate_bcrypt_rounds,
+            settings.BCRYPT_TARGET_SECONDS,
+            settings.BCRYPT_MIN_ROUNDS,
+            settings.BCRYPT_MAX_ROUNDS,
+        )
+        hasher.configure(rounds)
+        logger.info("bcrypt cost selected", extra={"rounds": rounds})
+
+    if settings.STARTUP_WARM_HASHER:
+        async with _phase("password_hasher", critical=True):
+            await hasher.warm_up()
+
+    async with _phase("openapi_schema"):
+        app.openapi()
+
+    async with _phase("jwt_keys", critical=True):
+        get_key_ring()
+
+    # Requests are served even if this fails; the periodic sync retries it
+    synced_at = None
+    async with _phase("token_revocations"):
+        synced_at = await sync_revocations(_session_factory(app))
+    _revocation_sync_task = asyncio.create_task(
+        _sync_revocations_periodically(
+            app,
+            synced_at,
+            settings.TOKEN_REVOCATION_SYNC_SECONDS,
+            settings.TOKEN_REVOCATION_RELOAD_SECONDS,
+        )
+    )
+
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROC_DIR:
+        _metrics_flush_task = asyncio.create_task(
+            _flush_metrics_periodically(
+                settings.METRICS_MULTIPROC_DIR,
+                settings.METRICS_FLUSH_INTERVAL_SECONDS,
+            )
+        )
+
+    logger.info(
+        "Application startup complete",
+        extra={"duration": time.perf_counter() - started},
+    )
+
+
+async def shutdown(app: FastAPI) -> None:
+    """Let in-flight requests finish, then release resources"""
+    global _metrics_flush_task, _revocation_sync_task
+    logger.info("Application shutdown in progress...")
+
+    async with _phase("drain_requests"):
+        if not await in_flight_requests.drain(settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS):
+            logger.warning(
+                "Shutting down with requests still in flight",
+                extra={"in_flight": in_flight_requests.count},
+            )
+
+    await _cancel(_revocation_sync_task)
+    _revocation_sync_task = None
+
+    async with _phase("password_hasher"):
+        await hasher.shutdown()
+
+    async with _phase("db_engines"):
+        await dispose_engines()
+
+    if _metrics_flush_task is not None:
+        async with _phase("metrics"):
+            # Stopped first, so that its last write cannot follow the final one
+            await _cancel(_metrics_flush_task)
+            _metrics_flush_task = None
+            write_snapshot(settings.METRICS_MULTIPROC_DIR)
+
+    # Last, so that everything logged during shutdown is flushed
+    stop_queue_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Application lifespan: startup before serving, shutdown afterwards.
+    A failed startup releases what it had acquired and is raised.
+    """
+    try:
+        await startup(app)
+        yield
+    finally:
+        await shutdown(app)
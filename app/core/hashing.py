@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.metrics import (
+    PASSWORD_HASH_DURATION,
+    PASSWORD_HASH_QUEUE_WAIT,
+    PASSWORD_HASH_REJECTED,
+)
+from app.core.security import (
+    configure_bcrypt_rounds,
+    get_password_hash,
+    verify_password,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when the password hashing queue is full."""
+
+
+@dataclass
+class HashingStats:
+    """Running totals for the password hashing executor."""
+
+    calls: int = 0
+    rejected: int = 0
+    queue_wait_seconds_total: float = 0.0
+    hash_seconds_total: float = 0.0
+    queue_wait_seconds_max: float = 0.0
+    hash_seconds_max: float = 0.0
+
+    def observe(self, queue_wait: float, hash_time: float) -> None:
+        self.calls += 1
+        self.queue_wait_seconds_total += queue_wait
+        self.hash_seconds_total += hash_time
+        self.queue_wait_seconds_max = max(self.queue_wait_seconds_max, queue_wait)
+        self.hash_seconds_max = max(self.hash_seconds_max, hash_time)
+
+
+# Worker-side functions. They run in the pool processes and report when they
+# started and how long the bcrypt call took, so the caller can split the
+# total latency into queue wait and hash time. time.monotonic() is
+# system-wide on Linux, so it is comparable across processes.
+
+def _timed(fn: Callable[..., Any], *args: Any) -> Tuple[Any, float, float]:
+    started = time.monotonic()
+    result = fn(*args)
+    return result, started, time.monotonic() - started
+
+
+def _hash_worker(password: str) -> Tuple[str, float, float]:
+    return _timed(get_password_hash, password)
+
+
+def _hash_many_worker(passwords: List[str]) -> Tuple[List[str], float, float]:
+    return _timed(lambda: [get_password_hash(password) for password in passwords])
+
+
+def _verify_worker(plain_password: str, hashed_password: str) -> Tuple[bool, float, float]:
+    return _timed(verify_password, plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool so that hashing neither holds
+    the event loop nor competes with request handling for the GIL.
+
+    At most ``max_pending`` calls may be queued or running at once; further
+    calls raise HashingPoolSaturated, which the API maps to a 503.
+    With ``max_workers=0`` hashing runs in the event loop's default thread
+    pool instead, which is useful where subprocesses are not wanted.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.stats = HashingStats()
+        self.rounds: Optional[int] = None
+        self._pending = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_pool(self) -> Optional[Executor]:
+        if self.max_workers <= 0:
+            return None
+        if self._pool is None:
+            # spawn rather than fork: the parent runs an event loop and
+            # threads that must not be duplicated into the workers
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=configure_bcrypt_rounds if self.rounds else None,
+                initargs=(self.rounds,) if self.rounds else (),
+            )
+        return self._pool
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.max_pending:
+            self.stats.rejected += 1
+            PASSWORD_HASH_REJECTED.inc()
+            raise HashingPoolSaturated(
+                f"{self._pending} password hashes already pending"
+            )
+
+        self._pending += 1
+        submitted = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, hash_time = await loop.run_in_executor(
+                self._get_pool(), fn, *args
+            )
+        finally:
+            self._pending -= 1
+
+        queue_wait = max(started - submitted, 0.0)
+        self.stats.observe(queue_wait, hash_time)
+        PASSWORD_HASH_QUEUE_WAIT.observe(queue_wait)
+        PASSWORD_HASH_DURATION.observe(hash_time)
+        logger.debug(
+            "Password hash completed",
+            extra={"queue_wait": queue_wait, "hash_time": hash_time},
+        )
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hash a password off the request path"""
+        return await self._submit(_hash_worker, password)
+
+    async def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """
+        Hash several passwords concurrently, preserving their order.
+
+        The passwords are split into one chunk per worker; each chunk takes
+        a single slot of the pending limit.
+        """
+        if not passwords:
+            return []
+        workers = self.max_workers or os.cpu_count() or 1
+        chunk_count = min(workers, len(passwords))
+        if self._pending + chunk_count > self.max_pending:
+            self.stats.rejected += 1
+            PASSWORD_HASH_REJECTED.inc()
+            raise HashingPoolSaturated(
+                f"{self._pending} password hashes already pending"
+            )
+
+        size = -(-len(passwords) // chunk_count)
+        chunks = await asyncio.gather(
+            *(
+                self._submit(_hash_many_worker, list(passwords[start:start + size]))
+                for start in range(0, len(passwords), size)
+            )
+        )
+        return [hashed for chunk in chunks for hashed in chunk]
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password off the request path"""
+        return await self._submit(_verify_worker, plain_password, hashed_password)
+
+    def configure(self, rounds: int) -> None:
+        """
+        Use bcrypt cost ``rounds`` here and in the workers.
+
+        The running pool is retired without waiting, so that the next call
+        starts new workers with the new cost; the old workers finish the
+        calls already queued on them and exit.
+        """
+        self.rounds = rounds
+        configure_bcrypt_rounds(rounds)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    async def warm_up(self) -> None:
+        """Start every worker process and load bcrypt in each of them"""
+        pool = self._get_pool()
+        if pool is None:
+            return
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(pool, _hash_worker, "warm-up")
+                for _ in range(self.max_workers)
+            )
+        )
+
+    async def shutdown(self) -> None:
+        """Stop the worker processes, waiting for them in a thread"""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+
+hasher = PasswordHasher(
+    max_workers=(
+        settings.PASSWORD_HASH_WORKERS
+        if settings.PASSWORD_HASH_WORKERS is not None
+        else os.cpu_count() or 1
+    ),
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,167 @@
+"""
+JWT signing and verification keys.
+
+With JWT_ALGORITHM HS256, tokens are signed and verified with SECRET_KEY
+and nothing is published. With RS256 or ES256, tokens are signed with the
+private key in JWT_SIGNING_KEY_FILE and carry its key ID (``kid``), the
+RFC 7638 thumbprint of the public key. The public keys are published at
+/.well-known/jwks.json so that other services verify tokens themselves.
+
+Keys are rotated with overlapping validity through
+JWT_VERIFICATION_KEY_FILES, whose keys are accepted and published but not
+used for signing:
+
+1. Add the new key there, and wait for JWKS caches to expire.
+2. Make it the signing key, and move the old one there.
+3. Remove the old key once the tokens it signed have expired.
+
+Every key is parsed once, when the key ring is first used; verification
+looks the token's key up by ``kid``.
+"""
+import base64
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Sequence
+
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+
+from app.core.config import settings
+
+# Members of each key type hashed into the RFC 7638 thumbprint
+THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "EC": ("crv", "kty", "x", "y")}
+
+
+class VerificationKey(NamedTuple):
+    """A parsed public key (or HS256 secret) and the algorithm it verifies."""
+
+    algorithm: str
+    key: Key
+
+
+class KeyRing:
+    """The signing key and the verification keys by ``kid``."""
+
+    def __init__(
+        self,
+        algorithm: str,
+        signing_key: Key,
+        signing_kid: Optional[str] = None,
+        verification_keys: Optional[Dict[Optional[str], VerificationKey]] = None,
+    ):
+        self.algorithm = algorithm
+        self.signing_kid = signing_kid
+        self._signing_key = signing_key
+        self.keys: Dict[Optional[str], VerificationKey] = dict(verification_keys or {})
+        self.keys.setdefault(
+            signing_kid, VerificationKey(algorithm, _public_key(signing_key, algorithm))
+        )
+        self.jwks = json.dumps(
+            {
+                "keys": [
+                    {
+                        **entry.key.to_dict(),
+                        "kid": kid,
+                        "alg": entry.algorithm,
+                        "use": "sig",
+                    }
+                    for kid, entry in self.keys.items()
+                    if kid is not None
+                ]
+            }
+        ).encode()
+
+    def sign(self, claims: Mapping[str, Any]) -> str:
+        headers = {"kid": self.signing_kid} if self.signing_kid else None
+        return jwt.encode(
+            dict(claims), self._signing_key, algorithm=self.algorithm, headers=headers
+        )
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Verify the token with the key named by its ``kid`` and return its
+        claims; raises JWTError for unknown keys and invalid tokens
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+        entry = self.keys.get(kid)
+        if entry is None:
+            raise JWTError("Unknown signing key")
+        return jwt.decode(token, entry.key, algorithms=[entry.algorithm])
+
+
+def _public_key(key: Key, algorithm: str) -> Key:
+    # HMAC keys have no public half
+    return key if algorithm.startswith("HS") else key.public_key()
+
+
+def _algorithm_of(pem: bytes) -> str:
+    """The signing algorithm matching a PEM key's type"""
+    from cryptography.hazmat.primitives.asymmetric import ec, rsa
+    from cryptography.hazmat.primitives.serialization import (
+        load_pem_private_key,
+        load_pem_public_key,
+    )
+
+    try:
+        key: Any = load_pem_private_key(pem, password=None)
+    except ValueError:
+        key = load_pem_public_key(pem)
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return "RS256"
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        if isinstance(key.curve, ec.SECP256R1):
+            return "ES256"
+    raise ValueError("JWT keys must be RSA or EC P-256 keys")
+
+
+def thumbprint(key: Key) -> str:
+    """RFC 7638 thumbprint of a public key, used as its ``kid``"""
+    members = key.public_key().to_dict()
+    canonical = json.dumps(
+        {name: members[name] for name in THUMBPRINT_MEMBERS[members["kty"]]},
+        separators=(",", ":"),
+        sort_keys=True,
+    )
+    digest = hashlib.sha256(canonical.encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def load_key(path: str, algorithm: Optional[str] = None) -> VerificationKey:
+    """Parse a PEM key file; the algorithm defaults to the one of its type"""
+    pem = Path(path).read_bytes()
+    algorithm = algorithm or _algorithm_of(pem)
+    return VerificationKey(algorithm, jwk.construct(pem, algorithm))
+
+
+def build_key_ring(
+    algorithm: str,
+    secret_key: str,
+    signing_key_file: Optional[str] = None,
+    verification_key_files: Sequence[str] = (),
+) -> KeyRing:
+    if algorithm == "HS256":
+        return KeyRing(algorithm, jwk.construct(secret_key, algorithm))
+    if not signing_key_file:
+        raise ValueError(f"JWT_SIGNING_KEY_FILE is required for {algorithm}")
+
+    signing = load_key(signing_key_file, algorithm)
+    verification: Dict[Optional[str], VerificationKey] = {}
+    for path in verification_key_files:
+        entry = load_key(path)
+        verification[thumbprint(entry.key)] = VerificationKey(
+            entry.algorithm, _public_key(entry.key, entry.algorithm)
+        )
+    return KeyRing(algorithm, signing.key, thumbprint(signing.key), verification)
+
+
+@lru_cache()
+def get_key_ring() -> KeyRing:
+    """The key ring of the configured keys, read on first use"""
+    return build_key_ring(
+        settings.JWT_ALGORITHM,
+        settings.SECRET_KEY,
+        settings.JWT_SIGNING_KEY_FILE,
+        settings.JWT_VERIFICATION_KEY_FILES,
+    )
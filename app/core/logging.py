@@ -0,0 +1,203 @@
+import json
+import logging
+import logging.config
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+from app.core.config import PROJECT_ROOT
+from app.core.metrics import registry
+from app.core.middleware import request_id_contextvar
+
+
+LOGGING_CONFIG_PATH = PROJECT_ROOT / "logging_config.json"
+
+_logging_configured = False
+
+
+def configure_logging(path: Union[str, Path] = LOGGING_CONFIG_PATH) -> None:
+    """
+    Apply the dictConfig in logging_config.json once per process.
+
+    Relative log file names are resolved against the project root rather
+    than the working directory, and their directories are created.
+    """
+    global _logging_configured
+    if _logging_configured:
+        return
+
+    with open(path, "r") as f:
+        config_dict = json.load(f)
+    for handler in config_dict.get("handlers", {}).values():
+        if "filename" in handler:
+            filename = PROJECT_ROOT / handler["filename"]
+            filename.parent.mkdir(parents=True, exist_ok=True)
+            handler["filename"] = str(filename)
+    logging.config.dictConfig(config_dict)
+    _logging_configured = True
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Attach the current request ID to every log record.
+
+    Records logged outside a request get "-". An explicit ``request_id``
+    passed through ``extra`` is left as is.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_contextvar.get() or "-"
+        return True
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler for a bounded queue that never blocks the caller unless
+    asked to.
+
+    Each instance stands in for the handlers of one logger; the records it
+    enqueues remember those handlers so a single listener thread can
+    dispatch them. When the queue is full, ``drop_policy`` decides what
+    happens: "drop_new" discards the record, "drop_oldest" evicts the
+    oldest queued record, "block" waits for room.
+    """
+
+    def __init__(
+        self,
+        queue: "queue.Queue[logging.LogRecord]",
+        targets: Sequence[logging.Handler],
+        drop_policy: str = "drop_new",
+    ):
+        super().__init__(queue)
+        self.targets = tuple(targets)
+        self.drop_policy = drop_policy
+        self.dropped = 0
+        # Context variables are not visible from the listener thread
+        self.addFilter(RequestIdFilter())
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        record.log_targets = self.targets
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.drop_policy == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            if self.drop_policy != "drop_oldest":
+                self.dropped += 1
+                return
+        try:
+            self.queue.get_nowait()
+        except queue.Empty:
+            pass
+        self.dropped += 1
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RoutingQueueListener(QueueListener):
+    """QueueListener that hands each record to the handlers it was queued for."""
+
+    def handle(self, record: logging.LogRecord) -> None:
+        record = self.prepare(record)
+        for handler in getattr(record, "log_targets", self.handlers):
+            if not self.respect_handler_level or record.levelno >= handler.level:
+                handler.handle(record)
+
+    def enqueue_sentinel(self) -> None:
+        # Wait for room so the sentinel is not lost on a full queue
+        self.queue.put(self._sentinel)
+
+
+_listener: Optional[RoutingQueueListener] = None
+_queue_handlers: List[BoundedQueueHandler] = []
+_original_handlers: Dict[logging.Logger, List[logging.Handler]] = {}
+
+
+def _configured_loggers() -> List[logging.Logger]:
+    loggers = [logging.getLogger()]
+    for logger in logging.Logger.manager.loggerDict.values():
+        if isinstance(logger, logging.Logger) and logger.handlers:
+            loggers.append(logger)
+    return loggers
+
+
+def start_queue_logging(max_size: int, drop_policy: str = "drop_new") -> None:
+    """
+    Route every configured logger through one bounded queue.
+
+    The handlers created by dictConfig are moved to a background listener
+    thread, so formatting, file I/O and rotation happen off the request
+    path. Calling it again while running has no effect.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=max_size)
+    targets: Dict[int, logging.Handler] = {}
+    for logger in _configured_loggers():
+        handlers = [
+            handler for handler in logger.handlers
+            if not isinstance(handler, QueueHandler)
+        ]
+        if not handlers:
+            continue
+        for handler in handlers:
+            targets[id(handler)] = handler
+        queue_handler = BoundedQueueHandler(log_queue, handlers, drop_policy)
+        _original_handlers[logger] = list(logger.handlers)
+        _queue_handlers.append(queue_handler)
+        logger.handlers = [queue_handler]
+
+    _listener = RoutingQueueListener(
+        log_queue, *targets.values(), respect_handler_level=True
+    )
+    _listener.start()
+
+
+def stop_queue_logging() -> None:
+    """Flush the queue, stop the listener and restore the original handlers"""
+    global _listener
+    if _listener is None:
+        return
+    for logger, handlers in _original_handlers.items():
+        logger.handlers = handlers
+    _listener.stop()
+    _listener = None
+    _original_handlers.clear()
+    _queue_handlers.clear()
+
+
+def queue_logging_stats() -> Dict[str, int]:
+    """Records currently queued and records dropped since the queue started"""
+    if _listener is None:
+        return {"queued": 0, "dropped": 0}
+    return {
+        "queued": _listener.queue.qsize(),
+        "dropped": sum(handler.dropped for handler in _queue_handlers),
+    }
+
+
+LOG_QUEUE_RECORDS = registry.gauge(
+    "log_queue_records",
+    "Log records queued for and dropped by the background listener",
+    ["state"],
+)
+
+
+def _collect_log_queue_stats() -> None:
+    for state, value in queue_logging_stats().items():
+        LOG_QUEUE_RECORDS.set(value, state)
+
+
+registry.register_collector(_collect_log_queue_stats)
@@ -0,0 +1,390 @@
+"""
+Prometheus-format metrics without external dependencies.
+
+Observations are increments on per-thread dictionaries: besides the
+event loop, pool and SQL events fire on the threadpool workers that run
+sync sessions, and with one dictionary per thread each has a single
+writer, so recording takes no lock. Snapshots sum the threads'
+dictionaries. Values that are cheaper to sample than to track (pool
+status, cache sizes) are set by collectors when the metrics are scraped.
+
+When several uvicorn workers run, set METRICS_MULTIPROC_DIR to a
+directory shared by them. Each worker then writes a JSON snapshot of its
+metrics to that directory every METRICS_FLUSH_INTERVAL_SECONDS (and
+whenever it serves /metrics), and /metrics merges the snapshots of all
+workers. Counters and histograms of workers that have exited are kept;
+their gauges are dropped.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        # Values set outright, by collectors
+        self._values: Dict[Labels, Any] = {}
+        # Increments of each thread that recorded, and of exited ones
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, Dict[Labels, Any]]] = []
+        self._retired: Dict[Labels, Any] = {}
+        # Taken once per recording thread and on snapshots, not per observation
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict[Labels, Any]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._shards_lock:
+                self._shards.append((threading.current_thread(), values))
+            return values
+
+    @staticmethod
+    def _add(totals: Dict[Labels, Any], samples: Iterable[Tuple[Labels, Any]]) -> None:
+        for labels, value in samples:
+            totals[labels] = totals.get(labels, 0.0) + value
+
+    def _totals(self) -> Dict[Labels, Any]:
+        with self._shards_lock:
+            live = []
+            for thread, values in self._shards:
+                if thread.is_alive():
+                    live.append((thread, values))
+                else:
+                    # Nothing writes to it any more
+                    self._add(self._retired, values.items())
+            self._shards = live
+            totals: Dict[Labels, Any] = {}
+            self._add(totals, self._retired.items())
+            for _, values in live:
+                # Copied in one step, as the owning thread may be adding keys
+                self._add(totals, list(values.items()))
+        self._add(totals, list(self._values.items()))
+        return totals
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "type": self.type,
+            "help": self.help,
+            "labelnames": list(self.labelnames),
+            "samples": [[list(labels), value] for labels, value in self._totals().items()],
+        }
+
+    def clear(self) -> None:
+        with self._shards_lock:
+            for _, values in self._shards:
+                values.clear()
+            self._retired.clear()
+        self._values.clear()
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        values = self._shard()
+        values[labels] = values.get(labels, 0.0) + amount
+
+    def set(self, value: float, *labels: str) -> None:
+        """For collectors mirroring a running total kept elsewhere"""
+        self._values[labels] = value
+
+
+class Gauge(_Metric):
+    """A gauge is either set by a collector or moved with inc() and dec()."""
+
+    type = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        values = self._shard()
+        values[labels] = values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        values = self._shard()
+        values[labels] = values.get(labels, 0.0) - amount
+
+
+class Histogram(_Metric):
+    """
+    Histogram storing one non-cumulative count per bucket plus the sum,
+    so an observation is a bisect and two increments.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        values = self._shard()
+        state = values.get(labels)
+        if state is None:
+            # One slot per bucket, one for +Inf, then the sum
+            state = values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    @staticmethod
+    def _add(totals: Dict[Labels, Any], samples: Iterable[Tuple[Labels, Any]]) -> None:
+        for labels, state in samples:
+            total = totals.get(labels)
+            totals[labels] = list(state) if total is None else [
+                a + b for a, b in zip(total, state)
+            ]
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = super().snapshot()
+        snapshot["buckets"] = list(self.buckets)
+        return snapshot
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric: _Metric) -> Any:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], None]) -> None:
+        """Register a callable that updates sampled metrics before each scrape"""
+        self._collectors.append(collector)
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """Run the collectors and return a JSON-serializable snapshot"""
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception:
+                logger.warning("Metrics collector failed", exc_info=True)
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def clear(self) -> None:
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+registry = MetricsRegistry()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render(snapshot: Dict[str, Dict[str, Any]]) -> str:
+    """Render a snapshot in the Prometheus text exposition format"""
+    lines: List[str] = []
+    for name, metric in sorted(snapshot.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        labelnames = metric["labelnames"]
+        for labels, value in sorted(metric["samples"], key=lambda sample: sample[0]):
+            if metric["type"] != "histogram":
+                lines.append(
+                    f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}"
+                )
+                continue
+            cumulative = 0
+            bounds = list(metric["buckets"]) + [float("inf")]
+            for bound, count in zip(bounds, value[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{name}_bucket{_format_labels(labelnames, labels, le)} {cumulative}"
+                )
+            label_text = _format_labels(labelnames, labels)
+            lines.append(f"{name}_sum{label_text} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{label_text} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def merge(snapshots: Iterable[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Sum the samples of several worker snapshots"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                if key not in target["samples"]:
+                    target["samples"][key] = value
+                elif metric["type"] == "histogram":
+                    target["samples"][key] = [
+                        a + b for a, b in zip(target["samples"][key], value)
+                    ]
+                else:
+                    target["samples"][key] += value
+    for metric in merged.values():
+        metric["samples"] = [[list(labels), value] for labels, value in metric["samples"].items()]
+    return merged
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_snapshot(directory: str) -> None:
+    """Atomically write this worker's snapshot to the shared directory"""
+    os.makedirs(directory, exist_ok=True)
+    snapshot = registry.collect()
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    os.replace(tmp_path, os.path.join(directory, f"metrics-{os.getpid()}.json"))
+
+
+def read_snapshots(directory: str) -> List[Dict[str, Dict[str, Any]]]:
+    """Read the snapshots of all workers, dropping gauges of exited ones"""
+    snapshots = []
+    for filename in os.listdir(directory):
+        if not (filename.startswith("metrics-") and filename.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        pid = int(filename[len("metrics-"):-len(".json")])
+        if pid != os.getpid() and not _pid_alive(pid):
+            snapshot = {
+                name: metric for name, metric in snapshot.items()
+                if metric["type"] != "gauge"
+            }
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def generate_latest(multiproc_dir: Optional[str] = None) -> str:
+    """Render this worker's metrics, or those of all workers in multiprocess mode"""
+    if not multiproc_dir:
+        return render(registry.collect())
+    write_snapshot(multiproc_dir)
+    return render(merge(read_snapshots(multiproc_dir)))
+
+
+# Metrics recorded by the application
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+)
+REQUESTS_TOTAL = registry.counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = registry.gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled",
+    ["method"],
+)
+PASSWORD_HASH_DURATION = registry.histogram(
+    "password_hash_duration_seconds",
+    "Time spent in bcrypt per hashing call",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.5, 5.0),
+)
+PASSWORD_HASH_QUEUE_WAIT = registry.histogram(
+    "password_hash_queue_wait_seconds",
+    "Time hashing calls waited for a worker",
+)
+PASSWORD_HASH_REJECTED = registry.counter(
+    "password_hash_rejected_total",
+    "Hashing calls rejected because the queue was full",
+)
+DB_POOL_CONNECTIONS = registry.gauge(
+    "db_pool_connections",
+    "Connections of the SQLAlchemy pool by state",
+    ["engine", "state"],
+)
+DB_POOL_CHECKOUT_WAIT = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["engine"],
+)
+DB_POOL_CONNECTION_AGE = registry.histogram(
+    "db_pool_connection_age_seconds",
+    "Age of connections when checked out",
+    ["engine"],
+    buckets=(1, 10, 60, 300, 600, 1800, 3600, 7200),
+)
+DB_POOL_OVERFLOW_CHECKOUTS = registry.counter(
+    "db_pool_overflow_checkouts_total",
+    "Checkouts made while overflow connections were open",
+    ["engine"],
+)
+DB_POOL_TIMEOUTS = registry.counter(
+    "db_pool_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT",
+    ["engine"],
+)
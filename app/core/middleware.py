@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+from uuid import uuid4
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import REQUEST_DURATION, REQUESTS_IN_PROGRESS, REQUESTS_TOTAL
+from app.core.query_stats import QueryStats, query_stats_contextvar
+
+logger = logging.getLogger(__name__)
+
+# Request ID of the request being handled, attached to log records by
+# app.core.logging.RequestIdFilter
+request_id_contextvar: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+class InFlightRequests:
+    """Number of requests being handled, so shutdown can wait for them."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._idle: Optional[asyncio.Event] = None
+
+    def started(self) -> None:
+        self.count += 1
+
+    def finished(self) -> None:
+        self.count -= 1
+        if self.count == 0 and self._idle is not None:
+            self._idle.set()
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait until no request is in flight; False if the timeout expired"""
+        if self.count == 0:
+            return True
+        self._idle = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._idle = None
+
+
+in_flight_requests = InFlightRequests()
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Return the path template of the matched route, e.g. /api/v1/users/{user_id}.
+
+    Raw paths would give metrics one series per user ID; requests that
+    matched no route share a single label.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:
+        return scope["path"]
+    return "<unmatched>"
+
+
+class TimingMiddleware:
+    """
+    Pure ASGI middleware that tags each request with an ID and times it.
+
+    X-Request-ID and X-Process-Time are added to the response start message
+    by wrapping ``send``, so the response body, streaming responses and
+    background tasks pass through untouched. X-Process-Time covers the
+    time until the response starts; the log line covers the whole request.
+    The same measurement feeds the request metrics.
+
+    The SQL statements of the request are counted and timed as well, and
+    statements repeated past DB_QUERY_REPEAT_THRESHOLD are logged.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Generate unique request ID, exposed as request.state.request_id
+        request_id = str(uuid4())
+        token = request_id_contextvar.set(request_id)
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        query_stats = QueryStats() if settings.DB_QUERY_STATS_ENABLED else None
+        query_stats_token = query_stats_contextvar.set(query_stats)
+        query_stats_headers = query_stats is not None and settings.DB_QUERY_STATS_HEADERS
+
+        method = scope["method"]
+        in_flight_requests.started()
+        record_metrics = settings.METRICS_ENABLED
+        if record_metrics:
+            REQUESTS_IN_PROGRESS.inc(method)
+
+        start = time.perf_counter_ns()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                process_time = (time.perf_counter_ns() - start) / 1e9
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", str(process_time))
+                headers.append("X-Request-ID", request_id)
+                if query_stats_headers:
+                    headers.append("X-DB-Query-Count", str(query_stats.count))
+                    headers.append("X-DB-Query-Time", str(query_stats.duration))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            process_time = (time.perf_counter_ns() - start) / 1e9
+            in_flight_requests.finished()
+            if record_metrics:
+                REQUESTS_IN_PROGRESS.dec(method)
+                route = route_template(scope)
+                REQUEST_DURATION.observe(process_time, method, route)
+                REQUESTS_TOTAL.inc(method, route, str(status_code))
+            extra = {
+                "method": method,
+                "path": scope["path"],
+                "processing_time": process_time,
+                "status_code": status_code
+            }
+            if query_stats is not None:
+                extra["db_queries"] = query_stats.count
+                extra["db_time"] = query_stats.duration
+                for statement, count in query_stats.repeated(
+                    settings.DB_QUERY_REPEAT_THRESHOLD
+                ):
+                    logger.warning(
+                        "Repeated SQL statement, possible N+1 query",
+                        extra={
+                            "method": method,
+                            "path": scope["path"],
+                            "statement": statement,
+                            "count": count,
+                        },
+                    )
+            logger.info("Request processed", extra=extra)
+            query_stats_contextvar.reset(query_stats_token)
+            request_id_contextvar.reset(token)
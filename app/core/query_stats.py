@@ -0,0 +1,110 @@
+"""
+Per-request SQL statistics.
+
+Engine events time every statement and add it to the QueryStats of the
+current request, held in a contextvar next to the request ID. SQLAlchemy
+runs async drivers in greenlets sharing the caller's context, and
+run_in_threadpool copies the context, so sync and async sessions are
+both attributed to the request that issued them.
+
+Statements are grouped by shape: the SQL text with expanded parameter
+lists collapsed, so ``IN (?, ?)`` and ``IN (?, ?, ?)`` count as the same
+statement. A shape repeated many times in one request usually means an
+N+1 query pattern.
+
+The listeners are installed on the Engine class by app.db.session, so
+this module can be imported without SQLAlchemy.
+"""
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Iterator, List, Optional, Tuple
+
+# Bind parameter in the paramstyles of the supported drivers
+_PARAMETER = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+_PARAMETER_LIST = re.compile(rf"\(\s*{_PARAMETER}(?:\s*,\s*{_PARAMETER})*\s*\)")
+
+
+class QueryStats:
+    """Statements run, their total duration and how often each shape ran."""
+
+    __slots__ = ("count", "duration", "shapes")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: "Counter[str]" = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Shapes that ran more than ``threshold`` times, most frequent first"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > threshold]
+
+
+# Statistics of the request being handled, set by TimingMiddleware
+query_stats_contextvar: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+# Active capture_queries() blocks, which see statements from every thread
+_captures: List[QueryStats] = []
+
+
+@lru_cache(maxsize=1024)
+def statement_shape(statement: str) -> str:
+    """The statement with whitespace normalized and parameter lists collapsed"""
+    return _PARAMETER_LIST.sub("(?)", " ".join(statement.split()))
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """Collect the statements run by any engine while the block runs"""
+    stats = QueryStats()
+    _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        _captures.remove(stats)
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    if query_stats_contextvar.get() is None and not _captures:
+        return
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    starts = conn.info.get("query_start_time")
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    stats = query_stats_contextvar.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    for capture in _captures:
+        capture.record(statement, duration)
+
+
+def _handle_error(context: Any) -> None:
+    # The statement failed, so no after_cursor_execute will pop its start
+    if context.connection is not None:
+        starts = context.connection.info.get("query_start_time")
+        if starts:
+            starts.pop()
+
+
+def instrument_engines() -> None:
+    """Record the statements of every engine, existing or future; idempotent"""
+    from sqlalchemy import Engine, event
+
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
@@ -0,0 +1,219 @@
+"""
+Token-bucket rate limiting for the authentication endpoints.
+
+Login and registration cost a bcrypt hash each, so unthrottled attempts
+translate directly into CPU load. Every attempt takes a token from a
+bucket per client IP and a bucket per target email; a bucket holds at
+most ``capacity`` tokens and refills at ``rate`` tokens per second.
+
+The in-process backend keeps one bucket per key and updates it in O(1).
+Buckets that have refilled completely carry no information and are
+evicted as the limiter is used. Deployments with several workers should
+use the Redis backend, which updates each bucket atomically in a Lua
+script so that all workers share the same budget. Its calls go through
+redis.asyncio, so waiting on Redis never blocks the event loop.
+
+The limiters are created on first use by init_rate_limiters(), so
+importing this module neither reads the settings nor opens a client.
+"""
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Protocol
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED = registry.counter(
+    "rate_limited_requests_total",
+    "Requests rejected by a rate limiter",
+    ["limiter"],
+)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request is over its rate limit."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limit exceeded, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class RateLimiterBackend(Protocol):
+    async def acquire(self, key: str) -> float:
+        """Take a token; return 0 if granted, else seconds until one is available"""
+        ...
+
+
+class MemoryRateLimiter:
+    """
+    Per-process token buckets, one per key.
+
+    Buckets are kept in least-recently-used order. A bucket untouched for
+    ``capacity / rate`` seconds is full again, so it is dropped; eviction
+    walks from the oldest bucket and stops at the first one still needed.
+    ``max_keys`` bounds memory when many distinct keys arrive at once.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        rate: float,
+        max_keys: int = 100000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.rate = rate
+        self.max_keys = max_keys
+        self._clock = clock
+        self._refill_time = capacity / rate
+        # key -> [tokens, updated_at]
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def acquire(self, key: str) -> float:
+        now = self._clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.capacity), now]
+        else:
+            tokens, updated_at = bucket
+            bucket[0] = min(self.capacity, tokens + (now - updated_at) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        self._evict(now)
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / self.rate
+
+    def _evict(self, now: float) -> None:
+        buckets = self._buckets
+        while buckets:
+            key, (_, updated_at) = next(iter(buckets.items()))
+            if now - updated_at < self._refill_time and len(buckets) <= self.max_keys:
+                break
+            del buckets[key]
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+# KEYS[1]: bucket key. ARGV: capacity, refill rate per second.
+# Uses the server clock so that workers with skewed clocks agree. Returns
+# the wait in milliseconds, 0 when a token was taken.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+if tokens == nil then
+  tokens = capacity
+else
+  tokens = math.min(capacity, tokens + (now - tonumber(state[2])) * rate)
+end
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return wait
+"""
+
+
+class RedisRateLimiter:
+    """
+    Shared token buckets for any asyncio Redis-compatible client, such as
+    redis.asyncio.Redis, exposing eval.
+
+    Redis errors are logged and the request is let through, so an outage
+    of the limiter does not take the login endpoint down with it.
+    """
+
+    def __init__(self, client: Any, capacity: int, rate: float, prefix: str):
+        self.client = client
+        self.capacity = capacity
+        self.rate = rate
+        self.prefix = prefix
+
+    async def acquire(self, key: str) -> float:
+        try:
+            wait_ms = await self.client.eval(
+                TOKEN_BUCKET_SCRIPT, 1, f"{self.prefix}{key}", self.capacity, self.rate
+            )
+        except Exception:
+            logger.warning("Rate limiter unavailable", exc_info=True)
+            return 0.0
+        return int(wait_ms) / 1000
+
+
+def build_rate_limiter(capacity: int, per_minute: float, prefix: str) -> RateLimiterBackend:
+    """Create a limiter on the backend selected by RATE_LIMIT_BACKEND"""
+    rate = per_minute / 60
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        from redis import asyncio as redis
+
+        return RedisRateLimiter(
+            redis.Redis.from_url(settings.REDIS_URL),
+            capacity=capacity,
+            rate=rate,
+            prefix=prefix,
+        )
+    return MemoryRateLimiter(capacity, rate, max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+
+auth_ip_limiter: Optional[RateLimiterBackend] = None
+auth_email_limiter: Optional[RateLimiterBackend] = None
+
+
+def init_rate_limiters() -> None:
+    """Create the configured authentication limiters; idempotent"""
+    global auth_ip_limiter, auth_email_limiter
+    if auth_ip_limiter is None:
+        auth_ip_limiter = build_rate_limiter(
+            settings.RATE_LIMIT_IP_BURST,
+            settings.RATE_LIMIT_IP_PER_MINUTE,
+            "rate:auth:ip:",
+        )
+    if auth_email_limiter is None:
+        auth_email_limiter = build_rate_limiter(
+            settings.RATE_LIMIT_EMAIL_BURST,
+            settings.RATE_LIMIT_EMAIL_PER_MINUTE,
+            "rate:auth:email:",
+        )
+
+
+def reset_rate_limiters() -> None:
+    """Drop the limiters, so that the next check creates them afresh"""
+    global auth_ip_limiter, auth_email_limiter
+    auth_ip_limiter = auth_email_limiter = None
+
+
+async def check_auth_rate_limit(client_ip: str, email: str) -> None:
+    """Take a token for the client and the target email, or raise RateLimitExceeded"""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    init_rate_limiters()
+    for name, limiter, key in (
+        ("auth_ip", auth_ip_limiter, client_ip),
+        ("auth_email", auth_email_limiter, email.strip().lower()),
+    ):
+        retry_after = await limiter.acquire(key)
+        if retry_after > 0:
+            RATE_LIMITED.inc(name)
+            raise RateLimitExceeded(retry_after)
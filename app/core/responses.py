@@ -0,0 +1,77 @@
+"""
+Fast JSON rendering for API responses.
+
+FastAPI renders every JSONResponse with the stdlib json module. When
+orjson is installed, FastJSONResponse uses it instead; otherwise it falls
+back to compact stdlib output. JSON_RESPONSE_ENCODER selects the default
+response class of the application.
+
+List endpoints can go one step further with model_list_response(): the
+rows are serialized to JSON bytes by a cached TypeAdapter in pydantic-core,
+skipping response_model re-validation and the intermediate list of dicts
+the JSON encoder would otherwise walk.
+"""
+import json
+from functools import lru_cache
+from typing import Any, Iterable, List, Type
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize JSON-compatible content with the fastest available encoder"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is available."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def default_response_class() -> Type[JSONResponse]:
+    """Response class selected by JSON_RESPONSE_ENCODER"""
+    if settings.JSON_RESPONSE_ENCODER == "orjson":
+        return FastJSONResponse
+    return JSONResponse
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter for List[model], built once per model"""
+    return TypeAdapter(List[model])
+
+
+def model_list_response(
+    model: Type[BaseModel], items: Iterable[Any], **kwargs: Any
+) -> Response:
+    """
+    Return ORM rows or ``model`` instances as a JSON array of ``model``.
+
+    Rows are copied into the model with model_construct() instead of being
+    validated again: they come from the database and were validated when
+    written, and re-validating EmailStr fields alone costs more than the
+    rest of the response. Only use it for models whose fields are plain
+    column values.
+    """
+    fields = tuple(model.model_fields)
+    objs = [
+        item if isinstance(item, model)
+        else model.model_construct(**{name: getattr(item, name) for name in fields})
+        for item in items
+    ]
+    content = list_adapter(model).dump_json(objs)
+    return Response(content, media_type="application/json", **kwargs)
@@ -0,0 +1,116 @@
+"""
+In-process list of revoked tokens.
+
+Logout revokes a session: the ``sid`` claim shared by the access and
+refresh tokens of one login. Refreshing revokes the used refresh token's
+``jti``. A forced sign-out revokes every token of a user issued before a
+point in time. All of them are rows of the revoked_tokens table, which
+each process mirrors here so that checking a token costs a few hash
+probes rather than a query.
+
+Token and session IDs go into a bloom filter backed by an exact set: the
+filter rules out nearly every token that was never revoked without
+touching the larger set, and the set settles the filter's false
+positives. Entries are forgotten when every token they cover has
+expired, by rebuilding the structures on a reload.
+"""
+import threading
+import time
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from app.schemas.token import TokenPayload
+from app.utils.bloom import BloomFilter
+
+
+class Revocation(NamedTuple):
+    """
+    One row of the revoked_tokens table, with epoch timestamps.
+
+    A ``jti`` revokes that token or session ID; without one, every token of
+    ``user_id`` issued up to ``revoked_at`` is revoked. ``expires_at`` is
+    when the last token the row covers expires.
+    """
+
+    jti: Optional[str]
+    user_id: Optional[int]
+    revoked_at: float
+    expires_at: float
+
+
+class RevocationList:
+    """Revoked token and session IDs and per-user cutoffs."""
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float = 0.001,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._clock = clock
+        self._filter = BloomFilter(capacity, error_rate)
+        self._ids: Dict[str, float] = {}
+        # user ID -> (revoked before, expires at)
+        self._users: Dict[int, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._users)
+
+    def add(self, revocation: Revocation) -> None:
+        with self._lock:
+            self._add(revocation, self._filter, self._ids, self._users)
+
+    def update(self, revocations: Iterable[Revocation]) -> None:
+        """Add rows, such as those synced from other processes; idempotent"""
+        with self._lock:
+            for revocation in revocations:
+                self._add(revocation, self._filter, self._ids, self._users)
+
+    def replace(self, revocations: Iterable[Revocation]) -> None:
+        """
+        Rebuild from the full table, dropping expired entries.
+
+        The new structures are swapped in at once, so concurrent checks see
+        either the old list or the new one.
+        """
+        now = self._clock()
+        live = [r for r in revocations if r.expires_at > now]
+        bloom = BloomFilter(max(self.capacity, 2 * len(live)), self.error_rate)
+        ids: Dict[str, float] = {}
+        users: Dict[int, Tuple[float, float]] = {}
+        for revocation in live:
+            self._add(revocation, bloom, ids, users)
+        with self._lock:
+            self._filter, self._ids, self._users = bloom, ids, users
+
+    @staticmethod
+    def _add(
+        revocation: Revocation,
+        bloom: BloomFilter,
+        ids: Dict[str, float],
+        users: Dict[int, Tuple[float, float]],
+    ) -> None:
+        if revocation.jti is not None:
+            if revocation.jti not in ids:
+                bloom.add(revocation.jti)
+            ids[revocation.jti] = max(revocation.expires_at, ids.get(revocation.jti, 0))
+        elif revocation.user_id is not None:
+            before, expires_at = users.get(revocation.user_id, (0.0, 0.0))
+            users[revocation.user_id] = (
+                max(before, revocation.revoked_at),
+                max(expires_at, revocation.expires_at),
+            )
+
+    def is_revoked(self, claims: TokenPayload) -> bool:
+        """Whether the token, its session or all tokens of its user are revoked"""
+        bloom, ids = self._filter, self._ids
+        for key in (claims.jti, claims.sid):
+            if key is not None and key in bloom and key in ids:
+                return True
+        cutoff = self._users.get(claims.sub) if claims.sub is not None else None
+        return cutoff is not None and (claims.iat or 0) <= cutoff[0]
+
+    def clear(self) -> None:
+        self.replace(())
@@ -1,31 +1,137 @@
-from typing import Any, Union
+from typing import Any, Optional, Union
 from datetime import datetime, timedelta
+import logging
+import math
+import time
+import uuid
 from passlib.context import CryptContext
-from jose import jwt
+from passlib.hash import bcrypt
+from jose import JWTError
 
 from app.core.config import settings
+from app.core.keys import get_key_ring
+from app.core.metrics import registry
+from app.core.revocation import RevocationList
+from app.schemas.token import TokenPayload
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-ALGORITHM = "HS256"
+# Validated claims keyed by the raw token, each entry expiring with the token
+token_cache: LRUCache[TokenPayload] = LRUCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE)
+
+# Revoked token and session IDs, synced from the revoked_tokens table
+revocation_list = RevocationList(capacity=settings.TOKEN_REVOCATION_FILTER_CAPACITY)
+
+TOKEN_CACHE_LOOKUPS = registry.counter(
+    "token_cache_lookups_total", "Validated JWT claims cache lookups", ["result"]
+)
+TOKEN_REVOCATIONS = registry.gauge(
+    "token_revocations", "Revoked token IDs and user cutoffs held in memory"
+)
+
+
+def _collect_token_cache_stats() -> None:
+    TOKEN_CACHE_LOOKUPS.set(token_cache.hits, "hit")
+    TOKEN_CACHE_LOOKUPS.set(token_cache.misses, "miss")
+    TOKEN_REVOCATIONS.set(len(revocation_list))
+
+
+registry.register_collector(_collect_token_cache_stats)
 
 
 def create_access_token(
-    subject: Union[str, Any], expires_delta: timedelta = None
+    subject: Union[str, Any],
+    expires_delta: timedelta = None,
+    *,
+    session_id: Optional[str] = None,
 ) -> str:
     """
     Create JWT access token
+
+    Each token gets its own ``jti``; ``session_id`` ties it to the refresh
+    token of the same login, so that logging out revokes both.
     """
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(
-            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-        )
-    
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    if expires_delta is None:
+        expires_delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return _encode_token(subject, expires_delta, "access", session_id)
+
+
+def create_refresh_token(
+    subject: Union[str, Any], session_id: str, expires_delta: timedelta = None
+) -> str:
+    """
+    Create JWT refresh token, exchanged at /auth/refresh for a new pair
+    """
+    if expires_delta is None:
+        expires_delta = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+    return _encode_token(subject, expires_delta, "refresh", session_id)
+
+
+def new_session_id() -> str:
+    """ID of a new login session"""
+    return uuid.uuid4().hex
+
+
+def _encode_token(
+    subject: Union[str, Any],
+    expires_delta: timedelta,
+    token_type: str,
+    session_id: Optional[str],
+) -> str:
+    # iat keeps sub-second precision so that a forced sign-out does not
+    # also revoke the tokens of a login made right after it
+    issued_at = time.time()
+    to_encode = {
+        "exp": datetime.utcnow() + expires_delta,
+        "iat": issued_at,
+        "sub": str(subject),
+        "jti": uuid.uuid4().hex,
+        "sid": session_id or new_session_id(),
+        "type": token_type,
+    }
+    return get_key_ring().sign(to_encode)
+
+
+def decode_access_token(token: str) -> TokenPayload:
+    """
+    Decode and validate a JWT access token.
+
+    Raises JWTError or ValidationError for invalid tokens, refresh tokens
+    and revoked tokens. Validated claims are cached until the token's exp,
+    so repeated requests with the same token skip signature verification
+    and parsing; the revocation check runs every time, in memory.
+    """
+    token_data = token_cache.get(token) if settings.TOKEN_CACHE_ENABLED else None
+    if token_data is None:
+        token_data = _decode_token(token)
+        if token_data.type != "access":
+            raise JWTError("Not an access token")
+        if settings.TOKEN_CACHE_ENABLED and token_data.exp is not None:
+            token_cache.set(token, token_data, expires_at=token_data.exp)
+
+    if revocation_list.is_revoked(token_data):
+        raise JWTError("Token has been revoked")
+    return token_data
+
+
+def decode_refresh_token(token: str) -> TokenPayload:
+    """
+    Decode and validate a JWT refresh token.
+
+    Revocation is left to the caller, which treats a revoked refresh token
+    as a sign that it was stolen.
+    """
+    token_data = _decode_token(token)
+    if token_data.type != "refresh" or token_data.jti is None:
+        raise JWTError("Not a refresh token")
+    return token_data
+
+
+def _decode_token(token: str) -> TokenPayload:
+    return TokenPayload(**get_key_ring().verify(token))
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -39,4 +145,53 @@ def get_password_hash(password: str) -> str:
     """
     Get password hash
     """
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+
+def configure_bcrypt_rounds(rounds: int) -> None:
+    """
+    Hash new passwords with ``rounds`` and flag stored hashes with a lower
+    cost as needing an update.
+
+    Also used as the initializer of the hashing worker processes.
+    """
+    pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+
+
+def calibrate_bcrypt_rounds(
+    target_seconds: float, min_rounds: int, max_rounds: int, probe_rounds: int = 8
+) -> int:
+    """
+    Pick the highest bcrypt cost that hashes within ``target_seconds`` here.
+
+    Each extra round doubles the work, so one cheap probe hash is enough to
+    extrapolate. The result is clamped to [min_rounds, max_rounds]; the
+    floor wins, with a warning, when the hardware is too slow for the target.
+    """
+    hasher = bcrypt.using(rounds=probe_rounds)
+    probe = min(_timed_hash(hasher) for _ in range(3))
+    rounds = probe_rounds + math.floor(math.log2(target_seconds / probe))
+    if rounds < min_rounds:
+        logger.warning(
+            "bcrypt calibration clamped to the minimum cost",
+            extra={
+                "calibrated_rounds": rounds,
+                "min_rounds": min_rounds,
+                "target_seconds": target_seconds,
+            },
+        )
+    return max(min_rounds, min(rounds, max_rounds))
+
+
+def _timed_hash(hasher: Any) -> float:
+    start = time.perf_counter()
+    hasher.hash("calibration")
+    return time.perf_counter() - start
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Whether a stored hash uses a deprecated scheme or a cost below the
+    configured one
+    """
+    return pwd_context.needs_update(hashed_password)
@@ -0,0 +1,179 @@
+"""
+Cache of authenticated user identities.
+
+get_current_user resolves the bearer token's subject on every request.
+Caching the handful of fields the dependencies and response schemas need
+avoids a users-table SELECT per request. UserService replaces an entry
+with the row its UPDATE ... RETURNING wrote, and drops the entries of
+deleted users. The backends are async, so that a shared cache's network
+round trip does not block the event loop.
+
+The in-process backend only sees invalidations made by its own process,
+so deployments with several workers should use the Redis backend or keep
+USER_CACHE_TTL_SECONDS short.
+"""
+import json
+import logging
+import time
+from typing import Any, NamedTuple, Optional, Protocol
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.utils.cache import LRUCache
+from app.utils.etag import version_stamp
+
+logger = logging.getLogger(__name__)
+
+
+class CachedUser(NamedTuple):
+    """
+    Compact, read-only view of a user row.
+
+    ``version`` is the epoch time of the row's last write, from which the
+    user's ETag is derived.
+    """
+
+    id: int
+    email: str
+    full_name: Optional[str]
+    is_active: bool
+    is_superuser: bool
+    version: Optional[float] = None
+
+    @classmethod
+    def from_user(cls, user: Any) -> "CachedUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+            version=version_stamp(user),
+        )
+
+
+class UserCacheBackend(Protocol):
+    async def get(self, id: int) -> Optional[CachedUser]: ...
+
+    async def set(self, user: CachedUser) -> None: ...
+
+    async def delete(self, id: int) -> None: ...
+
+
+class NullUserCache:
+    """Backend used when caching is disabled."""
+
+    async def get(self, id: int) -> Optional[CachedUser]:
+        return None
+
+    async def set(self, user: CachedUser) -> None:
+        pass
+
+    async def delete(self, id: int) -> None:
+        pass
+
+
+class MemoryUserCache:
+    """Per-process LRU backend."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.ttl = ttl
+        self._cache: LRUCache[CachedUser] = LRUCache(maxsize=maxsize, clock=time.monotonic)
+
+    async def get(self, id: int) -> Optional[CachedUser]:
+        return self._cache.get(id)
+
+    async def set(self, user: CachedUser) -> None:
+        self._cache.set(user.id, user, expires_at=time.monotonic() + self.ttl)
+
+    async def delete(self, id: int) -> None:
+        self._cache.delete(id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+
+class RedisUserCache:
+    """
+    Shared backend for any asyncio Redis-compatible client, such as
+    redis.asyncio.Redis, exposing get/setex/delete.
+
+    Entries are stored as compact JSON arrays. Redis errors are logged and
+    treated as cache misses so the database remains the source of truth.
+    """
+
+    def __init__(self, client: Any, ttl: int, prefix: str = "user:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, id: int) -> str:
+        return f"{self.prefix}{id}"
+
+    async def get(self, id: int) -> Optional[CachedUser]:
+        try:
+            raw = await self.client.get(self._key(id))
+        except Exception:
+            logger.warning("User cache read failed", exc_info=True)
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedUser(*json.loads(raw))
+
+    async def set(self, user: CachedUser) -> None:
+        try:
+            await self.client.setex(
+                self._key(user.id), self.ttl, json.dumps(list(user), separators=(",", ":"))
+            )
+        except Exception:
+            logger.warning("User cache write failed", exc_info=True)
+
+    async def delete(self, id: int) -> None:
+        try:
+            await self.client.delete(self._key(id))
+        except Exception:
+            logger.warning("User cache invalidation failed", exc_info=True)
+
+
+def build_user_cache() -> UserCacheBackend:
+    """Create the backend selected by USER_CACHE_BACKEND"""
+    backend = settings.USER_CACHE_BACKEND
+    if backend == "memory":
+        return MemoryUserCache(
+            maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS
+        )
+    if backend == "redis":
+        from redis import asyncio as redis
+
+        return RedisUserCache(
+            redis.Redis.from_url(settings.REDIS_URL),
+            ttl=settings.USER_CACHE_TTL_SECONDS,
+        )
+    return NullUserCache()
+
+
+user_cache: UserCacheBackend = build_user_cache()
+
+USER_CACHE_LOOKUPS = registry.counter(
+    "user_cache_lookups_total", "User identity cache lookups", ["result"]
+)
+
+
+def _collect_user_cache_stats() -> None:
+    USER_CACHE_LOOKUPS.set(getattr(user_cache, "hits", 0), "hit")
+    USER_CACHE_LOOKUPS.set(getattr(user_cache, "misses", 0), "miss")
+
+
+registry.register_collector(_collect_user_cache_stats)
@@ -0,0 +1,97 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+from sqlalchemy import Delete, Insert, Row, Select, delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.revocation import Revocation
+from app.models.token import RevokedToken
+
+
+def build_revocation_insert(
+    *,
+    jti: Optional[str],
+    user_id: Optional[int],
+    revoked_at: datetime,
+    expires_at: datetime,
+) -> Insert:
+    return insert(RevokedToken).values(
+        jti=jti, user_id=user_id, revoked_at=revoked_at, expires_at=expires_at
+    )
+
+
+def build_revocations_query(since: Optional[datetime] = None) -> Select:
+    """Unexpired revocations, only those made from ``since`` on if given"""
+    query = select(
+        RevokedToken.jti,
+        RevokedToken.user_id,
+        RevokedToken.revoked_at,
+        RevokedToken.expires_at,
+    ).where(RevokedToken.expires_at > datetime.now(timezone.utc))
+    if since is not None:
+        query = query.where(RevokedToken.revoked_at >= since)
+    return query
+
+
+def build_expired_revocations_delete() -> Delete:
+    return delete(RevokedToken).where(
+        RevokedToken.expires_at <= datetime.now(timezone.utc)
+    )
+
+
+def to_revocation(row: Row) -> Revocation:
+    """The in-memory form of a revoked_tokens row"""
+    return Revocation(
+        jti=row.jti,
+        user_id=row.user_id,
+        revoked_at=_epoch(row.revoked_at),
+        expires_at=_epoch(row.expires_at),
+    )
+
+
+def _epoch(value: datetime) -> float:
+    # SQLite hands back the stored UTC times without a timezone
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def add_revocation(
+    db: Session,
+    *,
+    jti: Optional[str],
+    user_id: Optional[int],
+    revoked_at: datetime,
+    expires_at: datetime,
+) -> bool:
+    """
+    Record a revocation; False if ``jti`` was already revoked.
+
+    The unique constraint on jti makes this the atomic step of refresh
+    token rotation: of two requests using the same token, one gets False.
+    """
+    try:
+        db.execute(
+            build_revocation_insert(
+                jti=jti, user_id=user_id, revoked_at=revoked_at, expires_at=expires_at
+            )
+        )
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        if jti is None:
+            raise
+        return False
+    return True
+
+
+def get_revocations(db: Session, *, since: Optional[datetime] = None) -> List[Row]:
+    """Get unexpired revocations, only those made from ``since`` on if given"""
+    return list(db.execute(build_revocations_query(since)))
+
+
+def delete_expired_revocations(db: Session) -> int:
+    """Delete revocations whose tokens have all expired"""
+    result = db.execute(build_expired_revocations_delete())
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.token import (
+    build_expired_revocations_delete,
+    build_revocation_insert,
+    build_revocations_query,
+)
+
+# Async counterparts of app/crud/token.py, used when USE_ASYNC_DB is enabled.
+
+
+async def add_revocation(
+    db: AsyncSession,
+    *,
+    jti: Optional[str],
+    user_id: Optional[int],
+    revoked_at: datetime,
+    expires_at: datetime,
+) -> bool:
+    """Record a revocation; False if ``jti`` was already revoked"""
+    try:
+        await db.execute(
+            build_revocation_insert(
+                jti=jti, user_id=user_id, revoked_at=revoked_at, expires_at=expires_at
+            )
+        )
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        if jti is None:
+            raise
+        return False
+    return True
+
+
+async def get_revocations(
+    db: AsyncSession, *, since: Optional[datetime] = None
+) -> List[Row]:
+    """Get unexpired revocations, only those made from ``since`` on if given"""
+    result = await db.execute(build_revocations_query(since))
+    return list(result)
+
+
+async def delete_expired_revocations(db: AsyncSession) -> int:
+    """Delete revocations whose tokens have all expired"""
+    result = await db.execute(build_expired_revocations_delete())
+    await db.commit()
+    return result.rowcount
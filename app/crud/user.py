@@ -1,11 +1,61 @@
-from typing import Any, Dict, Optional, Union, List
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Sequence, Set, Tuple, Union, List
+from sqlalchemy import (
+    Delete,
+    Insert,
+    Row,
+    Select,
+    Update,
+    and_,
+    delete,
+    func,
+    insert,
+    literal,
+    not_,
+    or_,
+    select,
+    true,
+    union_all,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
 
-from app.core.security import get_password_hash, verify_password
+from app.db.search import (
+    SEARCH_MIN_TOKEN_LENGTH,
+    sqlite_search_match,
+    sqlite_search_table,
+)
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
 
+class DuplicateEmailError(Exception):
+    """Raised when a write violates the unique constraint on users.email."""
+
+
+# The unique index on users.email, as named by create_all and the migrations
+EMAIL_CONSTRAINT = "ix_users_email"
+
+
+def is_duplicate_email(error: IntegrityError) -> bool:
+    """
+    Whether the violated constraint is the unique one on users.email, rather
+    than, say, NOT NULL on the same column
+    """
+    orig = error.orig
+    # psycopg2 reports the constraint in its diagnostics; asyncpg errors
+    # are wrapped by SQLAlchemy's adapter, the original being the cause
+    constraint = getattr(getattr(orig, "diag", None), "constraint_name", None)
+    if constraint is None:
+        constraint = getattr(orig.__cause__, "constraint_name", None)
+    if constraint is not None:
+        return constraint == EMAIL_CONSTRAINT
+    # SQLite names the columns only
+    return "UNIQUE constraint failed: users.email" in str(orig)
+
+
 def get_user(db: Session, id: int) -> Optional[User]:
     """Get user by ID"""
     return db.query(User).filter(User.id == id).first()
@@ -19,55 +69,328 @@ def get_user_by_id(db: Session, id: int) -> Optional[User]:
     """Retrieve a user by ID."""
     return db.query(User).filter(User.id == id).first()
 
+def build_users_by_ids_query(ids: Sequence[int], primary: bool = False) -> Select:
+    """Select the users with the given IDs, from the primary if ``primary``"""
+    query = select(User).where(User.id.in_(ids))
+    return query.execution_options(use_primary=True) if primary else query
+
+
+def get_users_by_ids(
+    db: Session, ids: Sequence[int], *, primary: bool = False
+) -> List[User]:
+    """Get the users with the given IDs in one query, in no particular order"""
+    if not ids:
+        return []
+    return list(db.scalars(build_users_by_ids_query(ids, primary)))
+
 def get_users(
     db: Session, skip: int = 0, limit: int = 100
 ) -> List[User]:
     """Get multiple users with pagination"""
-    return db.query(User).offset(skip).limit(limit).all()
+    return db.query(User).order_by(User.id).offset(skip).limit(limit).all()
+
+
+def get_users_after(
+    db: Session, *, after_id: Optional[int] = None, limit: int = 100
+) -> List[User]:
+    """Get users ordered by ID, starting after the given ID (keyset pagination)"""
+    query = db.query(User)
+    if after_id is not None:
+        query = query.filter(User.id > after_id)
+    return query.order_by(User.id).limit(limit).all()
+
+
+# Search ranks, best first: exact email, prefix of email or full_name,
+# substring of either
+SEARCH_EXACT, SEARCH_PREFIX, SEARCH_SUBSTRING = 0, 1, 2
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 
-def create_user(db: Session, obj_in: UserCreate) -> User:
-    """Create new user"""
-    db_obj = User(
-        email=obj_in.email,
-        hashed_password=get_password_hash(obj_in.password),
-        full_name=obj_in.full_name,
-        is_superuser=obj_in.is_superuser,
-        is_active=obj_in.is_active,
+def build_search_query(
+    term: str,
+    *,
+    dialect: str,
+    after: Optional[Tuple[int, int]] = None,
+    limit: int = 20,
+) -> Select:
+    """
+    Build the ranked, case-insensitive search of email and full_name.
+
+    Each rank is its own id-ordered, limited branch of a UNION ALL, so
+    every branch can stop after ``limit`` rows from an index however many
+    users match, and a row is returned once, with its best rank. Results
+    are ordered by (rank, id); ``after`` is the (rank, id) of the last
+    result of the previous page.
+    """
+    term = term.strip().lower()
+    escaped = _escape_like(term)
+    email = func.lower(User.email)
+    full_name = func.lower(User.full_name)
+
+    exact = email == term
+    if dialect == "sqlite":
+        # SQLite only uses an index for LIKE on plain columns; the
+        # equivalent range uses the lower() indexes
+        upper = term + "\U0010ffff"
+        prefix = or_(
+            and_(email >= term, email < upper),
+            and_(full_name >= term, full_name < upper),
+        )
+    else:
+        prefix = or_(
+            email.like(f"{escaped}%", escape="\\"),
+            full_name.like(f"{escaped}%", escape="\\"),
+        )
+    substring = or_(
+        email.like(f"%{escaped}%", escape="\\"),
+        full_name.like(f"%{escaped}%", escape="\\"),
     )
-    db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
-    return db_obj
+    id_column = User.id
+    if dialect == "sqlite" and len(term) >= SEARCH_MIN_TOKEN_LENGTH:
+        # Walk the FTS5 table in rowid order instead, it stops at the limit
+        search = sqlite_search_table()
+        substring = sqlite_search_match(term)
+        id_column = search.c.rowid
 
+    # IS NOT TRUE rather than NOT, which is NULL for a NULL full_name
+    conditions = {
+        SEARCH_EXACT: (exact, User.id),
+        SEARCH_PREFIX: (and_(prefix, not_(exact)), User.id),
+        SEARCH_SUBSTRING: (and_(substring, prefix.is_not(true())), id_column),
+    }
 
-def update_user(
-    db: Session, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
-) -> User:
-    """Update existing user"""
+    branches = []
+    for rank, (condition, order_by) in conditions.items():
+        if after is not None and rank < after[0]:
+            continue
+        branch = select(User.id.label("id"), literal(rank).label("rank")).where(condition)
+        if order_by is not User.id:
+            branch = branch.select_from(order_by.table).join(User, User.id == order_by)
+        if after is not None and rank == after[0]:
+            position = order_by
+            if dialect == "sqlite" and order_by is User.id:
+                # Keeps SQLite on the lower() indexes rather than scanning
+                # the primary key from the cursor on
+                position = order_by + 0
+            branch = branch.where(position > after[1])
+        branches.append(select(branch.order_by(order_by).limit(limit).subquery()))
+    matches = union_all(*branches).subquery()
+    return (
+        select(User, matches.c.rank)
+        .join(matches, User.id == matches.c.id)
+        .order_by(matches.c.rank, matches.c.id)
+        .limit(limit)
+    )
+
+
+def search_users(
+    db: Session, *, term: str, after: Optional[Tuple[int, int]] = None, limit: int = 20
+) -> List[Row]:
+    """Search users, returning (User, rank) rows; see build_search_query"""
+    query = build_search_query(
+        term, dialect=db.bind.dialect.name, after=after, limit=limit
+    )
+    return list(db.execute(query))
+
+
+# Columns written by the bulk export. Plain rows skip the ORM identity map.
+EXPORT_COLUMNS = (
+    User.id,
+    User.email,
+    User.full_name,
+    User.is_active,
+    User.is_superuser,
+    User.created_at,
+    User.updated_at,
+)
+
+
+def build_export_query(
+    *,
+    is_active: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> Select:
+    """Build the filtered, id-ordered SELECT used by the bulk export"""
+    query = select(*EXPORT_COLUMNS).order_by(User.id)
+    if is_active is not None:
+        query = query.where(User.is_active == is_active)
+    if created_after is not None:
+        query = query.where(User.created_at >= created_after)
+    if created_before is not None:
+        query = query.where(User.created_at < created_before)
+    return query
+
+
+def stream_users(
+    db: Session, *, batch_size: int = 1000, **filters: Any
+) -> Iterator[Sequence[Row]]:
+    """
+    Stream users in batches through a server-side cursor.
+
+    yield_per enables stream_results, so only one batch is held in memory
+    regardless of the table size.
+    """
+    result = db.execute(
+        build_export_query(**filters).execution_options(yield_per=batch_size)
+    )
+    for partition in result.partitions():
+        yield partition
+
+
+def build_create_values(
+    obj_in: UserCreate, hashed_password: str
+) -> Dict[str, Any]:
+    """Column values of a new user"""
+    return {
+        "email": obj_in.email,
+        "hashed_password": hashed_password,
+        "full_name": obj_in.full_name,
+        "is_superuser": obj_in.is_superuser,
+        "is_active": obj_in.is_active,
+    }
+
+
+def build_update_values(obj_in: Union[UserUpdate, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Column values of an update.
+
+    Passwords are hashed by the caller with app.core.hashing.hasher, which
+    bounds the bcrypt work, so a plain password raises ValueError.
+    """
     if isinstance(obj_in, dict):
-        update_data = obj_in
+        update_data = dict(obj_in)
     else:
         update_data = obj_in.model_dump(exclude_unset=True)
-    
-    if "password" in update_data and update_data["password"]:
-        hashed_password = get_password_hash(update_data["password"])
-        del update_data["password"]
-        update_data["hashed_password"] = hashed_password
-    
-    for field in update_data:
-        if field in update_data:
-            setattr(db_obj, field, update_data[field])
-    
-    db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
-    return db_obj
+    if update_data.pop("password", None) is not None:
+        raise ValueError("Pass hashed_password, not a plain password")
+    return update_data
+
+
+# Single-statement writes. RETURNING hands back the written row, so there
+# is no SELECT before or after the write, and Core rows are not expired by
+# the commit. Duplicate emails surface as the unique constraint violation.
+
+def build_insert() -> Insert:
+    """INSERT of one user, returning the new row"""
+    return insert(User.__table__).returning(*User.__table__.c)
+
+
+def build_update(id: int, values: Dict[str, Any]) -> Union[Update, Select]:
+    """UPDATE of one user by ID, returning the updated row"""
+    table = User.__table__
+    if not values:
+        # Nothing to write: read the row instead
+        return select(*table.c).where(table.c.id == id)
+    # Set here rather than by the server default, whose resolution may be
+    # a second: updated_at is the version stamp behind the user's ETag
+    values = {**values, "updated_at": datetime.now(timezone.utc)}
+    return update(table).where(table.c.id == id).values(**values).returning(*table.c)
+
+
+def build_delete(id: int) -> Delete:
+    """DELETE of one user by ID, returning the deleted row"""
+    table = User.__table__
+    return delete(table).where(table.c.id == id).returning(*table.c)
+
+
+def expire_user(db: Session, id: int) -> None:
+    """
+    Expire the session's User of this ID, if one is loaded: the ORM does not
+    track the Core writes above, so it would keep the old values
+    """
+    user = db.identity_map.get(identity_key(User, id))
+    if user is not None:
+        db.expire(user)
+
+
+def create_user(db: Session, obj_in: UserCreate, hashed_password: str) -> Row:
+    """
+    Create new user with the given password hash; ``obj_in.password`` is
+    not stored.
+
+    Raises DuplicateEmailError if the email is taken.
+    """
+    try:
+        row = db.execute(
+            build_insert(), build_create_values(obj_in, hashed_password)
+        ).one()
+        db.commit()
+    except IntegrityError as error:
+        db.rollback()
+        if is_duplicate_email(error):
+            raise DuplicateEmailError(obj_in.email) from error
+        raise
+    return row
+
+
+def get_existing_emails(db: Session, emails: Sequence[str]) -> Set[str]:
+    """Return which of the given emails are already registered, in one query"""
+    if not emails:
+        return set()
+    return set(db.scalars(select(User.email).where(User.email.in_(emails))))
+
+
+def build_bulk_insert() -> Insert:
+    """
+    Build the multi-row INSERT used by create_users_bulk.
+
+    Core rows are returned rather than ORM objects so nothing is expired
+    and reloaded after the commit.
+    """
+    return insert(User.__table__).returning(
+        *User.__table__.c, sort_by_parameter_order=True
+    )
+
+
+def create_users_bulk(
+    db: Session, rows: Sequence[Dict[str, Any]], *, batch_size: int = 500
+) -> List[Row]:
+    """
+    Insert users in batched multi-row statements inside one transaction.
+
+    Rows are returned in the order of the given parameters. Any error rolls
+    back the whole transaction.
+    """
+    created: List[Row] = []
+    statement = build_bulk_insert()
+    try:
+        for start in range(0, len(rows), batch_size):
+            created.extend(db.execute(statement, rows[start:start + batch_size]))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return created
+
+
+def update_user(
+    db: Session, *, id: int, obj_in: Union[UserUpdate, Dict[str, Any]]
+) -> Optional[Row]:
+    """
+    Update a user, returning the updated row or None if it does not exist.
+
+    Raises DuplicateEmailError if the new email is taken.
+    """
+    values = build_update_values(obj_in)
+    try:
+        row = db.execute(build_update(id, values)).one_or_none()
+        db.commit()
+    except IntegrityError as error:
+        db.rollback()
+        if is_duplicate_email(error):
+            raise DuplicateEmailError(values.get("email")) from error
+        raise
+    expire_user(db, id)
+    return row
 
 
-def delete_user(db: Session, *, id: int) -> User:
-    """Delete user"""
-    obj = db.query(User).get(id)
-    db.delete(obj)
+def delete_user(db: Session, *, id: int) -> Optional[Row]:
+    """Delete a user, returning the deleted row or None if it did not exist"""
+    row = db.execute(build_delete(id)).one_or_none()
     db.commit()
-    return obj
\ No newline at end of file
+    expire_user(db, id)
+    return row
@@ -0,0 +1,176 @@
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Set, Tuple, Union, List
+from sqlalchemy import Row, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.user import (
+    DuplicateEmailError,
+    build_bulk_insert,
+    build_create_values,
+    build_delete,
+    build_export_query,
+    build_insert,
+    build_update,
+    build_search_query,
+    build_update_values,
+    build_users_by_ids_query,
+    expire_user,
+    is_duplicate_email,
+)
+from app.models.user import User
+from app.schemas.user import UserCreate, UserUpdate
+
+# Async counterparts of app/crud/user.py, used when USE_ASYNC_DB is enabled.
+
+
+async def get_user(db: AsyncSession, id: int) -> Optional[User]:
+    """Get user by ID"""
+    result = await db.execute(select(User).filter(User.id == id))
+    return result.scalars().first()
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    """Get user by email"""
+    result = await db.execute(select(User).filter(User.email == email))
+    return result.scalars().first()
+
+
+async def get_user_by_id(db: AsyncSession, id: int) -> Optional[User]:
+    """Retrieve a user by ID."""
+    return await get_user(db, id=id)
+
+
+async def get_users_by_ids(
+    db: AsyncSession, ids: Sequence[int], *, primary: bool = False
+) -> List[User]:
+    """Get the users with the given IDs in one query, in no particular order"""
+    if not ids:
+        return []
+    result = await db.scalars(build_users_by_ids_query(ids, primary))
+    return list(result)
+
+
+async def get_users(
+    db: AsyncSession, skip: int = 0, limit: int = 100
+) -> List[User]:
+    """Get multiple users with pagination"""
+    result = await db.execute(
+        select(User).order_by(User.id).offset(skip).limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def get_users_after(
+    db: AsyncSession, *, after_id: Optional[int] = None, limit: int = 100
+) -> List[User]:
+    """Get users ordered by ID, starting after the given ID (keyset pagination)"""
+    query = select(User)
+    if after_id is not None:
+        query = query.filter(User.id > after_id)
+    result = await db.execute(query.order_by(User.id).limit(limit))
+    return list(result.scalars().all())
+
+
+async def search_users(
+    db: AsyncSession,
+    *,
+    term: str,
+    after: Optional[Tuple[int, int]] = None,
+    limit: int = 20,
+) -> List[Row]:
+    """Search users, returning (User, rank) rows"""
+    query = build_search_query(
+        term, dialect=db.bind.dialect.name, after=after, limit=limit
+    )
+    result = await db.execute(query)
+    return list(result)
+
+
+async def stream_users(
+    db: AsyncSession, *, batch_size: int = 1000, **filters: Any
+) -> AsyncIterator[Sequence[Row]]:
+    """Stream users in batches through a server-side cursor"""
+    result = await db.stream(
+        build_export_query(**filters).execution_options(yield_per=batch_size)
+    )
+    async for partition in result.partitions():
+        yield partition
+
+
+async def create_user(
+    db: AsyncSession, obj_in: UserCreate, hashed_password: str
+) -> Row:
+    """
+    Create new user with the given password hash; ``obj_in.password`` is
+    not stored.
+
+    Raises DuplicateEmailError if the email is taken.
+    """
+    try:
+        result = await db.execute(
+            build_insert(), build_create_values(obj_in, hashed_password)
+        )
+        row = result.one()
+        await db.commit()
+    except IntegrityError as error:
+        await db.rollback()
+        if is_duplicate_email(error):
+            raise DuplicateEmailError(obj_in.email) from error
+        raise
+    return row
+
+
+async def get_existing_emails(db: AsyncSession, emails: Sequence[str]) -> Set[str]:
+    """Return which of the given emails are already registered, in one query"""
+    if not emails:
+        return set()
+    result = await db.scalars(select(User.email).where(User.email.in_(emails)))
+    return set(result)
+
+
+async def create_users_bulk(
+    db: AsyncSession, rows: Sequence[Dict[str, Any]], *, batch_size: int = 500
+) -> List[Row]:
+    """Insert users in batched multi-row statements inside one transaction"""
+    created: List[Row] = []
+    statement = build_bulk_insert()
+    try:
+        for start in range(0, len(rows), batch_size):
+            result = await db.execute(statement, rows[start:start + batch_size])
+            created.extend(result)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return created
+
+
+async def update_user(
+    db: AsyncSession, *, id: int, obj_in: Union[UserUpdate, Dict[str, Any]]
+) -> Optional[Row]:
+    """
+    Update a user, returning the updated row or None if it does not exist.
+
+    Raises DuplicateEmailError if the new email is taken.
+    """
+    values = build_update_values(obj_in)
+    try:
+        result = await db.execute(build_update(id, values))
+        row = result.one_or_none()
+        await db.commit()
+    except IntegrityError as error:
+        await db.rollback()
+        if is_duplicate_email(error):
+            raise DuplicateEmailError(values.get("email")) from error
+        raise
+    expire_user(db.sync_session, id)
+    return row
+
+
+async def delete_user(db: AsyncSession, *, id: int) -> Optional[Row]:
+    """Delete a user, returning the deleted row or None if it did not exist"""
+    result = await db.execute(build_delete(id))
+    row = result.one_or_none()
+    await db.commit()
+    expire_user(db.sync_session, id)
+    return row
@@ -0,0 +1,93 @@
+"""
+Connection pools that report how they are used.
+
+Every checkout records how long the caller waited for a connection, how
+old that connection is and whether overflow connections were open at the
+time. Checkouts slower than DB_POOL_SLOW_CHECKOUT_SECONDS are logged, so
+DB_POOL_SIZE and DB_MAX_OVERFLOW can be sized from the metrics instead of
+guessed. The wait includes the pre-ping round trip when it is enabled.
+"""
+import logging
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection, QueuePool
+
+from app.core.config import settings
+from app.core.metrics import (
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_CONNECTION_AGE,
+    DB_POOL_OVERFLOW_CHECKOUTS,
+    DB_POOL_TIMEOUTS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _InstrumentedPoolMixin:
+    """Times Pool.connect(); the engine label is the pool's logging name."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # Pools recreated by engine.dispose() inherit the listener via _dispatch
+        if "_dispatch" not in kwargs:
+            event.listen(self, "connect", _record_connect)
+
+    def connect(self) -> PoolProxiedConnection:
+        label = self.logging_name or "default"
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.inc(label)
+            logger.error(
+                "Timed out waiting for a database connection",
+                extra={"engine": label, "pool_status": self.status()},
+            )
+            raise
+        wait = time.perf_counter() - started
+
+        DB_POOL_CHECKOUT_WAIT.observe(wait, label)
+        connected_at = connection.info.get("connected_at")
+        if connected_at is not None:
+            DB_POOL_CONNECTION_AGE.observe(time.monotonic() - connected_at, label)
+        if self.overflow() > 0:
+            DB_POOL_OVERFLOW_CHECKOUTS.inc(label)
+
+        threshold = settings.DB_POOL_SLOW_CHECKOUT_SECONDS
+        if threshold > 0 and wait >= threshold:
+            logger.warning(
+                "Slow database connection checkout",
+                extra={"engine": label, "wait": wait, "pool_status": self.status()},
+            )
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _record_connect(dbapi_connection: Any, connection_record: Any) -> None:
+    # Fired again when a recycled or invalidated connection is replaced
+    connection_record.info["connected_at"] = time.monotonic()
+
+
+def pool_options(name: str, use_async: bool = False) -> Dict[str, Any]:
+    """create_engine() keyword arguments for a pool configured from Settings"""
+    return {
+        "poolclass": (
+            InstrumentedAsyncAdaptedQueuePool if use_async else InstrumentedQueuePool
+        ),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_use_lifo": settings.DB_POOL_USE_LIFO,
+        "pool_logging_name": name,
+    }
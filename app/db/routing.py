@@ -0,0 +1,75 @@
+"""
+Read-replica routing.
+
+RoutingSession sends plain SELECTs to a replica and everything else to
+the primary. As soon as a session writes, or runs a statement that may
+write or lock, it pins itself to the primary for the rest of its life,
+so a request reads its own writes despite replication lag. Sessions live
+for one request, which makes the request the unit of consistency.
+
+A session also sticks to the first replica it picked, so all reads of a
+request see the same replication state. The async session uses the same
+class as its ``sync_session_class``.
+
+SELECTs with the execution option ``use_primary=True`` read from the
+primary without pinning the session. They are for reads whose results
+outlive the request, such as identities kept in the user cache, which a
+lagging replica would otherwise put back after a write.
+"""
+import itertools
+import threading
+from typing import Any, Literal, Optional, Sequence
+
+from sqlalchemy import Engine, Select
+from sqlalchemy.orm import Session
+
+ReplicaStrategy = Literal["round_robin", "least_busy"]
+
+
+class ReplicaSet:
+    """Replica engines and the strategy used to pick one per session."""
+
+    def __init__(self, engines: Sequence[Engine], strategy: ReplicaStrategy = "round_robin"):
+        self.engines = list(engines)
+        self.strategy = strategy
+        self._cycle = itertools.cycle(self.engines)
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def choose(self) -> Engine:
+        if self.strategy == "least_busy":
+            return min(self.engines, key=_checked_out)
+        with self._lock:
+            return next(self._cycle)
+
+
+def _checked_out(engine: Engine) -> int:
+    pool = engine.pool
+    return pool.checkedout() if hasattr(pool, "checkedout") else 0
+
+
+class RoutingSession(Session):
+    """Session that reads from ``replicas`` until it writes."""
+
+    def __init__(self, *args: Any, replicas: Optional[ReplicaSet] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.uses_primary = False
+        self._replica: Optional[Engine] = None
+
+    def get_bind(self, mapper: Any = None, *, clause: Any = None, **kw: Any) -> Any:
+        if self.replicas and not self.uses_primary:
+            if (
+                not self._flushing
+                and isinstance(clause, Select)
+                and clause._for_update_arg is None
+            ):
+                if clause.get_execution_options().get("use_primary"):
+                    return super().get_bind(mapper, clause=clause, **kw)
+                if self._replica is None:
+                    self._replica = self.replicas.choose()
+                return self._replica
+            self.uses_primary = True
+        return super().get_bind(mapper, clause=clause, **kw)
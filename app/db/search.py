@@ -0,0 +1,93 @@
+"""
+Database objects behind the user search.
+
+PostgreSQL answers the search with trigram and lower() indexes declared
+on the model, which need the pg_trgm extension. SQLite has neither, so
+the search reads its substring candidates from ``users_search``, an FTS5
+table with the trigram tokenizer that indexes email and full_name
+case-insensitively. It is an external-content table over ``users``, kept
+in sync by triggers.
+
+The DDL runs along with ``users`` in metadata.create_all, which is how
+the tests and benchmarks build their databases; the Alembic migration
+creates the same objects.
+"""
+from sqlalchemy import (
+    DDL,
+    ColumnElement,
+    Table,
+    TableClause,
+    column,
+    event,
+    literal_column,
+    table,
+)
+
+SEARCH_TABLE = "users_search"
+
+# Trigram tokens need three characters; shorter terms fall back to LIKE
+SEARCH_MIN_TOKEN_LENGTH = 3
+
+SQLITE_SEARCH_DDL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        email, full_name,
+        content='users', content_rowid='id',
+        tokenize='trigram case_sensitive 0'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON users BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, email, full_name)
+        VALUES (new.id, new.email, new.full_name);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON users BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, email, full_name)
+        VALUES ('delete', old.id, old.email, old.full_name);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au
+    AFTER UPDATE OF email, full_name ON users BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, email, full_name)
+        VALUES ('delete', old.id, old.email, old.full_name);
+        INSERT INTO {SEARCH_TABLE}(rowid, email, full_name)
+        VALUES (new.id, new.email, new.full_name);
+    END
+    """,
+    # Index any rows the table already holds
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')",
+)
+
+
+def sqlite_search_table() -> TableClause:
+    """The search table, for use in SELECTs"""
+    return table(SEARCH_TABLE, column("rowid"))
+
+
+def sqlite_search_match(term: str) -> ColumnElement[bool]:
+    """MATCH clause finding ``term`` anywhere in email or full_name"""
+    phrase = '"' + term.replace('"', '""') + '"'
+    return literal_column(SEARCH_TABLE).op("MATCH")(phrase)
+
+
+def install_search_ddl(table: Table) -> None:
+    """
+    Create what the search needs along with ``table``: the pg_trgm
+    extension on PostgreSQL, the search table and triggers on SQLite
+    """
+    event.listen(
+        table,
+        "before_create",
+        DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+    )
+    for statement in SQLITE_SEARCH_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    # The triggers go with the table, the external-content table does not
+    event.listen(
+        table,
+        "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {SEARCH_TABLE}").execute_if(dialect="sqlite"),
+    )
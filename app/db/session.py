@@ -1,16 +1,133 @@
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, List, Optional, Union
+
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 from app.db.base_class import Base
 from app.models.user import User
+from app.models.token import RevokedToken
+
+from app.core.config import settings, to_async_uri
+from app.core.metrics import DB_POOL_CONNECTIONS, registry
+from app.core.query_stats import instrument_engines
+from app.db.pool import pool_options
+from app.db.routing import ReplicaSet, RoutingSession
+
+instrument_engines()
 
-from app.core.config import settings
+# Engines are created on first use by init_engines(), so importing this
+# module neither loads a database driver nor reads the settings.
+# RoutingSession reads from the configured replicas until it writes.
+engine: Optional[Engine] = None
+replica_engines: List[Engine] = []
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
 
-engine = create_engine(
-    settings.SQLALCHEMY_DATABASE_URI,
-    pool_pre_ping=True,
-    echo=False
+# Async engine, only created when USE_ASYNC_DB is enabled.
+# expire_on_commit=False keeps attributes loaded after commit, since
+# lazy-loading an expired attribute is not possible on an AsyncSession.
+async_engine: Optional[AsyncEngine] = None
+async_replica_engines: List[AsyncEngine] = []
+AsyncSessionLocal = async_sessionmaker(
+    sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-#Base = declarative_base()
\ No newline at end of file
+
+def init_engines() -> None:
+    """Create the configured engines and bind the session factories; idempotent"""
+    global engine, async_engine
+    strategy = settings.DATABASE_REPLICA_STRATEGY
+    if engine is None:
+        engine = create_engine(
+            settings.SQLALCHEMY_DATABASE_URI,
+            echo=False,
+            **pool_options("sync"),
+        )
+        replica_engines[:] = [
+            create_engine(uri, echo=False, **pool_options(f"sync-replica-{i}"))
+            for i, uri in enumerate(settings.DATABASE_REPLICA_URIS)
+        ]
+        SessionLocal.configure(
+            bind=engine, replicas=ReplicaSet(replica_engines, strategy)
+        )
+    if settings.USE_ASYNC_DB and async_engine is None:
+        async_engine = create_async_engine(
+            settings.SQLALCHEMY_ASYNC_DATABASE_URI,
+            echo=False,
+            **pool_options("async", use_async=True),
+        )
+        async_replica_engines[:] = [
+            create_async_engine(
+                to_async_uri(uri),
+                echo=False,
+                **pool_options(f"async-replica-{i}", use_async=True),
+            )
+            for i, uri in enumerate(settings.DATABASE_REPLICA_URIS)
+        ]
+        AsyncSessionLocal.configure(
+            bind=async_engine,
+            replicas=ReplicaSet(
+                [replica.sync_engine for replica in async_replica_engines], strategy
+            ),
+        )
+
+
+async def dispose_engines() -> None:
+    """Close the pooled connections of the engines created so far"""
+    if engine is not None:
+        await run_in_threadpool(engine.dispose)
+    for replica in replica_engines:
+        await run_in_threadpool(replica.dispose)
+    if async_engine is not None:
+        await async_engine.dispose()
+    for async_replica in async_replica_engines:
+        await async_replica.dispose()
+
+
+def _collect_pool_stats() -> None:
+    engines = {}
+    if engine is not None:
+        engines["sync"] = engine
+    if async_engine is not None:
+        engines["async"] = async_engine.sync_engine
+    for i, replica in enumerate(replica_engines):
+        engines[f"sync-replica-{i}"] = replica
+    for i, replica in enumerate(async_replica_engines):
+        engines[f"async-replica-{i}"] = replica.sync_engine
+    for name, pool_engine in engines.items():
+        pool = pool_engine.pool
+        # Pools without a fixed size (NullPool, StaticPool) have no stats
+        if not hasattr(pool, "checkedout"):
+            continue
+        DB_POOL_CONNECTIONS.set(pool.size(), name, "size")
+        DB_POOL_CONNECTIONS.set(pool.checkedout(), name, "checked_out")
+        DB_POOL_CONNECTIONS.set(pool.checkedin(), name, "checked_in")
+        DB_POOL_CONNECTIONS.set(pool.overflow(), name, "overflow")
+
+
+registry.register_collector(_collect_pool_stats)
+
+
+@asynccontextmanager
+async def session_scope(
+    session_factory: Callable[[], Union[Session, AsyncSession]]
+) -> AsyncIterator[Union[Session, AsyncSession]]:
+    """Open a session from either kind of factory and close it afterwards"""
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        if isinstance(db, AsyncSession):
+            await db.close()
+        else:
+            # Returning the connection to the pool issues a rollback
+            await run_in_threadpool(db.close)
+
+#Base = declarative_base()
@@ -1,76 +1,37 @@
-from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request, Response, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exception_handlers import http_exception_handler
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
-import time
+from typing import Any
 import logging
-import logging.config
-from starlette.middleware.base import BaseHTTPMiddleware
-import json
-from contextvars import ContextVar
-from uuid import uuid4
 
-from app.api.v1.router import api_router
 from app.core.config import settings
-from app.core.events import startup_event_handler, shutdown_event_handler
+from app.core.logging import configure_logging
+from app.core.metrics import CONTENT_TYPE, generate_latest
+from app.core.middleware import TimingMiddleware, request_id_contextvar
+from app.core.responses import default_response_class
 
-# Preferred method: Load logging configuration from JSON using dictConfig.
-with open("logging_config.json", "r") as f:
-    config_dict = json.load(f)
-logging.config.dictConfig(config_dict)
 logger = logging.getLogger(__name__)
 
-# Legacy method (commented out):
-# Loads configuration via fileConfig.
-# Not ideal for JSON configurations.
-# logging.config.fileConfig('logging_config.json', disable_existing_loggers=False)
-# logger = logging.getLogger(__name__)
-
-# Create request ID context
-request_id_contextvar = ContextVar("request_id", default=None)
-
-# Define middleware for tracking request duration
-class TimingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Generate unique request ID
-        request_id = str(uuid4())
-        request_id_contextvar.set(request_id)
-        
-        # Add request ID to request state
-        request.state.request_id = request_id
-        
-        # Get start time
-        start_time = time.time()
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate processing time
-        process_time = time.time() - start_time
-        
-        # Add timing headers
-        response.headers["X-Process-Time"] = str(process_time)
-        response.headers["X-Request-ID"] = request_id
-        
-        # Log request
-        logger.info(
-            "Request processed",
-            extra={
-                "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "processing_time": process_time,
-                "status_code": response.status_code
-            }
-        )
-        
-        return response
+# Importing this module has no side effects: logging is configured, the
+# settings are read and the routers, engines and hashing pool are loaded
+# when the application is created, on first access to ``app`` or by
+# ``uvicorn --factory app.main:create_application``. Engines connect on
+# first use or during the lifespan startup.
 
 
 def create_application() -> FastAPI:
+    configure_logging()
+
+    from app.api.v1.router import api_router
+    from app.core.events import lifespan
+    from app.core.hashing import HashingPoolSaturated
+    from app.core.keys import get_key_ring
+    from app.core.rate_limit import RateLimitExceeded
+
     application = FastAPI(
         title=settings.PROJECT_NAME,
         description="Enterprise-level FastAPI application",
@@ -78,6 +39,8 @@ def create_application() -> FastAPI:
         openapi_url=f"{settings.API_V1_STR}/openapi.json",
         docs_url="/docs",
         redoc_url="/redoc",
+        lifespan=lifespan,
+        default_response_class=default_response_class(),
     )
 
     # Set CORS middleware
@@ -88,15 +51,12 @@ def create_application() -> FastAPI:
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
+            expose_headers=["X-Next-Cursor"],
         )
 
     # Add timing middleware
     application.add_middleware(TimingMiddleware)
 
-    # Add event handlers
-    application.add_event_handler("startup", startup_event_handler(application))
-    application.add_event_handler("shutdown", shutdown_event_handler(application))
-
     # Add routers
     application.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -113,6 +73,39 @@ def create_application() -> FastAPI:
         )
         return await http_exception_handler(request, exc)
 
+    @application.exception_handler(HashingPoolSaturated)
+    async def hashing_pool_saturated_handler(request, exc):
+        logger.warning(
+            "Password hashing pool saturated",
+            extra={
+                "request_id": getattr(request.state, "request_id", "unknown"),
+                "method": request.method,
+                "path": request.url.path
+            }
+        )
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "Server is busy, please retry shortly"},
+            headers={"Retry-After": "1"}
+        )
+
+    @application.exception_handler(RateLimitExceeded)
+    async def rate_limit_exceeded_handler(request, exc):
+        logger.warning(
+            "Rate limit exceeded",
+            extra={
+                "request_id": getattr(request.state, "request_id", "unknown"),
+                "method": request.method,
+                "path": request.url.path,
+                "client": request.client.host if request.client else None
+            }
+        )
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"detail": "Too many attempts, please retry later"},
+            headers={"Retry-After": exc.retry_after_header}
+        )
+
     @application.exception_handler(RequestValidationError)
     async def validation_exception_handler(request, exc):
         errors = []
@@ -143,7 +136,29 @@ def create_application() -> FastAPI:
     async def health_check():
         return {"status": "healthy"}
 
+    @application.get("/.well-known/jwks.json", include_in_schema=False)
+    async def jwks():
+        # Public keys for verifying access tokens; empty with HS256
+        return Response(
+            get_key_ring().jwks,
+            media_type="application/json",
+            headers={"Cache-Control": f"public, max-age={settings.JWKS_CACHE_SECONDS}"},
+        )
+
+    if settings.METRICS_ENABLED:
+        @application.get("/metrics", include_in_schema=False)
+        async def metrics():
+            return PlainTextResponse(
+                generate_latest(settings.METRICS_MULTIPROC_DIR),
+                media_type=CONTENT_TYPE,
+            )
+
     return application
 
 
-app = create_application()
\ No newline at end of file
+def __getattr__(name: str) -> Any:
+    # Builds the module-level ``app`` (uvicorn app.main:app) on first access
+    if name == "app":
+        application = globals()["app"] = create_application()
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
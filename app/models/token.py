@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, Integer, String
+from app.db.base_class import Base
+
+
+class RevokedToken(Base):
+    """
+    A revoked token or login session, or with ``jti`` unset, every token
+    of ``user_id`` issued up to ``revoked_at``. Rows can be deleted once
+    ``expires_at`` has passed. See app/core/revocation.py.
+    """
+
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String(64), unique=True)
+    user_id = Column(Integer, index=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
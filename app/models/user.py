@@ -1,6 +1,7 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime
+from sqlalchemy import Boolean, Column, Index, Integer, String, DateTime
 from sqlalchemy.sql import func
 from app.db.base_class import Base
+from app.db.search import install_search_ddl
 
 
 class User(Base):
@@ -13,4 +14,23 @@ class User(Base):
     is_active = Column(Boolean(), default=True)
     is_superuser = Column(Boolean(), default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+# Search indexes: lower() B-trees (text_pattern_ops on PostgreSQL) for
+# exact and prefix matches, trigram GIN indexes for substrings. SQLite
+# finds substrings through an FTS5 table instead, see app.db.search.
+for _column in (User.email, User.full_name):
+    _lower = func.lower(_column).label(f"{_column.key}_lower")
+    Index(
+        f"ix_users_{_column.key}_lower",
+        _lower,
+        postgresql_ops={_lower.name: "text_pattern_ops"},
+    )
+    Index(
+        f"ix_users_{_column.key}_trgm",
+        _lower,
+        postgresql_using="gin",
+        postgresql_ops={_lower.name: "gin_trgm_ops"},
+    ).ddl_if(dialect="postgresql")
+
+install_search_ddl(User.__table__)
@@ -1,12 +1,20 @@
-from typing import Optional
+from typing import Literal, Optional
 from pydantic import BaseModel
 
 
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    # Lifetime of the access token in seconds
+    expires_in: Optional[int] = None
 
 
 class TokenPayload(BaseModel):
     sub: Optional[int] = None
-    exp: Optional[int] = None
\ No newline at end of file
+    exp: Optional[int] = None
+    iat: Optional[float] = None
+    # Token ID, and the ID of the login session the token belongs to
+    jti: Optional[str] = None
+    sid: Optional[str] = None
+    type: Literal["access", "refresh"] = "access"
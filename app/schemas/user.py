@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional
+from typing import Literal, Optional
 import re
 
 
@@ -65,4 +65,13 @@ class User(UserInDBBase):
 
 class UserInDB(UserInDBBase):
     """Schema for database user data including hashed password"""
-    hashed_password: str
\ No newline at end of file
+    hashed_password: str
+
+
+class UserBulkResult(BaseModel):
+    """Outcome of one item of a bulk user creation"""
+    index: int
+    email: EmailStr
+    status: Literal["created", "error"]
+    user: Optional[User] = None
+    error: Optional[str] = None
@@ -0,0 +1,93 @@
+"""
+Request-scoped batching of lookups by key.
+
+A DataLoader collects the keys passed to load() while the current
+event-loop tick runs, then fetches them all with one call to its batch
+function. Coroutines gathered together, or dependencies and helpers that
+each look up one record, therefore share a single query. Each key is
+fetched at most once: later loads of the same key get the memoized
+result, so a loader should live no longer than the request it serves.
+"""
+import asyncio
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    """
+    Batches and deduplicates loads of ``batch_fn``.
+
+    ``batch_fn`` receives a list of distinct keys and returns the values
+    found, by key; keys missing from its result load as None. A failed
+    batch fails every load waiting on it and is not memoized.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[K]], Awaitable[Mapping[K, V]]],
+        max_batch_size: Optional[int] = None,
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._futures: Dict[K, "asyncio.Future[Optional[V]]"] = {}
+        self._queue: List[Tuple[K, "asyncio.Future[Optional[V]]"]] = []
+        # The event loop only keeps weak references to tasks
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    async def load(self, key: K) -> Optional[V]:
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[key] = loop.create_future()
+            self._queue.append((key, future))
+            if len(self._queue) == 1:
+                # Runs once every load issued in this tick has been queued
+                loop.call_soon(self._dispatch)
+        # A cancelled caller must not cancel the load for the others
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[K]) -> List[Optional[V]]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def clear(self, key: K) -> None:
+        """Forget a key, so that its next load is fetched again"""
+        self._futures.pop(key, None)
+
+    def _dispatch(self) -> None:
+        queue, self._queue = self._queue, []
+        size = self.max_batch_size or len(queue)
+        for start in range(0, len(queue), size):
+            task = asyncio.ensure_future(self._run(queue[start:start + size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, queue: List[Tuple[K, "asyncio.Future[Optional[V]]"]]) -> None:
+        keys = [key for key, _ in queue]
+        futures = [future for _, future in queue]
+        try:
+            values = await self.batch_fn(keys)
+        except Exception as error:
+            for key, future in zip(keys, futures):
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for key, future in zip(keys, futures):
+            if not future.done():
+                future.set_result(values.get(key))
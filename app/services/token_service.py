@@ -0,0 +1,161 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Union
+from jose import JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.revocation import Revocation
+from app.core.security import (
+    create_access_token,
+    create_refresh_token,
+    decode_refresh_token,
+    new_session_id,
+    revocation_list,
+)
+from app.crud import token as crud_token
+from app.crud import token_async as crud_token_async
+from app.db.session import session_scope
+from app.schemas.token import TokenPayload
+
+logger = logging.getLogger(__name__)
+
+# An incremental sync re-reads the revocations made this long before the
+# previous one, so that rows committed late or stamped by a host with a
+# slightly different clock are not missed
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def issue_tokens(user_id: int, session_id: Optional[str] = None) -> Dict[str, Any]:
+    """Access and refresh token of a login session, as the auth endpoints return them"""
+    session_id = session_id or new_session_id()
+    return {
+        "access_token": create_access_token(user_id, session_id=session_id),
+        "refresh_token": create_refresh_token(user_id, session_id),
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+def _session_expiry() -> datetime:
+    # No token of a session issued until now outlives a fresh refresh token
+    return datetime.now(timezone.utc) + timedelta(
+        minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES
+    )
+
+
+class TokenService:
+    """
+    Revocation of tokens, login sessions and users.
+
+    Revocations are written to the revoked_tokens table and applied to this
+    process's revocation list at once; other processes pick them up on
+    their next sync. Works with either a Session or an AsyncSession, like
+    UserService.
+    """
+
+    def __init__(self, db: Union[Session, AsyncSession]):
+        self.db = db
+
+    async def _run(
+        self, sync_fn: Callable[..., Any], async_fn: Callable[..., Any], **kwargs: Any
+    ) -> Any:
+        """Dispatch a CRUD call according to the session type"""
+        if isinstance(self.db, AsyncSession):
+            return await async_fn(self.db, **kwargs)
+        return await run_in_threadpool(sync_fn, self.db, **kwargs)
+
+    async def revoke(
+        self,
+        *,
+        jti: Optional[str] = None,
+        user_id: Optional[int] = None,
+        expires_at: datetime,
+    ) -> bool:
+        """
+        Revoke a token or session ID, or without one every token of the
+        user issued until now; False if the ID was already revoked
+        """
+        revoked_at = datetime.now(timezone.utc)
+        added = await self._run(
+            crud_token.add_revocation,
+            crud_token_async.add_revocation,
+            jti=jti,
+            user_id=user_id,
+            revoked_at=revoked_at,
+            expires_at=expires_at,
+        )
+        if added:
+            revocation_list.add(
+                Revocation(jti, user_id, revoked_at.timestamp(), expires_at.timestamp())
+            )
+        return added
+
+    async def logout(self, claims: TokenPayload) -> None:
+        """Revoke the login session the token belongs to"""
+        await self.revoke(
+            jti=claims.sid or claims.jti, user_id=claims.sub, expires_at=_session_expiry()
+        )
+
+    async def sign_out_user(self, user_id: int) -> None:
+        """Revoke every token issued to the user so far"""
+        await self.revoke(user_id=user_id, expires_at=_session_expiry())
+
+    async def refresh(self, token: str) -> TokenPayload:
+        """
+        Spend a refresh token, returning its claims to issue the next pair.
+
+        Each refresh token is accepted once. Presenting one again means a
+        copy of it is in other hands, so the whole session is revoked.
+        Raises JWTError or ValidationError.
+        """
+        claims = decode_refresh_token(token)
+        if revocation_list.is_revoked(claims) or not await self.revoke(
+            jti=claims.jti,
+            user_id=claims.sub,
+            expires_at=datetime.fromtimestamp(claims.exp, timezone.utc),
+        ):
+            await self.logout(claims)
+            raise JWTError("Refresh token has been revoked")
+        return claims
+
+    async def load_revocations(self, *, since: Optional[datetime] = None) -> None:
+        """
+        Bring the revocation list up to date with the table.
+
+        Without ``since`` the list is rebuilt from all unexpired rows, and
+        expired rows are deleted; otherwise only rows from ``since`` (less
+        SYNC_OVERLAP) on are read.
+        """
+        if since is None:
+            rows = await self._run(
+                crud_token.get_revocations, crud_token_async.get_revocations
+            )
+            revocation_list.replace(map(crud_token.to_revocation, rows))
+            await self._run(
+                crud_token.delete_expired_revocations,
+                crud_token_async.delete_expired_revocations,
+            )
+            return
+        rows = await self._run(
+            crud_token.get_revocations,
+            crud_token_async.get_revocations,
+            since=since - SYNC_OVERLAP,
+        )
+        revocation_list.update(map(crud_token.to_revocation, rows))
+
+
+async def sync_revocations(
+    session_factory: Callable[[], Union[Session, AsyncSession]],
+    since: Optional[datetime] = None,
+) -> datetime:
+    """
+    Load the revocations made since ``since``, or all of them, with a
+    session of its own; returns the time the sync started, for the next one
+    """
+    started = datetime.now(timezone.utc)
+    async with session_scope(session_factory) as db:
+        await TokenService(db).load_revocations(since=since)
+    return started
@@ -1,75 +1,383 @@
-from typing import List, Optional, Union, Dict, Any
+import asyncio
+import logging
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from pydantic import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy import Row
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 
-from app.crud.user import (
-    get_user,
-    get_user_by_email,
-    get_users,
-    create_user,
-    update_user,
-    delete_user
-)
+from app.core.config import settings
+from app.core.hashing import HashingPoolSaturated, hasher
+from app.core.security import password_needs_rehash
+from app.core.user_cache import CachedUser, user_cache
+from app.crud import user as crud_user
+from app.crud import user_async as crud_user_async
+from app.db.session import session_scope
+from app.services.dataloader import DataLoader
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
+from app.utils.pagination import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
 
 
 class UserService:
     """
     Service layer for user operations.
     Separates business logic from API endpoints.
+
+    Works with either a Session or an AsyncSession: async sessions use the
+    async CRUD functions directly, sync sessions run the regular CRUD
+    functions in the threadpool.
     """
-    
-    def __init__(self, db: Session):
+
+    def __init__(self, db: Union[Session, AsyncSession]):
         self.db = db
-    
-    def get(self, id: int) -> Optional[User]:
-        """Get user by ID"""
-        return get_user(self.db, id=id)
-    
-    def get_by_email(self, email: str) -> Optional[User]:
+
+    async def _run(
+        self, sync_fn: Callable[..., Any], async_fn: Callable[..., Any], **kwargs: Any
+    ) -> Any:
+        """Dispatch a CRUD call according to the session type"""
+        if isinstance(self.db, AsyncSession):
+            return await async_fn(self.db, **kwargs)
+        return await run_in_threadpool(sync_fn, self.db, **kwargs)
+
+    @property
+    def loader(self) -> DataLoader[int, User]:
+        """
+        Loader of users by ID for this session.
+
+        It is kept in the session's info, so all UserService instances of a
+        request share it, and replaced when used from another event loop.
+        It reads from the primary: the identities built from its users are
+        cached beyond the request, so they must not come from a replica
+        that has not yet applied the latest update or delete.
+        """
+        loop = asyncio.get_running_loop()
+        entry = self.db.info.get("user_loader")
+        if entry is None or entry[0] is not loop:
+            entry = self.db.info["user_loader"] = (loop, DataLoader(self._load_users))
+        return entry[1]
+
+    async def _load_users(self, ids: List[int]) -> Dict[int, User]:
+        users = await self._run(
+            crud_user.get_users_by_ids,
+            crud_user_async.get_users_by_ids,
+            ids=ids,
+            primary=True,
+        )
+        return {user.id: user for user in users}
+
+    async def get(self, id: int) -> Optional[User]:
+        """
+        Get user by ID.
+
+        Calls made on the same session within one event-loop tick are
+        answered with a single query, and each ID is read once per session.
+        """
+        return await self.loader.load(id)
+
+    async def get_many(self, ids: Sequence[int]) -> List[Optional[User]]:
+        """Get users by ID in one query; None for IDs that do not exist"""
+        return await self.loader.load_many(ids)
+
+    async def get_identity(self, id: int) -> Optional[CachedUser]:
+        """Get the cached identity of a user, loading it on a miss"""
+        cached = await user_cache.get(id)
+        if cached is not None:
+            return cached
+
+        user = await self.get(id=id)
+        if not user:
+            return None
+        cached = CachedUser.from_user(user)
+        await user_cache.set(cached)
+        return cached
+
+    async def get_identities(self, ids: Sequence[int]) -> Dict[int, CachedUser]:
+        """
+        Get the cached identities of users by ID, loading the misses in one
+        query; IDs that do not exist are left out
+        """
+        identities: Dict[int, CachedUser] = {}
+        misses: List[int] = []
+        for id in dict.fromkeys(ids):
+            cached = await user_cache.get(id)
+            if cached is not None:
+                identities[id] = cached
+            else:
+                misses.append(id)
+
+        for user in await self.get_many(misses):
+            if user is not None:
+                cached = identities[user.id] = CachedUser.from_user(user)
+                await user_cache.set(cached)
+        return identities
+
+    async def get_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
-        return get_user_by_email(self.db, email=email)
-    
-    def get_multi(self, *, skip: int = 0, limit: int = 100) -> List[User]:
+        return await self._run(
+            crud_user.get_user_by_email,
+            crud_user_async.get_user_by_email,
+            email=email,
+        )
+
+    async def get_multi(self, *, skip: int = 0, limit: int = 100) -> List[User]:
         """Get multiple users with pagination"""
-        return get_users(self.db, skip=skip, limit=limit)
-    
-    def create(self, *, obj_in: UserCreate) -> User:
-        """Create new user"""
+        return await self._run(
+            crud_user.get_users, crud_user_async.get_users, skip=skip, limit=limit
+        )
+
+    async def get_page(
+        self, *, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[User], Optional[str]]:
+        """
+        Get a page of users using keyset pagination on id.
+
+        Returns the users and the cursor of the next page, or None on the
+        last page. Raises ValueError for a malformed cursor.
+        """
+        after_id = None
+        if cursor is not None:
+            after_id = decode_cursor(cursor).get("id")
+            if not isinstance(after_id, int):
+                raise ValueError("Invalid cursor")
+
+        # Fetch one extra row to find out whether another page exists
+        users = await self._run(
+            crud_user.get_users_after,
+            crud_user_async.get_users_after,
+            after_id=after_id,
+            limit=limit + 1,
+        )
+        if len(users) <= limit:
+            return users, None
+        users = users[:limit]
+        return users, encode_cursor({"id": users[-1].id})
+
+    async def search(
+        self, *, q: str, cursor: Optional[str] = None, limit: int = 20
+    ) -> Tuple[List[User], Optional[str]]:
+        """
+        Search users by email and full name, best matches first.
+
+        Returns the users and the cursor of the next page, or None on the
+        last page. Raises ValueError for a malformed cursor.
+        """
+        after = None
+        if cursor is not None:
+            position = decode_cursor(cursor)
+            after = (position.get("rank"), position.get("id"))
+            if not all(isinstance(value, int) for value in after):
+                raise ValueError("Invalid cursor")
+
+        rows = await self._run(
+            crud_user.search_users,
+            crud_user_async.search_users,
+            term=q,
+            after=after,
+            limit=limit + 1,
+        )
+        if len(rows) <= limit:
+            return [user for user, _ in rows], None
+        rows = rows[:limit]
+        user, rank = rows[-1]
+        return [user for user, _ in rows], encode_cursor({"rank": rank, "id": user.id})
+
+    async def stream(
+        self, *, batch_size: int = 1000, **filters: Any
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Stream users for export in batches of rows.
+
+        Sync sessions are iterated in the threadpool one batch at a time.
+        """
+        if isinstance(self.db, AsyncSession):
+            batches = crud_user_async.stream_users(
+                self.db, batch_size=batch_size, **filters
+            )
+        else:
+            batches = iterate_in_threadpool(
+                crud_user.stream_users(self.db, batch_size=batch_size, **filters)
+            )
+        async for batch in batches:
+            yield batch
+
+    async def create(self, *, obj_in: UserCreate) -> Row:
+        """Create new user; raises DuplicateEmailError if the email is taken"""
         # Here we could add additional business logic like sending welcome emails
-        user = create_user(
-            db=self.db, 
-            obj_in=obj_in
+        hashed_password = await hasher.hash(obj_in.password)
+        user = await self._run(
+            crud_user.create_user,
+            crud_user_async.create_user,
+            obj_in=obj_in,
+            hashed_password=hashed_password,
         )
-        
+
         # Additional business logic after user creation
         # TODO: Integrate email functionality by importing the send_welcome_email function
         # from app/utils/email.py and calling it here, e.g.:
         # from app.utils.email import send_welcome_email
         # send_welcome_email(user.email)
-        
+
         return user
-    
-    def update(
-        self, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
-    ) -> User:
-        """Update existing user"""
-        return update_user(self.db, db_obj=db_obj, obj_in=obj_in)
-    
-    def remove(self, *, id: int) -> User:
-        """Remove user"""
-        return delete_user(self.db, id=id)
-    
+
+    async def create_many(
+        self, *, objs_in: Sequence[UserCreate]
+    ) -> List[Union[Row, str]]:
+        """
+        Create many users in one transaction.
+
+        Returns one entry per input, in order: the created row, or an error
+        message for items whose email is already taken or repeated.
+        """
+        results: List[Any] = [None] * len(objs_in)
+        seen = set()
+        for index, obj_in in enumerate(objs_in):
+            if obj_in.email in seen:
+                results[index] = "Duplicate email in request"
+            seen.add(obj_in.email)
+
+        existing = await self._run(
+            crud_user.get_existing_emails,
+            crud_user_async.get_existing_emails,
+            emails=list(seen),
+        )
+        pending = [
+            index
+            for index, obj_in in enumerate(objs_in)
+            if results[index] is None and obj_in.email not in existing
+        ]
+        for index, obj_in in enumerate(objs_in):
+            if results[index] is None and obj_in.email in existing:
+                results[index] = "A user with this email already exists"
+
+        hashed_passwords = await hasher.hash_many(
+            [objs_in[index].password for index in pending]
+        )
+        rows = [
+            {
+                "email": objs_in[index].email,
+                "hashed_password": hashed_password,
+                "full_name": objs_in[index].full_name,
+                "is_superuser": objs_in[index].is_superuser,
+                "is_active": objs_in[index].is_active,
+            }
+            for index, hashed_password in zip(pending, hashed_passwords)
+        ]
+
+        try:
+            created = await self._run(
+                crud_user.create_users_bulk,
+                crud_user_async.create_users_bulk,
+                rows=rows,
+                batch_size=settings.BULK_INSERT_BATCH_SIZE,
+            )
+        except IntegrityError:
+            # Another request registered one of the emails after the check
+            for index in pending:
+                results[index] = "Conflicting concurrent write, please retry"
+            return results
+
+        for index, row in zip(pending, created):
+            results[index] = row
+        return results
+
+    async def update(
+        self, *, id: int, obj_in: Union[UserUpdate, Dict[str, Any]]
+    ) -> Optional[Row]:
+        """
+        Update a user in one statement; None if the user does not exist.
+
+        Raises DuplicateEmailError if the new email is taken.
+        """
+        if isinstance(obj_in, dict):
+            update_data = dict(obj_in)
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+
+        password = update_data.pop("password", None)
+        if password:
+            update_data["hashed_password"] = await hasher.hash(password)
+
+        row = await self._run(
+            crud_user.update_user,
+            crud_user_async.update_user,
+            id=id,
+            obj_in=update_data,
+        )
+        self.loader.clear(id)
+        # Replace rather than drop the entry: a request that read the row
+        # before the commit would otherwise put the old values back
+        if row is not None:
+            await user_cache.set(CachedUser.from_user(row))
+        else:
+            await user_cache.delete(id)
+        return row
+
+    async def authenticate(self, *, email: str, password: str) -> Optional[User]:
+        """Return the user if the email and password match"""
+        user = await self.get_by_email(email=email)
+        if not user:
+            return None
+        if not await hasher.verify(password, user.hashed_password):
+            return None
+        return user
+
+    async def remove(self, *, id: int) -> Optional[Row]:
+        """Remove a user in one statement; None if the user does not exist"""
+        row = await self._run(
+            crud_user.delete_user, crud_user_async.delete_user, id=id
+        )
+        self.loader.clear(id)
+        await user_cache.delete(id)
+        return row
+
     # Placeholder for future email functionality.
     # TODO: Implement this method by integrating the email utilities from app/utils/email.py.
     def _send_welcome_email(self, email: EmailStr) -> None:
         """
         Private method to send welcome email to new users.
-        
+
         It is better to implement email functionality in a dedicated module (app/utils/email.py)
         to keep concerns separated, improve maintainability, and allow for easier testing and
         updates of email features independently of the user service logic.
         """
-        
-        pass
\ No newline at end of file
+
+        pass
+
+
+async def rehash_password(
+    session_factory: Callable[[], Union[Session, AsyncSession]],
+    user_id: int,
+    password: str,
+) -> None:
+    """
+    Replace a stale password hash with one at the current cost and scheme.
+
+    Meant to run as a background task after a successful login, with its
+    own session; failures are logged and the old hash stays valid.
+    """
+    try:
+        async with session_scope(session_factory) as db:
+            user_service = UserService(db)
+            user = await user_service.get(id=user_id)
+            if user is None or not password_needs_rehash(user.hashed_password):
+                return
+            await user_service.update(id=user_id, obj_in={"password": password})
+    except HashingPoolSaturated:
+        logger.info("Password rehash skipped, hashing pool busy", extra={"user_id": user_id})
+    except Exception:
+        logger.warning("Password rehash failed", extra={"user_id": user_id}, exc_info=True)
@@ -0,0 +1,74 @@
+"""
+In-process caching utilities.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """
+    Bounded least-recently-used cache with optional per-entry expiry.
+
+    Expiry times are absolute timestamps from ``clock`` (wall-clock seconds
+    by default, matching JWT ``exp`` claims). Expired entries are dropped
+    lazily when they are looked up or pushed out by newer entries.
+    """
+
+    def __init__(
+        self, maxsize: int, clock: Callable[[], float] = time.time
+    ):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[V, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: V, expires_at: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
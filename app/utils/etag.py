@@ -0,0 +1,74 @@
+"""
+Weak ETags for user resources.
+
+A user's ETag is derived from its ID and version stamp, the time of its
+last write (or of its creation), which the identity cache keeps. A
+conditional GET can therefore be answered with 304 from the cache alone,
+without loading or serializing the row. A page of users gets an ETag
+hashed from the IDs and versions of its rows and its next cursor.
+"""
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import Response, status
+
+# Clients may store the response but must revalidate it before reuse
+USER_CACHE_CONTROL = "private, no-cache"
+
+
+def version_stamp(user: Any) -> Optional[float]:
+    """Epoch time of the user's last write, falling back to its creation"""
+    written_at: Optional[datetime] = user.updated_at or user.created_at
+    return written_at.timestamp() if written_at is not None else None
+
+
+def user_etag(id: int, version: Optional[float]) -> Optional[str]:
+    """Weak ETag of one user, or None without a version stamp"""
+    if version is None:
+        return None
+    return f'W/"{id}-{round(version * 1_000_000):x}"'
+
+
+def collection_etag(users: Iterable[Any], *extra: Any) -> str:
+    """Weak ETag of a list of users and any values that also shape the response"""
+    digest = hashlib.blake2b(digest_size=16)
+    for user in users:
+        digest.update(f"{user.id}:{version_stamp(user)};".encode())
+    for value in extra:
+        digest.update(f"{value!r};".encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Whether an If-None-Match header matches ``etag`` by weak comparison"""
+    if not if_none_match or etag is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def validator_headers(etag: Optional[str]) -> Dict[str, str]:
+    """The ETag and caching headers of a user resource"""
+    headers = {"Cache-Control": USER_CACHE_CONTROL}
+    if etag is not None:
+        headers["ETag"] = etag
+    return headers
+
+
+def not_modified(etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Empty 304 response carrying the validators and any other headers"""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={**(headers or {}), **validator_headers(etag)},
+    )
+
+
+def set_validators(response: Response, etag: Optional[str]) -> None:
+    """Add the ETag and caching headers to a 200 response"""
+    response.headers.update(validator_headers(etag))
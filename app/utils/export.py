@@ -0,0 +1,54 @@
+"""
+Serializers for the streaming users export.
+
+Each function turns one batch of rows into a single bytes chunk, so the
+response is written once per database batch rather than once per row.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Sequence
+
+from sqlalchemy import Row
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _serialize_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def rows_to_ndjson(rows: Sequence[Row]) -> bytes:
+    """Encode rows as newline-delimited JSON objects"""
+    lines = [
+        json.dumps(
+            {key: _serialize_value(value) for key, value in row._mapping.items()},
+            separators=(",", ":"),
+        )
+        for row in rows
+    ]
+    return ("\n".join(lines) + "\n").encode() if lines else b""
+
+
+def csv_header(columns: Sequence[str]) -> bytes:
+    """Encode the CSV header line"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue().encode()
+
+
+def rows_to_csv(rows: Sequence[Row]) -> bytes:
+    """Encode rows as CSV lines"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(
+            "" if value is None else _serialize_value(value) for value in row
+        )
+    return buffer.getvalue().encode()
@@ -0,0 +1,28 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor carries the sort key of the last row of a page. It is encoded as
+URL-safe base64 JSON so clients treat it as an opaque token.
+"""
+import base64
+import binascii
+import json
+from typing import Any, Dict
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Encode the sort key of the last row of a page"""
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor produced by encode_cursor, raising ValueError if malformed"""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
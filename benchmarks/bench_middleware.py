@@ -0,0 +1,132 @@
+"""
+Micro-benchmark of the per-request overhead of TimingMiddleware.
+
+Compares the previous BaseHTTPMiddleware implementation with the pure ASGI
+one by calling a trivial Starlette app directly through the ASGI interface,
+so neither a server nor an HTTP client is part of the measurement.
+
+    python -m benchmarks.bench_middleware --requests 20000
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Callable, Dict
+from uuid import uuid4
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.types import ASGIApp
+
+from app.core.middleware import TimingMiddleware, request_id_contextvar
+
+logger = logging.getLogger("benchmarks.middleware")
+
+
+class LegacyTimingMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation TimingMiddleware replaced"""
+
+    async def dispatch(self, request: Request, call_next):
+        request_id = str(uuid4())
+        request_id_contextvar.set(request_id)
+        request.state.request_id = request_id
+        start_time = time.time()
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        response.headers["X-Process-Time"] = str(process_time)
+        response.headers["X-Request-ID"] = request_id
+        logger.info(
+            "Request processed",
+            extra={
+                "request_id": request_id,
+                "method": request.method,
+                "path": request.url.path,
+                "processing_time": process_time,
+                "status_code": response.status_code
+            }
+        )
+        return response
+
+
+async def _homepage(request: Request) -> PlainTextResponse:
+    return PlainTextResponse("ok")
+
+
+def _build_app(middleware_class: Callable[..., ASGIApp] = None) -> ASGIApp:
+    middleware = [Middleware(middleware_class)] if middleware_class else []
+    return Starlette(routes=[Route("/", _homepage)], middleware=middleware)
+
+
+async def _drive(app: ASGIApp, requests: int) -> float:
+    """Send requests through the ASGI app and return seconds per request"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/",
+        "raw_path": b"/",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+    async def send(message: Dict) -> None:
+        pass
+
+    async def request() -> None:
+        body_sent = False
+
+        async def receive() -> Dict:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Like a client that stays connected until the response is done
+            await asyncio.Event().wait()
+
+        await app(dict(scope), receive, send)
+
+    for _ in range(min(requests // 10, 1000)):
+        await request()
+
+    start = time.perf_counter_ns()
+    for _ in range(requests):
+        await request()
+    return (time.perf_counter_ns() - start) / 1e9 / requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Measure the middleware, not the log handlers
+    logging.disable(logging.INFO)
+
+    results = {}
+    for name, middleware_class in [
+        ("no middleware", None),
+        ("BaseHTTPMiddleware", LegacyTimingMiddleware),
+        ("pure ASGI", TimingMiddleware),
+    ]:
+        results[name] = asyncio.run(_drive(_build_app(middleware_class), args.requests))
+
+    baseline = results["no middleware"]
+    for name, per_request in results.items():
+        overhead = per_request - baseline
+        print(
+            f"{name:<20} {per_request * 1e6:8.1f} us/request"
+            f"   overhead {overhead * 1e6:7.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
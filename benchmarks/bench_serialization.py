@@ -0,0 +1,87 @@
+"""
+Benchmark of serializing a page of users, as returned by GET /users.
+
+Builds one FastAPI app per serialization path, each returning the same
+page of User rows, and drives them through the ASGI interface:
+
+- response_model with FastAPI's JSONResponse (the previous behaviour)
+- response_model with FastJSONResponse (orjson)
+- model_list_response, the cached TypeAdapter path GET /users uses now
+
+    python -m benchmarks.bench_serialization --requests 5000 --page-size 100
+"""
+import argparse
+import asyncio
+import logging
+from typing import Any, List, Type
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from app.core.responses import FastJSONResponse, model_list_response
+from app.models.user import User
+from app.schemas.user import User as UserSchema
+from benchmarks.bench_middleware import _drive
+
+
+def _users(count: int) -> List[User]:
+    return [
+        User(
+            id=i,
+            email=f"user{i}@example.com",
+            full_name=f"User {i}",
+            hashed_password="x" * 60,
+            is_active=True,
+            is_superuser=False,
+        )
+        for i in range(count)
+    ]
+
+
+def _response_model_app(users: List[User], response_class: Type[JSONResponse]) -> FastAPI:
+    app = FastAPI(default_response_class=response_class)
+
+    @app.get("/", response_model=List[UserSchema])
+    async def read_users() -> Any:
+        return users
+
+    return app
+
+
+def _type_adapter_app(users: List[User]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/", response_model=List[UserSchema])
+    async def read_users() -> Any:
+        return model_list_response(UserSchema, users)
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    users = _users(args.page_size)
+
+    results = {}
+    for name, app in [
+        ("JSONResponse", _response_model_app(users, JSONResponse)),
+        ("FastJSONResponse", _response_model_app(users, FastJSONResponse)),
+        ("TypeAdapter", _type_adapter_app(users)),
+    ]:
+        results[name] = asyncio.run(_drive(app, args.requests))
+
+    baseline = results["JSONResponse"]
+    for name, per_request in results.items():
+        print(
+            f"{name:<18} {per_request * 1e6:8.1f} us/request"
+            f"   {1 / per_request:8.0f} req/s   x{baseline / per_request:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+HTTP load benchmark of the API with baseline regression gating.
+
+Drives the real application in process through httpx's ASGI transport,
+with a number of concurrent clients per scenario, against a temporary
+SQLite database, so it runs offline and needs neither a server nor
+PostgreSQL. Each scenario reports throughput and p50/p95/p99 latency.
+
+Results are written as JSON and compared with benchmarks/baseline.json;
+the command exits with status 1 when a scenario's throughput drops, or
+its p95 latency grows, by more than the tolerance.
+
+    python -m benchmarks.load --requests 500 --concurrency 10
+    python -m benchmarks.load --update-baseline
+
+Baselines depend on the machine: refresh the committed one from the
+machine that runs the comparison. bcrypt runs at cost 4 (BCRYPT_ROUNDS)
+so that login measures the request path rather than the hash cost.
+"""
+import os
+import tempfile
+
+_DB_DIR = tempfile.mkdtemp(prefix="bench-")
+os.environ.setdefault("POSTGRES_SERVER", "localhost")
+os.environ.setdefault("POSTGRES_USER", "bench")
+os.environ.setdefault("POSTGRES_PASSWORD", "bench")
+os.environ.setdefault("POSTGRES_DB", "bench")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import platform
+import shutil
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.api.deps import get_session_factory
+from app.core.config import settings
+from app.core.security import configure_bcrypt_rounds, get_password_hash
+from app.db.base_class import Base
+from app.main import app
+from app.models.user import User
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+PASSWORD = "Bench123!"
+
+Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+@dataclass
+class ScenarioResult:
+    requests: int
+    concurrency: int
+    errors: int
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def _setup_database(users: int) -> str:
+    """Create and seed the benchmark database, return its async URL"""
+    path = os.path.join(_DB_DIR, "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    # Seed at the cost the app will use, so login never rehashes
+    configure_bcrypt_rounds(settings.BCRYPT_ROUNDS)
+    hashed = get_password_hash(PASSWORD)
+    with engine.begin() as connection:
+        connection.execute(
+            User.__table__.insert(),
+            [
+                {
+                    "email": f"user{i}@bench.example.com",
+                    "full_name": f"User {i}",
+                    "hashed_password": hashed,
+                    "is_active": True,
+                    "is_superuser": i == 0,
+                }
+                for i in range(users)
+            ],
+        )
+    engine.dispose()
+    return f"sqlite+aiosqlite:///{path}"
+
+
+async def _token(client: httpx.AsyncClient, email: str) -> Dict[str, str]:
+    response = await client.post(
+        "/api/v1/auth/login", data={"username": email, "password": PASSWORD}
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _scenarios(admin: Dict[str, str], users: int) -> Dict[str, Request]:
+    emails = itertools.count()
+
+    def login(client: httpx.AsyncClient, i: int) -> Awaitable[httpx.Response]:
+        return client.post(
+            "/api/v1/auth/login",
+            data={"username": f"user{i % users}@bench.example.com", "password": PASSWORD},
+        )
+
+    def read_me(client: httpx.AsyncClient, i: int) -> Awaitable[httpx.Response]:
+        return client.get("/api/v1/users/me", headers=admin)
+
+    def read_user(client: httpx.AsyncClient, i: int) -> Awaitable[httpx.Response]:
+        return client.get(f"/api/v1/users/{i % users + 1}", headers=admin)
+
+    def read_users_batch(client: httpx.AsyncClient, i: int) -> Awaitable[httpx.Response]:
+        ids = ",".join(str((i + k) % users + 1) for k in range(20))
+        return client.get("/api/v1/users/batch", params={"ids": ids}, headers=admin)
+
+    def list_users(client: httpx.AsyncClient, i: int) -> Awaitable[httpx.Response]:
+        return client.get("/api/v1/users/", params={"limit": 100}, headers=admin)
+
+    def search_users(client: httpx.AsyncClient, i: int) -> Awaitable[httpx.Response]:
+        return client.get(
+            "/api/v1/users/search", params={"q": f"user{i % users}"}, headers=admin
+        )
+
+    def create_user(client: httpx.AsyncClient, i: int) -> Awaitable[httpx.Response]:
+        return client.post(
+            "/api/v1/users/",
+            json={"email": f"new{next(emails)}@bench.example.com", "password": PASSWORD},
+            headers=admin,
+        )
+
+    def update_user(client: httpx.AsyncClient, i: int) -> Awaitable[httpx.Response]:
+        return client.put(
+            f"/api/v1/users/{i % users + 1}",
+            json={"full_name": f"Updated {i}"},
+            headers=admin,
+        )
+
+    return {
+        "login": login,
+        "read_me": read_me,
+        "read_user": read_user,
+        "read_users_batch": read_users_batch,
+        "list_users": list_users,
+        "search_users": search_users,
+        "create_user": create_user,
+        "update_user": update_user,
+    }
+
+
+def _percentile(cuts: List[float], p: int) -> float:
+    return round(cuts[p - 1] * 1000, 3)
+
+
+async def _run_scenario(
+    client: httpx.AsyncClient, request: Request, requests: int, concurrency: int
+) -> ScenarioResult:
+    latencies: List[float] = []
+    errors = 0
+    counter = itertools.count()
+
+    async def worker() -> None:
+        nonlocal errors
+        while True:
+            i = next(counter)
+            if i >= requests:
+                return
+            start = time.perf_counter()
+            response = await request(client, i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return ScenarioResult(
+        requests=requests,
+        concurrency=concurrency,
+        errors=errors,
+        throughput=round(requests / elapsed, 2),
+        p50_ms=_percentile(cuts, 50),
+        p95_ms=_percentile(cuts, 95),
+        p99_ms=_percentile(cuts, 99),
+    )
+
+
+async def run(
+    requests: int, concurrency: int, users: int, only: Optional[List[str]] = None
+) -> Dict[str, ScenarioResult]:
+    """Run the scenarios against a fresh database and return their results"""
+    async_engine = create_async_engine(_setup_database(users), poolclass=NullPool)
+    session_factory = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench"
+            ) as client:
+                admin = await _token(client, "user0@bench.example.com")
+                for name, request in _scenarios(admin, users).items():
+                    if only and name not in only:
+                        continue
+                    # Warm up caches and code paths before measuring
+                    await _run_scenario(client, request, concurrency, concurrency)
+                    results[name] = await _run_scenario(
+                        client, request, requests, concurrency
+                    )
+    finally:
+        app.dependency_overrides.pop(get_session_factory, None)
+        await async_engine.dispose()
+        shutil.rmtree(_DB_DIR, ignore_errors=True)
+    return results
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """
+    Describe every scenario that regressed past ``tolerance`` (a fraction),
+    or that has no baseline to be checked against
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            regressions.append(f"{name}: no baseline, record one with --update-baseline")
+            continue
+        if result["errors"] > expected["errors"]:
+            regressions.append(f"{name}: {result['errors']} errors")
+        if result["throughput"] < expected["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {result['throughput']:.1f} req/s, "
+                f"baseline {expected['throughput']:.1f} req/s"
+            )
+        if result["p95_ms"] > expected["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']:.2f} ms, "
+                f"baseline {expected['p95_ms']:.2f} ms"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--scenario", action="append", dest="scenarios")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # Measure the request path, not the log handlers
+    logging.disable(logging.INFO)
+
+    results = asyncio.run(
+        run(args.requests, args.concurrency, args.users, args.scenarios)
+    )
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": {name: asdict(result) for name, result in results.items()},
+    }
+
+    for name, result in results.items():
+        print(
+            f"{name:<16} {result.throughput:9.1f} req/s"
+            f"   p50 {result.p50_ms:7.2f} ms   p95 {result.p95_ms:7.2f} ms"
+            f"   p99 {result.p99_ms:7.2f} ms   errors {result.errors}"
+        )
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, skipping comparison")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)["scenarios"]
+    regressions = compare(report["scenarios"], baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
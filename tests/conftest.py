@@ -1,15 +1,22 @@
 import os
+import uuid
 import pytest
-from typing import Dict, Generator
+from contextlib import contextmanager
+from typing import Callable, ContextManager, Dict, Generator
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.db.base_class import Base
-from app.api.deps import get_db
+from app.api.deps import get_session_factory
 from app.main import app
 from app.models.user import User
+from app.core.query_stats import QueryStats, capture_queries
+from app.core.rate_limit import reset_rate_limiters
 from app.core.security import get_password_hash
+from app.db.routing import RoutingSession
 
 
 # Use SQLite for testing
@@ -19,6 +26,23 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The app's session factories for either USE_ASYNC_DB mode, bound to the
+# test database. NullPool avoids reusing aiosqlite connections across the
+# event loops of different TestClients.
+TestingAppSessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine
+)
+SQLALCHEMY_ASYNC_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL, poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+def random_email(name: str) -> str:
+    """An address no other test uses; the client's modes share one database"""
+    return f"{name}-{uuid.uuid4().hex[:8]}@example.com"
+
 
 @pytest.fixture(scope="session")
 def db() -> Generator:
@@ -32,17 +56,51 @@ def db() -> Generator:
         Base.metadata.drop_all(bind=engine)
 
 
-@pytest.fixture(scope="module")
-def client(db) -> Generator:
-    def _get_test_db():
-        try:
-            yield db
-        finally:
-            pass
-
-    app.dependency_overrides[get_db] = _get_test_db
-    with TestClient(app) as c:
-        yield c
+@pytest.fixture(autouse=True)
+def reset_rate_limits() -> None:
+    """Every test starts with full buckets; the whole suite shares one client IP"""
+    reset_rate_limiters()
+
+
+@pytest.fixture
+def query_budget() -> Callable[[int], ContextManager[QueryStats]]:
+    """
+    Fail the test if the block runs more SQL statements than allowed:
+
+        with query_budget(2):
+            client.get("/api/v1/users/1", headers=headers)
+    """
+    @contextmanager
+    def check(max_queries: int) -> Generator[QueryStats, None, None]:
+        with capture_queries() as stats:
+            yield stats
+        shapes = "\n".join(f"{n} x {shape}" for shape, n in stats.shapes.items())
+        assert stats.count <= max_queries, (
+            f"{stats.count} SQL statements, budget {max_queries}:\n{shapes}"
+        )
+
+    return check
+
+
+SESSION_FACTORIES = {
+    "sync": TestingAppSessionLocal,
+    "async": TestingAsyncSessionLocal,
+}
+
+
+@pytest.fixture(scope="module", params=sorted(SESSION_FACTORIES))
+def client(request, db) -> Generator:
+    """
+    Client of the app in each database mode: sync sessions run on the
+    threadpool (the default), async sessions on the event loop
+    """
+    factory = SESSION_FACTORIES[request.param]
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    try:
+        with TestClient(app) as c:
+            yield c
+    finally:
+        app.dependency_overrides.pop(get_session_factory, None)
 
 
 @pytest.fixture(scope="module")
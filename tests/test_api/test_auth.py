@@ -1,6 +1,8 @@
 from fastapi.testclient import TestClient
 import pytest
 
+from tests.conftest import random_email
+
 def test_login(client: TestClient, normal_user_token_headers):
     """Test logging in with correct credentials"""
     login_data = {
@@ -27,7 +29,7 @@ def test_login_incorrect_password(client: TestClient):
 def test_register_new_user(client: TestClient):
     """Test registering a new user"""
     user_data = {
-        "email": "register@example.com",
+        "email": random_email("register"),
         "password": "Register123!",
         "full_name": "Register User"
     }
@@ -46,4 +48,149 @@ def test_register_existing_user(client: TestClient, normal_user_token_headers):
         "full_name": "Duplicate User"
     }
     response = client.post("/api/v1/auth/register", json=user_data)
-    assert response.status_code == 400
\ No newline at end of file
+    assert response.status_code == 400
+
+def test_login_rehashes_stale_password(client: TestClient, db):
+    """Test that a successful login upgrades a hash below the configured cost"""
+    from passlib.hash import bcrypt
+
+    from app.core.hashing import hasher
+    from app.models.user import User
+
+    email = random_email("stale")
+    user = User(
+        email=email,
+        hashed_password=bcrypt.using(rounds=4).hash("Stale123!"),
+        full_name="Stale Hash",
+        is_active=True,
+    )
+    db.add(user)
+    db.commit()
+
+    previous = hasher.rounds
+    hasher.configure(5)
+    try:
+        response = client.post(
+            "/api/v1/auth/login",
+            data={"username": email, "password": "Stale123!"},
+        )
+        assert response.status_code == 200
+    finally:
+        hasher.configure(previous or 12)
+
+    db.refresh(user)
+    assert user.hashed_password.startswith("$2b$05$")
+    assert bcrypt.verify("Stale123!", user.hashed_password)
+
+
+def _login(client: TestClient, email: str, password: str) -> dict:
+    response = client.post(
+        "/api/v1/auth/login", data={"username": email, "password": password}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def _auth(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def test_refresh_rotates_tokens(client: TestClient, normal_user_token_headers):
+    """Test that a refresh token is exchanged once for a new pair"""
+    tokens = _login(client, "user@example.com", "User123!")
+    assert tokens["refresh_token"]
+    assert tokens["expires_in"] == 15 * 60
+
+    response = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200
+    refreshed = response.json()
+    assert refreshed["refresh_token"] != tokens["refresh_token"]
+    assert client.get("/api/v1/users/me", headers=_auth(refreshed)).status_code == 200
+
+
+def test_refresh_token_reuse_revokes_session(client: TestClient, normal_user_token_headers):
+    """Test that replaying a spent refresh token ends the whole session"""
+    tokens = _login(client, "user@example.com", "User123!")
+    refreshed = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    ).json()
+
+    response = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+    assert client.get("/api/v1/users/me", headers=_auth(refreshed)).status_code == 403
+    response = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": refreshed["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+
+def test_tokens_are_not_interchangeable(client: TestClient, normal_user_token_headers):
+    """Test that refresh tokens are rejected as bearer tokens and vice versa"""
+    tokens = _login(client, "user@example.com", "User123!")
+    headers = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 403
+    response = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": tokens["access_token"]}
+    )
+    assert response.status_code == 401
+
+
+def test_logout_revokes_session(client: TestClient, normal_user_token_headers, query_budget):
+    """Test that logout revokes the access and refresh token without later queries"""
+    tokens = _login(client, "user@example.com", "User123!")
+    assert client.post("/api/v1/auth/logout", headers=_auth(tokens)).status_code == 204
+
+    with query_budget(0):
+        response = client.get("/api/v1/users/me", headers=_auth(tokens))
+    assert response.status_code == 403
+    response = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+    # Other sessions of the user are unaffected
+    assert client.get("/api/v1/users/me", headers=normal_user_token_headers).status_code == 200
+
+
+def test_sign_out_user(client: TestClient, superuser_token_headers):
+    """Test that a forced sign-out revokes the tokens issued so far, not later ones"""
+    client.post(
+        "/api/v1/auth/register",
+        json={"email": "signout@example.com", "password": "SignOut123!", "full_name": "Sign Out"},
+    )
+    tokens = _login(client, "signout@example.com", "SignOut123!")
+    user_id = client.get("/api/v1/users/me", headers=_auth(tokens)).json()["id"]
+
+    response = client.post(
+        f"/api/v1/users/{user_id}/sign-out", headers=superuser_token_headers
+    )
+    assert response.status_code == 204
+    assert client.get("/api/v1/users/me", headers=_auth(tokens)).status_code == 403
+    response = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+    tokens = _login(client, "signout@example.com", "SignOut123!")
+    assert client.get("/api/v1/users/me", headers=_auth(tokens)).status_code == 200
+
+
+def test_revocations_sync_across_processes(client: TestClient, normal_user_token_headers):
+    """Test that a process picks up revocations from the table"""
+    import asyncio
+
+    from app.core.security import revocation_list
+    from app.services.token_service import sync_revocations
+    from tests.conftest import TestingAsyncSessionLocal
+
+    tokens = _login(client, "user@example.com", "User123!")
+    assert client.post("/api/v1/auth/logout", headers=_auth(tokens)).status_code == 204
+
+    # Forget the local revocation, as another process would never have seen it
+    revocation_list.clear()
+    assert client.get("/api/v1/users/me", headers=_auth(tokens)).status_code == 200
+    asyncio.run(sync_revocations(TestingAsyncSessionLocal))
+    assert client.get("/api/v1/users/me", headers=_auth(tokens)).status_code == 403
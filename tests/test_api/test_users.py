@@ -1,8 +1,13 @@
+import csv
+import io
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from app.models.user import User
+from tests.conftest import random_email
 
 
 def test_get_users(client: TestClient, superuser_token_headers: dict):
@@ -21,7 +26,7 @@ def test_get_users_not_allowed(client: TestClient, normal_user_token_headers: di
 def test_create_user(client: TestClient, superuser_token_headers: dict):
     """Test creating a new user as superuser"""
     data = {
-        "email": "newuser@example.com",
+        "email": random_email("newuser"),
         "password": "NewUser123!",
         "full_name": "New User",
         "is_active": True,
@@ -118,4 +123,332 @@ def test_delete_user(
         f"/api/v1/users/{user_id}", 
         headers=superuser_token_headers
     )
-    assert get_response.status_code == 404
\ No newline at end of file
+    assert get_response.status_code == 404
+
+def test_get_users_cursor_pagination(client: TestClient, superuser_token_headers: dict):
+    """Test walking the users list with keyset cursors"""
+    response = client.get("/api/v1/users/?limit=1000", headers=superuser_token_headers)
+    all_ids = [user["id"] for user in response.json()]
+    assert "X-Next-Cursor" not in response.headers
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 1}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(
+            "/api/v1/users/", params=params, headers=superuser_token_headers
+        )
+        assert response.status_code == 200
+        seen.extend(user["id"] for user in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == sorted(all_ids)
+
+
+def test_get_users_invalid_cursor(client: TestClient, superuser_token_headers: dict):
+    """Test that a malformed cursor is rejected"""
+    response = client.get(
+        "/api/v1/users/?cursor=not-a-cursor", headers=superuser_token_headers
+    )
+    assert response.status_code == 400
+
+
+def test_export_users_ndjson(client: TestClient, superuser_token_headers: dict):
+    """Test streaming the users table as NDJSON"""
+    response = client.get("/api/v1/users/export", headers=superuser_token_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert any(row["email"] == "admin@example.com" for row in rows)
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+
+
+def test_export_users_csv_filtered(client: TestClient, superuser_token_headers: dict):
+    """Test streaming the users table as CSV with a filter"""
+    response = client.get(
+        "/api/v1/users/export",
+        params={"format": "csv", "is_active": False},
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0][:2] == ["id", "email"]
+    assert all(row[3] == "False" for row in rows[1:])
+
+
+def test_export_users_not_allowed(client: TestClient, normal_user_token_headers: dict):
+    """Test that normal users can't export users"""
+    response = client.get("/api/v1/users/export", headers=normal_user_token_headers)
+    assert response.status_code == 403
+
+
+def test_create_users_bulk(client: TestClient, superuser_token_headers: dict):
+    """Test creating users in bulk with per-item results"""
+    first, second = random_email("bulk1"), random_email("bulk2")
+    users = [
+        {"email": first, "password": "Bulk1234!", "full_name": "Bulk One"},
+        {"email": second, "password": "Bulk1234!", "full_name": "Bulk Two"},
+        {"email": first, "password": "Bulk1234!", "full_name": "Repeat"},
+        {"email": "admin@example.com", "password": "Bulk1234!", "full_name": "Taken"},
+    ]
+    response = client.post(
+        "/api/v1/users/bulk", json=users, headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["status"] for result in results] == [
+        "created", "created", "error", "error"
+    ]
+    assert results[0]["user"]["email"] == first
+    assert results[1]["user"]["id"] > results[0]["user"]["id"]
+    assert "password" not in results[0]["user"]
+    assert "hashed_password" not in results[0]["user"]
+
+    # The created users can log in
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": second, "password": "Bulk1234!"},
+    )
+    assert response.status_code == 200
+
+
+def test_query_budgets(client: TestClient, superuser_token_headers: dict, query_budget):
+    """Test the number of SQL statements issued by the read endpoints"""
+    budgets = {
+        "/api/v1/users/me": 1,
+        "/api/v1/users/1": 2,
+        "/api/v1/users/?limit=10": 2,
+    }
+    for path, max_queries in budgets.items():
+        with query_budget(max_queries):
+            response = client.get(path, headers=superuser_token_headers)
+        assert response.status_code == 200
+
+
+def test_write_endpoints_use_one_statement(
+    client: TestClient, superuser_token_headers: dict, query_budget
+):
+    """Test that create, update and delete each run a single statement"""
+    client.get("/api/v1/users/me", headers=superuser_token_headers)
+    data = {"email": random_email("one-statement"), "password": "Single123!"}
+    with query_budget(1):
+        response = client.post("/api/v1/users/", json=data, headers=superuser_token_headers)
+    assert response.status_code == 201
+    user_id = response.json()["id"]
+
+    with query_budget(1):
+        response = client.put(
+            f"/api/v1/users/{user_id}",
+            json={"full_name": "Single"},
+            headers=superuser_token_headers,
+        )
+    assert response.json()["full_name"] == "Single"
+
+    with query_budget(1):
+        response = client.delete(f"/api/v1/users/{user_id}", headers=superuser_token_headers)
+    assert response.status_code == 204
+
+    response = client.delete(f"/api/v1/users/{user_id}", headers=superuser_token_headers)
+    assert response.status_code == 404
+    response = client.put(
+        f"/api/v1/users/{user_id}", json={"full_name": "Gone"}, headers=superuser_token_headers
+    )
+    assert response.status_code == 404
+
+
+def test_duplicate_email_from_constraint(client: TestClient, superuser_token_headers: dict):
+    """Test that duplicate emails are rejected on create and update"""
+    data = {"email": random_email("taken"), "password": "Taken123!"}
+    response = client.post("/api/v1/users/", json=data, headers=superuser_token_headers)
+    assert response.status_code == 201
+    response = client.post("/api/v1/users/", json=data, headers=superuser_token_headers)
+    assert response.status_code == 400
+
+    other = client.post(
+        "/api/v1/users/",
+        json={"email": random_email("other"), "password": "Other123!"},
+        headers=superuser_token_headers,
+    ).json()
+    response = client.put(
+        f"/api/v1/users/{other['id']}",
+        json={"email": data["email"]},
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 400
+
+
+def test_conditional_get_user(client: TestClient, superuser_token_headers: dict):
+    """Test ETags and 304 responses on single users"""
+    response = client.get("/api/v1/users/me", headers=superuser_token_headers)
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    response = client.get(
+        "/api/v1/users/me", headers={**superuser_token_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    user_id = client.post(
+        "/api/v1/users/",
+        json={"email": random_email("etag"), "password": "Etag1234!"},
+        headers=superuser_token_headers,
+    ).json()["id"]
+    response = client.get(f"/api/v1/users/{user_id}", headers=superuser_token_headers)
+    etag = response.headers["ETag"]
+    response = client.get(
+        f"/api/v1/users/{user_id}",
+        headers={**superuser_token_headers, "If-None-Match": f'"other", {etag}'},
+    )
+    assert response.status_code == 304
+
+    client.put(
+        f"/api/v1/users/{user_id}",
+        json={"full_name": "Changed"},
+        headers=superuser_token_headers,
+    )
+    response = client.get(
+        f"/api/v1/users/{user_id}",
+        headers={**superuser_token_headers, "If-None-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["full_name"] == "Changed"
+
+
+def test_conditional_get_users(client: TestClient, superuser_token_headers: dict):
+    """Test the collection ETag of the users list"""
+    response = client.get("/api/v1/users/?limit=2", headers=superuser_token_headers)
+    etag = response.headers["ETag"]
+    next_cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(
+        "/api/v1/users/?limit=2", headers={**superuser_token_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["X-Next-Cursor"] == next_cursor
+
+    response = client.get(
+        "/api/v1/users/?limit=3", headers={**superuser_token_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+
+
+def test_search_users(client: TestClient, superuser_token_headers: dict):
+    """Test ranked search on email and full name with cursor continuation"""
+    for email, full_name in (
+        ("searchable@example.com", "Ada Lovelace"),
+        ("lovelace.fan@example.com", None),
+        ("ada@example.com", "Countess of Lovelace"),
+    ):
+        client.post(
+            "/api/v1/users/",
+            json={"email": email, "password": "Search123!", "full_name": full_name},
+            headers=superuser_token_headers,
+        )
+
+    response = client.get(
+        "/api/v1/users/search", params={"q": "LOVELACE"}, headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    assert [user["email"] for user in response.json()] == [
+        "lovelace.fan@example.com",
+        "searchable@example.com",
+        "ada@example.com",
+    ]
+
+    response = client.get(
+        "/api/v1/users/search", params={"q": "ada@example.com"}, headers=superuser_token_headers
+    )
+    assert response.json()[0]["email"] == "ada@example.com"
+
+    seen = []
+    params = {"q": "love", "limit": 1}
+    while True:
+        response = client.get(
+            "/api/v1/users/search", params=params, headers=superuser_token_headers
+        )
+        seen.extend(user["email"] for user in response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert len(seen) == len(set(seen)) == 3
+
+
+def test_search_users_validation(
+    client: TestClient, superuser_token_headers: dict, normal_user_token_headers: dict
+):
+    """Test search parameter validation and permissions"""
+    response = client.get(
+        "/api/v1/users/search", params={"q": "a"}, headers=superuser_token_headers
+    )
+    assert response.status_code == 422
+    response = client.get(
+        "/api/v1/users/search",
+        params={"q": "ada", "cursor": "bad"},
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 400
+    response = client.get(
+        "/api/v1/users/search", params={"q": "ada"}, headers=normal_user_token_headers
+    )
+    assert response.status_code == 403
+
+
+def test_read_users_batch(client: TestClient, superuser_token_headers: dict, query_budget):
+    """Test that a batch lookup returns users in request order with one query"""
+    from app.core.user_cache import user_cache
+
+    users = [
+        {"email": random_email(f"batch{i}"), "password": "Batch123!", "full_name": f"Batch {i}"}
+        for i in range(3)
+    ]
+    response = client.post("/api/v1/users/bulk", json=users, headers=superuser_token_headers)
+    ids = [result["user"]["id"] for result in response.json()]
+    client.get("/api/v1/users/me", headers=superuser_token_headers)
+    user_cache.clear()
+
+    query = f"ids={ids[2]},{ids[0]},999999,{ids[2]}&ids={ids[1]}"
+    with query_budget(2):
+        response = client.get(f"/api/v1/users/batch?{query}", headers=superuser_token_headers)
+    assert response.status_code == 200
+    assert [user["id"] for user in response.json()] == [ids[2], ids[0], ids[1]]
+
+    # Now cached, and the same through the POST form
+    with query_budget(0):
+        response = client.post(
+            "/api/v1/users/batch", json={"ids": ids}, headers=superuser_token_headers
+        )
+    assert [user["email"] for user in response.json()] == [u["email"] for u in users]
+
+
+def test_read_users_batch_permissions(
+    client: TestClient, superuser_token_headers: dict, normal_user_token_headers: dict
+):
+    """Test that normal users only get their own record from a batch"""
+    me = client.get("/api/v1/users/me", headers=normal_user_token_headers).json()
+    admin = client.get("/api/v1/users/me", headers=superuser_token_headers).json()
+    response = client.post(
+        "/api/v1/users/batch",
+        json={"ids": [admin["id"], me["id"]]},
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 200
+    assert [user["id"] for user in response.json()] == [me["id"]]
+
+    response = client.get(
+        "/api/v1/users/batch?ids=1,x", headers=normal_user_token_headers
+    )
+    assert response.status_code == 422
+    response = client.post(
+        "/api/v1/users/batch",
+        json={"ids": list(range(501))},
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 413
@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app.core.config import settings
+from app.core.metrics import (
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_CONNECTION_AGE,
+    DB_POOL_TIMEOUTS,
+)
+from app.db import pool
+from app.db.pool import InstrumentedQueuePool, pool_options
+
+
+def _samples(metric, label):
+    return dict((tuple(labels), value) for labels, value in metric.snapshot()["samples"]).get((label,))
+
+
+def _engine(label, **kwargs):
+    return create_engine(
+        "sqlite:///./test.db",
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=label,
+        **kwargs,
+    )
+
+
+def test_pool_options_follow_settings():
+    """Test that the engine pool is configured from Settings"""
+    options = pool_options("sync")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == settings.DB_POOL_SIZE
+    assert options["max_overflow"] == settings.DB_MAX_OVERFLOW
+    assert options["pool_recycle"] == settings.DB_POOL_RECYCLE
+
+
+def test_checkout_metrics():
+    """Test that checkouts record wait time and connection age"""
+    engine = _engine("test-metrics", pool_size=1, max_overflow=0)
+    for _ in range(2):
+        with engine.connect():
+            pass
+    engine.dispose()
+
+    wait = _samples(DB_POOL_CHECKOUT_WAIT, "test-metrics")
+    age = _samples(DB_POOL_CONNECTION_AGE, "test-metrics")
+    # Histogram state is the bucket counts followed by the sum
+    assert sum(wait[:-1]) == 2
+    assert sum(age[:-1]) == 2
+
+
+def test_checkout_timeout_is_counted():
+    """Test that exhausting the pool counts a timeout"""
+    engine = _engine("test-timeout", pool_size=1, max_overflow=0, pool_timeout=0.01)
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    engine.dispose()
+    assert _samples(DB_POOL_TIMEOUTS, "test-timeout") == 1
+
+
+def test_slow_checkout_warning(monkeypatch):
+    """Test that checkouts above the threshold are logged"""
+    warnings = []
+    monkeypatch.setattr(settings, "DB_POOL_SLOW_CHECKOUT_SECONDS", 1e-9)
+    monkeypatch.setattr(pool.logger, "warning", lambda msg, **kwargs: warnings.append(msg))
+    engine = _engine("test-slow")
+    with engine.connect():
+        pass
+    engine.dispose()
+    assert warnings == ["Slow database connection checkout"]
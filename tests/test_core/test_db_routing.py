@@ -0,0 +1,141 @@
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import user as crud_user
+from app.crud import user_async as crud_user_async
+from app.db.base_class import Base
+from app.db.routing import ReplicaSet, RoutingSession
+from app.models.user import User
+
+
+def _database(path, full_name):
+    """A SQLite file holding one user whose name tells the databases apart"""
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(
+            User.__table__.insert(),
+            {"email": "user@example.com", "full_name": full_name, "hashed_password": "x"},
+        )
+    return engine, url
+
+
+@pytest.fixture
+def databases(tmp_path):
+    primary, primary_url = _database(tmp_path / "primary.db", "primary")
+    replica, replica_url = _database(tmp_path / "replica.db", "replica")
+    yield primary, replica, primary_url, replica_url
+    primary.dispose()
+    replica.dispose()
+
+
+@pytest.fixture
+def session_factory(databases):
+    primary, replica, _, _ = databases
+    return sessionmaker(
+        bind=primary, class_=RoutingSession, replicas=ReplicaSet([replica])
+    )
+
+
+def test_reads_go_to_replica(session_factory):
+    """Test that read-only CRUD calls are served by the replica"""
+    with session_factory() as db:
+        assert crud_user.get_user_by_id(db, 1).full_name == "replica"
+        assert [u.full_name for u in crud_user.get_users(db)] == ["replica"]
+        assert db.uses_primary is False
+
+
+def test_reads_after_write_stay_on_primary(session_factory):
+    """Test that a session reads its own writes from the primary"""
+    with session_factory() as db:
+        db.add(User(email="new@example.com", hashed_password="x"))
+        db.flush()
+        assert db.uses_primary is True
+        assert crud_user.get_user_by_email(db, "new@example.com") is not None
+        assert crud_user.get_user_by_id(db, 1).full_name == "primary"
+
+
+def test_locking_reads_and_dml_go_to_primary(session_factory):
+    """Test that SELECT ... FOR UPDATE and Core DML are routed to the primary"""
+    with session_factory() as db:
+        locked = db.execute(select(User).with_for_update()).scalar_one()
+        assert locked.full_name == "primary"
+
+    with session_factory() as db:
+        db.execute(update(User).values(full_name="updated"))
+        db.commit()
+        assert crud_user.get_user_by_id(db, 1).full_name == "updated"
+
+
+@pytest.mark.asyncio
+async def test_identity_lookups_read_from_primary(session_factory):
+    """Test that identities to be cached are not read from a lagging replica"""
+    from app.services.user_service import UserService
+
+    with session_factory() as db:
+        assert crud_user.get_users_by_ids(db, [1], primary=True)[0].full_name == "primary"
+        db.expire_all()
+        # The loader behind get_identity, without the process-wide cache
+        user = await UserService(db).get(id=1)
+        assert user.full_name == "primary"
+        # Other reads of the session still go to the replica
+        assert db.uses_primary is False
+        db.expire_all()
+        assert crud_user.get_user_by_email(db, "user@example.com").full_name == "replica"
+
+
+def test_no_replicas_uses_primary(databases):
+    """Test that the routing session behaves like a plain one without replicas"""
+    primary, _, _, _ = databases
+    with sessionmaker(bind=primary, class_=RoutingSession)() as db:
+        assert crud_user.get_user_by_id(db, 1).full_name == "primary"
+
+
+def test_round_robin_and_least_busy(databases):
+    """Test the replica selection strategies"""
+    primary, replica, _, _ = databases
+    round_robin = ReplicaSet([primary, replica])
+    assert [round_robin.choose() for _ in range(3)] == [primary, replica, primary]
+
+    least_busy = ReplicaSet([primary, replica], strategy="least_busy")
+    with primary.connect():
+        assert least_busy.choose() is replica
+
+
+def test_session_sticks_to_one_replica(databases):
+    """Test that all reads of a session use the same replica"""
+    primary, replica, _, _ = databases
+    factory = sessionmaker(
+        bind=primary, class_=RoutingSession, replicas=ReplicaSet([replica, primary])
+    )
+    with factory() as db:
+        names = {crud_user.get_user_by_id(db, 1).full_name for _ in range(3)}
+        db.expire_all()
+        names.add(crud_user.get_user_by_id(db, 1).full_name)
+    assert names == {"replica"}
+
+
+@pytest.mark.asyncio
+async def test_async_session_routing(databases):
+    """Test that the async session routes through RoutingSession as well"""
+    _, _, primary_url, replica_url = databases
+    primary = create_async_engine(primary_url.replace("sqlite", "sqlite+aiosqlite"))
+    replica = create_async_engine(replica_url.replace("sqlite", "sqlite+aiosqlite"))
+    try:
+        async with AsyncSession(
+            bind=primary,
+            sync_session_class=RoutingSession,
+            replicas=ReplicaSet([replica.sync_engine]),
+        ) as db:
+            user = await crud_user_async.get_user_by_email(db, "user@example.com")
+            assert user.full_name == "replica"
+            db.add(User(email="new@example.com", hashed_password="x"))
+            await db.flush()
+            user = await crud_user_async.get_user_by_email(db, "new@example.com")
+            assert user is not None
+    finally:
+        await primary.dispose()
+        await replica.dispose()
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_session_factory
+from app.core import events
+from app.core.middleware import InFlightRequests
+from app.main import app
+from tests.conftest import TestingAppSessionLocal
+
+
+@pytest.fixture
+def test_database(db):
+    """Point the lifespan at the test database"""
+    app.dependency_overrides[get_session_factory] = lambda: TestingAppSessionLocal
+    yield
+    app.dependency_overrides.pop(get_session_factory, None)
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_in_flight_requests():
+    """Test that draining returns once the last request finishes"""
+    tracker = InFlightRequests()
+    tracker.started()
+    asyncio.get_running_loop().call_later(0.01, tracker.finished)
+    assert await tracker.drain(timeout=1)
+    assert tracker.count == 0
+
+
+@pytest.mark.asyncio
+async def test_drain_times_out():
+    """Test that draining gives up after the timeout"""
+    tracker = InFlightRequests()
+    tracker.started()
+    assert not await tracker.drain(timeout=0.01)
+
+
+def test_lifespan_phases_are_timed(test_database, monkeypatch):
+    """Test that startup and shutdown run and log every phase"""
+    phases = []
+
+    def record(msg, extra=None, **kwargs):
+        if msg == "Lifespan phase completed":
+            phases.append(extra["phase"])
+
+    monkeypatch.setattr(events.logger, "info", record)
+    with TestClient(app) as client:
+        assert client.get("/health").status_code == 200
+
+    assert phases == [
+        "db_connections",
+        "bcrypt_calibration",
+        "password_hasher",
+        "openapi_schema",
+        "jwt_keys",
+        "token_revocations",
+        "drain_requests",
+        "password_hasher",
+        "db_engines",
+    ]
+    assert app.openapi_schema is not None
+
+
+def test_critical_startup_failure_is_raised(test_database, monkeypatch):
+    """Test that the app does not start when a critical phase fails"""
+    failed = []
+
+    async def broken_warm_up():
+        raise RuntimeError("no hashing workers")
+
+    monkeypatch.setattr(events.hasher, "warm_up", broken_warm_up)
+    monkeypatch.setattr(
+        events.logger, "exception", lambda msg, extra=None, **kw: failed.append(extra["phase"])
+    )
+    with pytest.raises(RuntimeError, match="no hashing workers"):
+        with TestClient(app):
+            pass
+    assert failed == ["password_hasher"]
+
+
+def test_optional_startup_failure_is_logged(test_database, monkeypatch):
+    """Test that the app still starts when an optional phase fails"""
+    failed = []
+
+    async def broken_sync(session_factory, since=None):
+        raise OSError("database unreachable")
+
+    monkeypatch.setattr(events, "sync_revocations", broken_sync)
+    monkeypatch.setattr(
+        events.logger, "exception", lambda msg, extra=None, **kw: failed.append(extra["phase"])
+    )
+    with TestClient(app) as client:
+        assert client.get("/health").status_code == 200
+    assert failed == ["token_revocations"]
+
+
+@pytest.mark.asyncio
+async def test_background_tasks_are_awaited_on_shutdown():
+    """Test that shutdown waits for the cancelled background tasks"""
+    task = asyncio.create_task(asyncio.sleep(60))
+    await events._cancel(task)
+    assert task.done() and task.cancelled()
+    await events._cancel(None)
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.hashing import HashingPoolSaturated, PasswordHasher, hasher
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_in_process_pool():
+    """Test hashing and verifying through the worker processes"""
+    pool_hasher = PasswordHasher(max_workers=1, max_pending=4)
+    try:
+        hashed = await pool_hasher.hash("Secret123!")
+        assert await pool_hasher.verify("Secret123!", hashed)
+        assert not await pool_hasher.verify("Wrong123!", hashed)
+    finally:
+        await pool_hasher.shutdown()
+
+    assert pool_hasher.stats.calls == 3
+    assert pool_hasher.stats.hash_seconds_total > 0
+    assert pool_hasher.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_configure_retires_the_pool_without_waiting():
+    """Test that a new cost starts new workers while the old ones wind down"""
+    pool_hasher = PasswordHasher(max_workers=1, max_pending=4)
+    try:
+        await pool_hasher.hash("Secret123!")
+        old_pool = pool_hasher._pool
+        pool_hasher.configure(5)
+        assert pool_hasher._pool is None
+        assert (await pool_hasher.hash("Secret123!")).startswith("$2b$05$")
+        assert pool_hasher._pool is not old_pool
+    finally:
+        await pool_hasher.shutdown()
+        hasher.configure(hasher.rounds or 12)
+    assert pool_hasher._pool is None
+
+
+@pytest.mark.asyncio
+async def test_hasher_rejects_when_saturated():
+    """Test that calls beyond max_pending are rejected"""
+    thread_hasher = PasswordHasher(max_workers=0, max_pending=1)
+    results = await asyncio.gather(
+        thread_hasher.hash("Secret123!"),
+        thread_hasher.hash("Secret123!"),
+        return_exceptions=True,
+    )
+    assert isinstance(results[0], str)
+    assert isinstance(results[1], HashingPoolSaturated)
+    assert thread_hasher.stats.rejected == 1
+
+
+def test_login_returns_503_when_saturated(
+    client: TestClient, normal_user_token_headers, monkeypatch
+):
+    """Test that a saturated hashing pool maps to 503"""
+    monkeypatch.setattr(hasher, "max_pending", 0)
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "user@example.com", "password": "User123!"},
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_calibrate_bcrypt_rounds(monkeypatch):
+    """Test that calibration extrapolates from the probe and clamps the cost"""
+    from app.core import security
+
+    warnings = []
+    monkeypatch.setattr(security.logger, "warning", lambda msg, **kw: warnings.append(kw))
+    # 8 rounds in 4ms: 12 rounds take 64ms, 13 take 128ms
+    monkeypatch.setattr(security, "_timed_hash", lambda hasher: 0.004)
+    assert security.calibrate_bcrypt_rounds(0.1, 10, 15) == 12
+    assert security.calibrate_bcrypt_rounds(10.0, 10, 15) == 15
+    assert not warnings
+
+    # Too slow for the target: the floor wins, and says so
+    assert security.calibrate_bcrypt_rounds(0.01, 12, 15) == 12
+    assert warnings[0]["extra"]["calibrated_rounds"] == 9
+    assert warnings[0]["extra"]["min_rounds"] == 12
+
+
+def test_password_needs_rehash_below_configured_cost():
+    """Test that hashes below the configured cost are flagged"""
+    from passlib.hash import bcrypt
+
+    from app.core.security import password_needs_rehash
+
+    previous = hasher.rounds
+    hasher.configure(6)
+    try:
+        assert password_needs_rehash(bcrypt.using(rounds=4).hash("Secret123!"))
+        assert not password_needs_rehash(bcrypt.using(rounds=7).hash("Secret123!"))
+    finally:
+        hasher.configure(previous or 12)
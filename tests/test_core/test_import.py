@@ -0,0 +1,56 @@
+import os
+import re
+import subprocess
+import sys
+
+from app.core.config import PROJECT_ROOT
+
+# Cumulative `python -X importtime` budget for `import app.main`, in
+# microseconds. Almost all of it is FastAPI itself.
+IMPORT_TIME_BUDGET_US = 1_500_000
+
+CHECK_SIDE_EFFECTS = """
+import logging, sys
+import app.main
+assert not logging.getLogger().handlers, "logging configured at import"
+for module in ("sqlalchemy", "app.db.session", "app.core.hashing", "jose"):
+    assert module not in sys.modules, module + " imported"
+import app.core.rate_limit
+assert app.core.rate_limit.auth_ip_limiter is None, "rate limiter created at import"
+"""
+
+
+def _run(code, cwd, env_overrides=None, *flags):
+    env = {
+        key: value for key, value in os.environ.items()
+        if not key.startswith("POSTGRES_")
+    }
+    env["PYTHONPATH"] = str(PROJECT_ROOT)
+    env.update(env_overrides or {})
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=cwd, env=env, capture_output=True, text=True, timeout=60,
+    )
+
+
+def test_import_has_no_side_effects(tmp_path):
+    """Test that importing app.main reads no settings, files or drivers"""
+    result = _run(CHECK_SIDE_EFFECTS, tmp_path, None, "-X", "importtime")
+    assert result.returncode == 0, result.stderr
+
+    match = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| app\.main$", result.stderr, re.M)
+    assert match is not None
+    assert int(match.group(1)) < IMPORT_TIME_BUDGET_US
+
+
+def test_app_created_outside_project_root(tmp_path):
+    """Test that the app is created from any working directory"""
+    env = {
+        "POSTGRES_SERVER": "x",
+        "POSTGRES_USER": "x",
+        "POSTGRES_PASSWORD": "x",
+        "POSTGRES_DB": "x",
+    }
+    result = _run("from app.main import app; print(app.title)", tmp_path, env)
+    assert result.returncode == 0, result.stderr
+    assert not (tmp_path / "logs").exists()
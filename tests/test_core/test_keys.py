@@ -0,0 +1,113 @@
+import json
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from fastapi.testclient import TestClient
+from jose import JWTError, jwt
+
+from app.core.config import settings
+from app.core.keys import build_key_ring, get_key_ring, thumbprint
+from app.core.security import create_access_token, decode_access_token, token_cache
+
+
+def _write_key(path, private_key):
+    path.write_bytes(
+        private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    return str(path)
+
+
+@pytest.fixture
+def rsa_key_file(tmp_path):
+    return _write_key(
+        tmp_path / "rsa.pem", rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    )
+
+
+@pytest.fixture
+def ec_key_file(tmp_path):
+    return _write_key(tmp_path / "ec.pem", ec.generate_private_key(ec.SECP256R1()))
+
+
+@pytest.fixture
+def configured_key_ring(monkeypatch, rsa_key_file):
+    """Sign the app's tokens with RS256 for the duration of the test"""
+    monkeypatch.setattr(settings, "JWT_ALGORITHM", "RS256")
+    monkeypatch.setattr(settings, "JWT_SIGNING_KEY_FILE", rsa_key_file)
+    get_key_ring.cache_clear()
+    token_cache.clear()
+    yield get_key_ring()
+    monkeypatch.undo()
+    get_key_ring.cache_clear()
+    token_cache.clear()
+
+
+def test_tokens_verify_with_published_keys(rsa_key_file):
+    """Test that a token verifies against the JWKS alone, as other services do"""
+    ring = build_key_ring("RS256", "secret", rsa_key_file)
+    token = ring.sign({"sub": "1"})
+    assert jwt.get_unverified_header(token)["kid"] == ring.signing_kid
+
+    jwks = json.loads(ring.jwks)
+    assert [key["kid"] for key in jwks["keys"]] == [ring.signing_kid]
+    assert "d" not in jwks["keys"][0]
+    assert jwt.decode(token, jwks, algorithms=["RS256"])["sub"] == "1"
+
+
+def test_rotation_accepts_previous_key(rsa_key_file, ec_key_file):
+    """Test that tokens of the previous key verify during a rotation"""
+    old = build_key_ring("RS256", "secret", rsa_key_file)
+    new = build_key_ring("ES256", "secret", ec_key_file, [rsa_key_file])
+    token = old.sign({"sub": "1"})
+
+    assert new.verify(token)["sub"] == "1"
+    assert new.verify(new.sign({"sub": "2"}))["sub"] == "2"
+    assert {key["kid"] for key in json.loads(new.jwks)["keys"]} == {
+        old.signing_kid,
+        new.signing_kid,
+    }
+    with pytest.raises(JWTError):
+        build_key_ring("ES256", "secret", ec_key_file).verify(token)
+
+
+def test_kid_is_thumbprint(rsa_key_file):
+    """Test that every process derives the same kid from the same key"""
+    first = build_key_ring("RS256", "secret", rsa_key_file)
+    second = build_key_ring("RS256", "secret", rsa_key_file)
+    assert first.signing_kid == second.signing_kid
+    assert first.signing_kid == thumbprint(first.keys[first.signing_kid].key)
+
+
+def test_hs256_publishes_nothing():
+    """Test that the shared secret is never published"""
+    ring = build_key_ring("HS256", "secret")
+    assert json.loads(ring.jwks) == {"keys": []}
+    assert ring.verify(ring.sign({"sub": "1"}))["sub"] == "1"
+
+
+def test_access_tokens_signed_with_configured_key(configured_key_ring):
+    """Test that the app signs with the configured key and checks the kid"""
+    token = create_access_token(42)
+    assert jwt.get_unverified_header(token)["alg"] == "RS256"
+    assert decode_access_token(token).sub == 42
+
+    forged = jwt.encode(
+        {"sub": "42", "type": "access"},
+        settings.SECRET_KEY,
+        headers={"kid": configured_key_ring.signing_kid},
+    )
+    with pytest.raises(JWTError):
+        decode_access_token(forged)
+
+
+def test_jwks_endpoint(client: TestClient, configured_key_ring):
+    """Test that the JWKS is served with caching headers"""
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert response.json() == json.loads(configured_key_ring.jwks)
+    assert response.headers["cache-control"] == "public, max-age=300"
@@ -0,0 +1,79 @@
+import logging
+import queue
+import threading
+
+import pytest
+
+from app.core.logging import (
+    BoundedQueueHandler,
+    queue_logging_stats,
+    start_queue_logging,
+    stop_queue_logging,
+)
+from app.core.middleware import request_id_contextvar
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((record, threading.current_thread().name))
+
+
+@pytest.fixture
+def isolated_logger():
+    logger = logging.getLogger("tests.queue_logging")
+    handler = ListHandler()
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    yield logger, handler
+    stop_queue_logging()
+    logger.handlers = []
+
+
+def test_records_are_handled_on_listener_thread(isolated_logger):
+    """Test that handlers run on the listener thread with the request ID"""
+    logger, handler = isolated_logger
+    start_queue_logging(max_size=100)
+    assert logger.handlers != [handler]
+
+    token = request_id_contextvar.set("req-1")
+    try:
+        logger.info("hello %s", "world")
+    finally:
+        request_id_contextvar.reset(token)
+    stop_queue_logging()
+
+    assert logger.handlers == [handler]
+    record, thread_name = handler.records[-1]
+    assert record.getMessage() == "hello world"
+    assert record.request_id == "req-1"
+    assert thread_name != threading.current_thread().name
+
+
+def test_drop_new_policy_counts_dropped_records():
+    """Test that a full queue drops new records without blocking"""
+    log_queue = queue.Queue(maxsize=1)
+    handler = BoundedQueueHandler(log_queue, [ListHandler()], "drop_new")
+    for message in ("first", "second", "third"):
+        handler.handle(logging.makeLogRecord({"msg": message}))
+    assert handler.dropped == 2
+    assert log_queue.get_nowait().msg == "first"
+
+
+def test_drop_oldest_policy_keeps_newest_record():
+    """Test that drop_oldest evicts queued records in favour of new ones"""
+    log_queue = queue.Queue(maxsize=1)
+    handler = BoundedQueueHandler(log_queue, [ListHandler()], "drop_oldest")
+    for message in ("first", "second", "third"):
+        handler.handle(logging.makeLogRecord({"msg": message}))
+    assert handler.dropped == 2
+    assert log_queue.get_nowait().msg == "third"
+
+
+def test_stats_when_not_running():
+    """Test the stats of a stopped queue"""
+    assert queue_logging_stats() == {"queued": 0, "dropped": 0}
@@ -0,0 +1,113 @@
+import os
+import sys
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.core.metrics import (
+    MetricsRegistry,
+    generate_latest,
+    merge,
+    read_snapshots,
+    render,
+    write_snapshot,
+)
+
+
+def test_counter_and_histogram_rendering():
+    """Test that counters and cumulative histogram buckets are rendered"""
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs", ["kind"])
+    histogram = registry.histogram("job_seconds", "Job time", buckets=(0.1, 1.0))
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    text = render(registry.collect())
+    assert "# TYPE jobs_total counter" in text
+    assert 'jobs_total{kind="a"} 3' in text
+    assert 'job_seconds_bucket{le="0.1"} 1' in text
+    assert 'job_seconds_bucket{le="1"} 2' in text
+    assert 'job_seconds_bucket{le="+Inf"} 3' in text
+    assert "job_seconds_count 3" in text
+    assert "job_seconds_sum 5.55" in text
+
+
+def test_collectors_run_on_collect():
+    """Test that collectors update sampled metrics at scrape time"""
+    registry = MetricsRegistry()
+    gauge = registry.gauge("queue_size", "Queue size")
+    registry.register_collector(lambda: gauge.set(7))
+    assert "queue_size 7" in render(registry.collect())
+
+
+def test_recording_from_threads_loses_nothing():
+    """Test that concurrent observations from worker threads are all counted"""
+    registry = MetricsRegistry()
+    counter = registry.counter("checkouts_total", "Checkouts", ["engine"])
+    histogram = registry.histogram("wait_seconds", "Wait", ["engine"], buckets=(1.0,))
+    threads, per_thread = 8, 5000
+
+    def record(index):
+        for _ in range(per_thread):
+            counter.inc(f"engine-{index % 2}")
+            histogram.observe(0.5, f"engine-{index % 2}")
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        workers = [threading.Thread(target=record, args=(i,)) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    total = threads * per_thread
+    text = render(registry.collect())
+    assert 'checkouts_total{engine="engine-0"} %d' % (total // 2) in text
+    assert 'checkouts_total{engine="engine-1"} %d' % (total // 2) in text
+    assert 'wait_seconds_count{engine="engine-0"} %d' % (total // 2) in text
+    assert 'wait_seconds_sum{engine="engine-1"} %d' % (total // 4) in text
+    # The increments of exited threads are folded together and kept
+    assert not counter._shards
+    assert 'checkouts_total{engine="engine-0"} %d' % (total // 2) in render(
+        registry.collect()
+    )
+
+
+def test_merge_sums_worker_snapshots():
+    """Test that snapshots of several workers are summed"""
+    snapshots = []
+    for value in (1, 2):
+        registry = MetricsRegistry()
+        registry.counter("jobs_total", "Jobs").inc(amount=value)
+        registry.histogram("job_seconds", "Job time", buckets=(1.0,)).observe(value)
+        snapshots.append(registry.collect())
+
+    text = render(merge(snapshots))
+    assert "jobs_total 3" in text
+    assert 'job_seconds_bucket{le="1"} 1' in text
+    assert "job_seconds_count 2" in text
+
+
+def test_multiprocess_snapshots(tmp_path):
+    """Test that snapshots are written per process and read back"""
+    directory = str(tmp_path)
+    write_snapshot(directory)
+    assert os.listdir(directory) == [f"metrics-{os.getpid()}.json"]
+    assert len(read_snapshots(directory)) == 1
+    assert "http_requests_total" in generate_latest(directory)
+
+
+def test_metrics_endpoint(client: TestClient, normal_user_token_headers: dict):
+    """Test that /metrics reports requests by route template"""
+    client.get("/api/v1/users/me", headers=normal_user_token_headers)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'route="/api/v1/users/me"' in response.text
+    assert 'http_requests_total{method="GET",route="/api/v1/users/me",status="200"}' in response.text
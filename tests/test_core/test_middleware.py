@@ -0,0 +1,36 @@
+import logging
+
+from fastapi.testclient import TestClient
+
+from app.core.logging import RequestIdFilter
+from app.core.middleware import request_id_contextvar
+
+
+def test_timing_headers(client: TestClient):
+    """Test that responses carry the request ID and processing time"""
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert len(response.headers["X-Request-ID"]) == 36
+    assert float(response.headers["X-Process-Time"]) >= 0
+
+
+def test_request_ids_are_unique(client: TestClient):
+    """Test that every request gets its own ID"""
+    first = client.get("/health").headers["X-Request-ID"]
+    second = client.get("/health").headers["X-Request-ID"]
+    assert first != second
+
+
+def test_request_id_filter():
+    """Test that log records pick up the request ID from the context"""
+    record = logging.LogRecord("app", logging.INFO, __file__, 1, "msg", None, None)
+    RequestIdFilter().filter(record)
+    assert record.request_id == "-"
+
+    token = request_id_contextvar.set("abc")
+    try:
+        record = logging.LogRecord("app", logging.INFO, __file__, 1, "msg", None, None)
+        RequestIdFilter().filter(record)
+        assert record.request_id == "abc"
+    finally:
+        request_id_contextvar.reset(token)
@@ -0,0 +1,87 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core import middleware
+from app.core.config import settings
+from app.core.query_stats import (
+    QueryStats,
+    capture_queries,
+    query_stats_contextvar,
+    statement_shape,
+)
+
+
+def test_statement_shape_collapses_parameter_lists():
+    """Test that IN lists of any length share one shape"""
+    assert statement_shape("SELECT * FROM users WHERE id IN (?, ?)") == statement_shape(
+        "SELECT *\n  FROM users WHERE id IN (?,?,?)"
+    )
+    assert statement_shape("SELECT * FROM t WHERE a IN (%(p1)s, %(p2)s)") == (
+        "SELECT * FROM t WHERE a IN (?)"
+    )
+    assert statement_shape("SELECT count(*) FROM t") == "SELECT count(*) FROM t"
+
+
+def test_repeated_shapes():
+    """Test that shapes over the threshold are reported"""
+    stats = QueryStats()
+    for i in range(4):
+        stats.record("SELECT * FROM users WHERE id = ?", 0.001)
+    stats.record("SELECT * FROM items", 0.001)
+    assert stats.count == 5
+    assert stats.repeated(3) == [("SELECT * FROM users WHERE id = ?", 4)]
+    assert stats.repeated(4) == []
+
+
+def test_engine_statements_are_recorded():
+    """Test that statements are counted for captures and the current request"""
+    engine = create_engine("sqlite://")
+    stats = QueryStats()
+    token = query_stats_contextvar.set(stats)
+    try:
+        with capture_queries() as captured, engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+    finally:
+        query_stats_contextvar.reset(token)
+    engine.dispose()
+    assert captured.count == stats.count == 2
+    assert stats.duration > 0
+
+
+def test_failed_statement_is_not_recorded():
+    """Test that a failing statement leaves no timing state behind"""
+    engine = create_engine("sqlite://")
+    with capture_queries() as captured, engine.connect() as connection:
+        try:
+            connection.execute(text("SELECT * FROM missing"))
+        except Exception:
+            pass
+        assert not connection.info["query_start_time"]
+    engine.dispose()
+    assert captured.count == 0
+
+
+def test_query_stats_headers(client: TestClient, superuser_token_headers: dict, monkeypatch):
+    """Test that query statistics are returned as headers when enabled"""
+    response = client.get("/api/v1/users/", headers=superuser_token_headers)
+    assert "X-DB-Query-Count" not in response.headers
+
+    monkeypatch.setattr(settings, "DB_QUERY_STATS_HEADERS", True)
+    response = client.get("/api/v1/users/", headers=superuser_token_headers)
+    assert int(response.headers["X-DB-Query-Count"]) >= 1
+    assert float(response.headers["X-DB-Query-Time"]) > 0
+
+
+def test_repeated_statements_are_logged(
+    client: TestClient, superuser_token_headers: dict, monkeypatch
+):
+    """Test that a statement repeated past the threshold logs a warning"""
+    warnings = []
+    monkeypatch.setattr(
+        middleware.logger, "warning", lambda msg, **kw: warnings.append(kw["extra"])
+    )
+    monkeypatch.setattr(settings, "DB_QUERY_REPEAT_THRESHOLD", 0)
+    client.get("/api/v1/users/", headers=superuser_token_headers)
+    assert warnings and warnings[0]["path"] == "/api/v1/users/"
+    assert warnings[0]["statement"].startswith("SELECT")
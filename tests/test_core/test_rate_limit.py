@@ -0,0 +1,118 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.rate_limit import (
+    TOKEN_BUCKET_SCRIPT,
+    MemoryRateLimiter,
+    RedisRateLimiter,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """Evaluates the token bucket script in Python, like Redis would atomically"""
+
+    def __init__(self):
+        self.store = {}
+
+    async def eval(self, script, numkeys, key, capacity, rate):
+        assert script == TOKEN_BUCKET_SCRIPT and numkeys == 1
+        now = time.time()
+        tokens, ts = self.store.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - ts) * rate)
+        wait = 0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = -(-(1 - tokens) / rate * 1000 // 1)
+        self.store[key] = (tokens, now)
+        return wait
+
+
+class BrokenRedis:
+    async def eval(self, *args):
+        raise ConnectionError("redis is down")
+
+
+@pytest.mark.asyncio
+async def test_memory_bucket_burst_and_refill():
+    """Test that a bucket allows a burst and then refills over time"""
+    clock = FakeClock()
+    limiter = MemoryRateLimiter(capacity=3, rate=1.0, clock=clock)
+    assert [await limiter.acquire("a") for _ in range(3)] == [0, 0, 0]
+    assert await limiter.acquire("a") == pytest.approx(1.0)
+    assert await limiter.acquire("b") == 0
+
+    clock.now += 1
+    assert await limiter.acquire("a") == 0
+    assert await limiter.acquire("a") > 0
+
+
+@pytest.mark.asyncio
+async def test_memory_buckets_are_evicted():
+    """Test that refilled buckets are dropped and the key count is bounded"""
+    clock = FakeClock()
+    limiter = MemoryRateLimiter(capacity=2, rate=1.0, max_keys=3, clock=clock)
+    for key in "abc":
+        await limiter.acquire(key)
+    clock.now += 2
+    await limiter.acquire("d")
+    assert len(limiter) == 1
+
+    for key in "efgh":
+        await limiter.acquire(key)
+    assert len(limiter) == 3
+
+
+@pytest.mark.asyncio
+async def test_redis_limiter():
+    """Test the shared backend against a fake client"""
+    limiter = RedisRateLimiter(FakeRedis(), capacity=2, rate=0.5, prefix="rate:")
+    assert await limiter.acquire("a") == 0
+    assert await limiter.acquire("a") == 0
+    assert await limiter.acquire("a") == pytest.approx(2.0, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_redis_limiter_fails_open():
+    """Test that requests pass when Redis is unavailable"""
+    limiter = RedisRateLimiter(BrokenRedis(), capacity=1, rate=1, prefix="rate:")
+    assert await limiter.acquire("a") == 0
+
+
+def test_limiters_are_created_on_first_use():
+    """Test that the limiters are built by init_rate_limiters, not at import"""
+    from app.core import rate_limit
+
+    assert rate_limit.auth_ip_limiter is None
+    rate_limit.init_rate_limiters()
+    assert isinstance(rate_limit.auth_ip_limiter, MemoryRateLimiter)
+    assert isinstance(rate_limit.auth_email_limiter, MemoryRateLimiter)
+
+
+def test_login_rate_limited(client: TestClient, monkeypatch):
+    """Test that repeated logins for one email get 429 before bcrypt runs"""
+    from app.core import hashing
+
+    login_data = {"username": "limited@example.com", "password": "wrong"}
+    for _ in range(settings.RATE_LIMIT_EMAIL_BURST):
+        assert client.post("/api/v1/auth/login", data=login_data).status_code == 401
+
+    def fail(*args, **kwargs):
+        raise AssertionError("bcrypt should not run")
+
+    monkeypatch.setattr(hashing.hasher, "verify", fail)
+    monkeypatch.setattr(hashing.hasher, "hash", fail)
+    response = client.post("/api/v1/auth/login", data=login_data)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
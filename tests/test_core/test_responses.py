@@ -0,0 +1,33 @@
+import json
+from types import SimpleNamespace
+
+from app.core import responses
+from app.core.responses import FastJSONResponse, list_adapter, model_list_response
+from app.schemas.user import User as UserSchema
+
+
+def test_fast_json_response_matches_stdlib(monkeypatch):
+    """Test that both encoders produce the same document"""
+    content = {"id": 1, "name": "Zoë", "tags": ["a", None]}
+    fast = FastJSONResponse(content).body
+    monkeypatch.setattr(responses, "orjson", None)
+    fallback = FastJSONResponse(content).body
+    assert json.loads(fast) == json.loads(fallback) == content
+
+
+def test_model_list_response_from_attributes():
+    """Test that ORM-like rows are serialized through the cached adapter"""
+    rows = [
+        SimpleNamespace(
+            id=i, email=f"user{i}@example.com", full_name=None,
+            is_active=True, is_superuser=False, hashed_password="secret",
+        )
+        for i in range(3)
+    ]
+    response = model_list_response(UserSchema, rows, headers={"X-Next-Cursor": "abc"})
+    body = json.loads(response.body)
+    assert [user["id"] for user in body] == [0, 1, 2]
+    assert "hashed_password" not in body[0]
+    assert response.headers["X-Next-Cursor"] == "abc"
+    assert response.media_type == "application/json"
+    assert list_adapter(UserSchema) is list_adapter(UserSchema)
@@ -0,0 +1,56 @@
+import time
+
+from app.core.revocation import Revocation, RevocationList
+from app.schemas.token import TokenPayload
+from app.utils.bloom import BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test that every added item is found and few others are"""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"added-{i}")
+    assert all(f"added-{i}" in bloom for i in range(1000))
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_revoked_token_and_session():
+    """Test that a revoked jti or sid revokes the token"""
+    revocations = RevocationList(capacity=100)
+    expires_at = time.time() + 60
+    revocations.add(Revocation("token", 1, time.time(), expires_at))
+    revocations.add(Revocation("session", 1, time.time(), expires_at))
+
+    assert revocations.is_revoked(TokenPayload(sub=1, jti="token", sid="other"))
+    assert revocations.is_revoked(TokenPayload(sub=1, jti="other", sid="session"))
+    assert not revocations.is_revoked(TokenPayload(sub=1, jti="other", sid="other"))
+
+
+def test_user_revocation_applies_to_earlier_tokens():
+    """Test that a user-wide revocation spares tokens issued after it"""
+    revocations = RevocationList(capacity=100)
+    now = time.time()
+    revocations.add(Revocation(None, 7, now, now + 60))
+
+    assert revocations.is_revoked(TokenPayload(sub=7, iat=now - 1, jti="a"))
+    assert not revocations.is_revoked(TokenPayload(sub=7, iat=now + 1, jti="b"))
+    assert not revocations.is_revoked(TokenPayload(sub=8, iat=now - 1, jti="c"))
+
+
+def test_replace_drops_expired_entries():
+    """Test that a reload forgets revocations whose tokens have expired"""
+    revocations = RevocationList(capacity=100)
+    now = time.time()
+    revocations.add(Revocation("stale", None, now, now + 60))
+    revocations.replace(
+        [
+            Revocation("expired", None, now - 120, now - 60),
+            Revocation("live", None, now, now + 60),
+        ]
+    )
+
+    assert len(revocations) == 1
+    assert revocations.is_revoked(TokenPayload(jti="live"))
+    assert not revocations.is_revoked(TokenPayload(jti="expired"))
+    assert not revocations.is_revoked(TokenPayload(jti="stale"))
@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+import pytest
+from jose import JWTError
+
+from app.core import keys
+from app.core.config import settings
+from app.core.security import create_access_token, decode_access_token, token_cache
+from app.utils.cache import LRUCache
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+def test_repeated_decode_hits_cache():
+    """Test that the second decode of a token is served from the cache"""
+    token = create_access_token(42, expires_delta=timedelta(minutes=5))
+    first = decode_access_token(token)
+    second = decode_access_token(token)
+    assert first.sub == second.sub == 42
+    assert token_cache.misses == 1
+    assert token_cache.hits == 1
+
+
+def test_cache_disabled(monkeypatch):
+    """Test the TOKEN_CACHE_ENABLED kill switch"""
+    monkeypatch.setattr(settings, "TOKEN_CACHE_ENABLED", False)
+    token = create_access_token(42, expires_delta=timedelta(minutes=5))
+    decode_access_token(token)
+    decode_access_token(token)
+    assert len(token_cache) == 0
+
+
+def test_cached_claims_do_not_outlive_exp(monkeypatch):
+    """Test that a cached token is rejected once its exp has passed"""
+    token = create_access_token(42, expires_delta=timedelta(minutes=5))
+    token_data = decode_access_token(token)
+
+    monkeypatch.setattr(token_cache, "_clock", lambda: token_data.exp + 1)
+    monkeypatch.setattr(keys.jwt, "decode", _raise_expired)
+    with pytest.raises(JWTError):
+        decode_access_token(token)
+
+
+def _raise_expired(*args, **kwargs):
+    raise JWTError("Signature has expired.")
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test that the cache stays within maxsize"""
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
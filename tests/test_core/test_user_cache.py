@@ -0,0 +1,126 @@
+import asyncio
+from typing import Dict
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.user_cache import CachedUser, MemoryUserCache, RedisUserCache, user_cache
+from app.utils.etag import etag_matches, user_etag
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for a Redis client"""
+
+    def __init__(self):
+        self.store: Dict[str, bytes] = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value.encode()
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+
+
+def _cached_user(**overrides) -> CachedUser:
+    fields = dict(
+        id=1,
+        email="cached@example.com",
+        full_name="Cached",
+        is_active=True,
+        is_superuser=False,
+    )
+    fields.update(overrides)
+    return CachedUser(**fields)
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_set_and_delete():
+    """Test the in-process backend"""
+    cache = MemoryUserCache(maxsize=10, ttl=60)
+    await cache.set(_cached_user())
+    assert (await cache.get(1)).email == "cached@example.com"
+
+    await cache.delete(1)
+    assert await cache.get(1) is None
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_expires_entries():
+    """Test that in-process entries expire after the TTL"""
+    cache = MemoryUserCache(maxsize=10, ttl=0)
+    await cache.set(_cached_user())
+    assert await cache.get(1) is None
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_round_trip():
+    """Test the Redis backend against a local fake"""
+    cache = RedisUserCache(FakeRedis(), ttl=60)
+    assert await cache.get(1) is None
+
+    await cache.set(_cached_user(is_superuser=True))
+    assert await cache.get(1) == _cached_user(is_superuser=True)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    await cache.delete(1)
+    assert await cache.get(1) is None
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_errors_are_misses():
+    """Test that Redis failures fall back to the database"""
+
+    class BrokenRedis(FakeRedis):
+        async def get(self, key):
+            raise ConnectionError("redis is down")
+
+    cache = RedisUserCache(BrokenRedis(), ttl=60)
+    assert await cache.get(1) is None
+
+
+def test_update_invalidates_cached_identity(
+    client: TestClient,
+    superuser_token_headers: dict,
+    normal_user_token_headers: dict,
+):
+    """Test that a deactivated user is not served from the cache"""
+    if not isinstance(user_cache, MemoryUserCache):
+        pytest.skip("requires the in-process user cache")
+
+    response = client.get("/api/v1/users/me", headers=normal_user_token_headers)
+    user_id = response.json()["id"]
+    assert asyncio.run(user_cache.get(user_id)).is_active
+
+    response = client.put(
+        f"/api/v1/users/{user_id}",
+        json={"is_active": False},
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    # The entry now holds the row the UPDATE returned
+    assert asyncio.run(user_cache.get(user_id)).is_active is False
+
+    response = client.get("/api/v1/users/me", headers=normal_user_token_headers)
+    assert response.status_code == 400
+
+    client.put(
+        f"/api/v1/users/{user_id}",
+        json={"is_active": True},
+        headers=superuser_token_headers,
+    )
+
+
+def test_etag_matching():
+    """Test weak comparison of If-None-Match against an ETag"""
+    etag = user_etag(1, 1700000000.5)
+    assert etag == user_etag(1, 1700000000.5)
+    assert etag != user_etag(1, 1700000000.6)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"x", {etag.removeprefix("W/")}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"other"', etag)
+    assert not etag_matches(None, etag)
+    assert user_etag(1, None) is None
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.query_stats import capture_queries
+from app.models.user import User
+from app.services.dataloader import DataLoader
+from app.services.user_service import UserService
+from tests.conftest import TestingAsyncSessionLocal
+
+
+class RecordingBatch:
+    """Batch function returning each key doubled and recording its calls"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, keys):
+        self.calls.append(list(keys))
+        return {key: key * 2 for key in keys if key >= 0}
+
+
+@pytest.mark.asyncio
+async def test_loads_in_one_tick_are_batched():
+    """Test that concurrent loads share one deduplicated batch"""
+    batch = RecordingBatch()
+    loader = DataLoader(batch)
+    values = await asyncio.gather(loader.load(1), loader.load(2), loader.load(1))
+    assert values == [2, 4, 2]
+    assert batch.calls == [[1, 2]]
+
+    assert await loader.load_many([2, 3, -1]) == [4, 6, None]
+    assert batch.calls == [[1, 2], [3, -1]]
+
+
+@pytest.mark.asyncio
+async def test_clear_and_max_batch_size():
+    """Test that cleared keys are fetched again and batches are split"""
+    batch = RecordingBatch()
+    loader = DataLoader(batch, max_batch_size=2)
+    await loader.load_many([1, 2, 3])
+    assert batch.calls == [[1, 2], [3]]
+
+    loader.clear(1)
+    await loader.load_many([1, 2])
+    assert batch.calls[-1] == [1]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_not_memoized():
+    """Test that a failing batch fails its loads and is retried next time"""
+    attempts = []
+
+    async def flaky(keys):
+        attempts.append(keys)
+        if len(attempts) == 1:
+            raise RuntimeError("database unavailable")
+        return {key: key for key in keys}
+
+    loader = DataLoader(flaky)
+    with pytest.raises(RuntimeError):
+        await asyncio.gather(loader.load(1), loader.load(2))
+    assert await loader.load(1) == 1
+
+
+@pytest.mark.asyncio
+async def test_user_service_batches_gets(db: Session):
+    """Test that UserService.get calls of one tick run a single IN query"""
+    users = [User(email=f"loader{i}@example.com", hashed_password="x") for i in range(3)]
+    db.add_all(users)
+    db.commit()
+    ids = [user.id for user in users]
+
+    async with TestingAsyncSessionLocal() as session:
+        with capture_queries() as stats:
+            found = await asyncio.gather(
+                UserService(session).get(id=ids[0]),
+                UserService(session).get(id=ids[1]),
+                UserService(session).get(id=ids[0]),
+                UserService(session).get(id=999999),
+            )
+            again = await UserService(session).get(id=ids[1])
+        assert [user and user.id for user in found] == [ids[0], ids[1], ids[0], None]
+        assert again is found[1]
+        assert stats.count == 1
+
+    # The sync session goes through the threadpool the same way
+    fetched = await UserService(db).get_many(ids)
+    assert [user.email for user in fetched] == [user.email for user in users]
@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.crud import user as crud_user
+from app.crud import user_async as crud_user_async
+from app.models.user import User
+from app.schemas.user import UserCreate
+from app.services.user_service import UserService
+from tests.conftest import TestingAsyncSessionLocal, random_email
+
+
+@pytest.mark.asyncio
+async def test_service_with_async_session(db: Session):
+    """Test the service against the async SQLite driver"""
+    async with TestingAsyncSessionLocal() as session:
+        user_service = UserService(session)
+        user = await user_service.create(
+            obj_in=UserCreate(
+                email="async-service@example.com",
+                password="Async123!",
+                full_name="Async Service",
+            )
+        )
+        assert user.id is not None
+
+        fetched = await user_service.get(id=user.id)
+        assert fetched.email == "async-service@example.com"
+
+        updated = await user_service.update(
+            id=user.id, obj_in={"full_name": "Renamed"}
+        )
+        assert updated.full_name == "Renamed"
+
+        removed = await user_service.remove(id=user.id)
+        assert removed.id == user.id
+        assert await user_service.get(id=user.id) is None
+        assert await user_service.update(id=user.id, obj_in={"full_name": "X"}) is None
+        assert await user_service.remove(id=user.id) is None
+
+
+@pytest.mark.asyncio
+async def test_service_with_sync_session(db: Session):
+    """Test that sync sessions are dispatched to the threadpool"""
+    user_service = UserService(db)
+    user = await user_service.create(
+        obj_in=UserCreate(
+            email="sync-service@example.com",
+            password="Sync1234!",
+            full_name="Sync Service",
+        )
+    )
+    fetched = await user_service.get_by_email(email=user.email)
+    assert fetched.id == user.id
+
+    await user_service.remove(id=user.id)
+    assert await user_service.get(id=user.id) is None
+
+
+@pytest.mark.asyncio
+async def test_stream_batches_with_sync_session(db: Session):
+    """Test that sync sessions stream export batches through the threadpool"""
+    user_service = UserService(db)
+    batches = [batch async for batch in user_service.stream(batch_size=1)]
+    assert batches
+    assert all(len(batch) == 1 for batch in batches)
+
+
+@pytest.mark.asyncio
+async def test_crud_refuses_plain_passwords(db: Session):
+    """Test that passwords reach the CRUD layer only as hashes from the hasher"""
+    with pytest.raises(ValueError):
+        crud_user.update_user(db, id=1, obj_in={"password": "Plain123!"})
+    async with TestingAsyncSessionLocal() as session:
+        with pytest.raises(ValueError):
+            await crud_user_async.update_user(
+                session, id=1, obj_in={"password": "Plain123!"}
+            )
+
+
+def test_only_the_unique_email_constraint_is_a_duplicate(db: Session):
+    """Test that other integrity errors on users.email are not reported as duplicates"""
+    user = User(email="not-null@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    try:
+        with pytest.raises(IntegrityError) as raised:
+            crud_user.update_user(db, id=user.id, obj_in={"email": None})
+        assert "NOT NULL" in str(raised.value.orig)
+        assert not crud_user.is_duplicate_email(raised.value)
+    finally:
+        db.delete(user)
+        db.commit()
+
+    class PostgresError(Exception):
+        def __init__(self, constraint_name):
+            super().__init__("violates constraint")
+            self.diag = SimpleNamespace(constraint_name=constraint_name)
+
+    def error(orig):
+        return IntegrityError("INSERT", {}, orig)
+
+    assert crud_user.is_duplicate_email(error(PostgresError("ix_users_email")))
+    assert not crud_user.is_duplicate_email(error(PostgresError("users_email_check")))
+
+
+@pytest.mark.asyncio
+async def test_core_writes_expire_loaded_users(db: Session):
+    """Test that a user loaded in the session does not keep pre-update values"""
+    async with TestingAsyncSessionLocal() as session:
+        row = await crud_user_async.create_user(
+            session,
+            UserCreate(email=random_email("expire"), password="Expire123!"),
+            hashed_password="x",
+        )
+        user = await crud_user_async.get_user(session, row.id)
+        await crud_user_async.update_user(
+            session, id=row.id, obj_in={"full_name": "Renamed"}
+        )
+        # get() refreshes an expired instance instead of returning it as is
+        assert (await session.get(User, row.id)).full_name == "Renamed"
+        assert user.full_name == "Renamed"
+
+        await crud_user_async.delete_user(session, id=row.id)
+        assert await session.get(User, row.id) is None